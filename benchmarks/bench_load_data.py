@@ -0,0 +1,124 @@
+# benchmarks/bench_load_data.py
+"""
+Compares the extract-then-read flow of load_data with reading the policy file
+straight out of the nested zip archives.
+
+Each flow runs in a fresh process so peak RSS is measured independently.
+
+Usage:
+    python -m benchmarks.bench_load_data --rows 1000000
+"""
+import argparse
+import multiprocessing as mp
+import os
+import resource
+import shutil
+import tempfile
+import time
+import zipfile
+import numpy as np
+import pandas as pd
+
+from scripts.load_data import load_data
+
+FILENAME = 'MachineLearningRating_v3.txt'
+
+def write_nested_zip(directory: str, n_rows: int, seed: int = 42) -> str:
+    """
+    Writes a policy-like pipe-separated file nested inside an inner and an outer zip.
+
+    Returns:
+        str: Path to the outer zip file.
+    """
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'PolicyID': np.arange(n_rows),
+        'TransactionMonth': rng.choice(pd.date_range('2013-10-01', '2015-08-01', freq='MS').astype(str), n_rows),
+        'Province': rng.choice(['Gauteng', 'Western Cape', 'KwaZulu-Natal', 'Eastern Cape', 'Limpopo'], n_rows),
+        'PostalCode': rng.integers(1, 9999, n_rows),
+        'Gender': rng.choice(['Male', 'Female', 'Not specified'], n_rows),
+        'CoverType': rng.choice(['Own Damage', 'Windscreen', 'Third Party', 'Theft'], n_rows),
+        'make': rng.choice(['TOYOTA', 'MERCEDES-BENZ', 'VOLKSWAGEN', 'NISSAN'], n_rows),
+        'SumInsured': rng.lognormal(10, 1.5, n_rows).round(2),
+        'TotalPremium': rng.lognormal(3, 1.2, n_rows).round(6),
+        'TotalClaims': np.where(rng.random(n_rows) < 0.003, rng.lognormal(9, 1.5, n_rows), 0.0).round(6),
+    })
+    txt_path = os.path.join(directory, FILENAME)
+    df.to_csv(txt_path, sep='|', index=False)
+
+    inner_zip_path = os.path.join(directory, 'MachineLearningRating_v3.zip')
+    with zipfile.ZipFile(inner_zip_path, 'w', zipfile.ZIP_DEFLATED) as inner_zip:
+        inner_zip.write(txt_path, arcname=FILENAME)
+    outer_zip_path = os.path.join(directory, 'data.zip')
+    with zipfile.ZipFile(outer_zip_path, 'w', zipfile.ZIP_STORED) as outer_zip:
+        outer_zip.write(inner_zip_path, arcname='MachineLearningRating_v3.zip')
+
+    os.remove(txt_path)
+    os.remove(inner_zip_path)
+    return outer_zip_path
+
+def _peak_rss_mb() -> float:
+    """
+    Returns the peak resident set size of the current process in MB.
+
+    VmHWM is preferred on Linux because ru_maxrss survives exec and would report
+    the parent's peak for spawned workers.
+    """
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # ru_maxrss is reported in kilobytes on Linux and bytes on macOS
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def _run_flow(flow: str, outer_zip_path: str, queue: mp.Queue) -> None:
+    """
+    Loads the data with one flow and reports wall time and peak RSS to the parent.
+    """
+    extract_to = None
+    if flow == 'extract':
+        extract_to = tempfile.mkdtemp()
+
+    start = time.perf_counter()
+    df = load_data(outer_zip_path, FILENAME, extract_to=extract_to)
+    elapsed = time.perf_counter() - start
+
+    if extract_to is not None:
+        shutil.rmtree(extract_to)
+    queue.put({'flow': flow, 'rows': len(df), 'wall_time_s': elapsed, 'peak_rss_mb': _peak_rss_mb()})
+
+def run_benchmark(n_rows: int, repeat: int = 3) -> pd.DataFrame:
+    """
+    Runs both flows `repeat` times over a generated archive of `n_rows` rows.
+
+    Returns:
+        pd.DataFrame: Best wall time and peak RSS per flow.
+    """
+    ctx = mp.get_context('spawn')
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        outer_zip_path = write_nested_zip(tmp_dir, n_rows)
+        records = []
+        for _ in range(repeat):
+            for flow in ('extract', 'stream'):
+                queue = ctx.Queue()
+                process = ctx.Process(target=_run_flow, args=(flow, outer_zip_path, queue))
+                process.start()
+                records.append(queue.get())
+                process.join()
+    finally:
+        shutil.rmtree(tmp_dir)
+
+    results = pd.DataFrame(records).groupby('flow').agg(
+        rows=('rows', 'first'), wall_time_s=('wall_time_s', 'min'), peak_rss_mb=('peak_rss_mb', 'max'))
+    return results
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1_000_000, help='Number of rows in the generated file')
+    parser.add_argument('--repeat', type=int, default=3, help='Number of runs per flow')
+    args = parser.parse_args()
+    print(run_benchmark(args.rows, args.repeat).to_string())
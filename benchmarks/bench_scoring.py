@@ -0,0 +1,141 @@
+# benchmarks/bench_scoring.py
+"""
+Load test of the premium scoring service: latency percentiles and throughput of
+single-quote requests sent by concurrent clients.
+
+Each configuration is measured in-process through the MicroBatcher ('direct') and
+over HTTP through the local scoring server ('http'), with and without micro-batching.
+
+Usage:
+    python -m benchmarks.bench_scoring --requests 2000 --concurrency 1 8 32
+"""
+import argparse
+import http.client
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from sklearn.feature_selection import f_regression
+
+from scripts.feature_matrix import FeatureMatrix
+from scripts.model_training import make_model
+from scripts.preprocessing_pipeline import PreprocessingPipeline
+from scripts.scoring_service import MicroBatcher, PremiumScorer, make_http_server
+
+def make_policies(n_rows: int, seed: int = 42) -> pd.DataFrame:
+    """
+    Generates policy-like rows with the columns used by the preprocessing pipeline.
+    """
+    rng = np.random.default_rng(seed)
+    sum_insured = rng.lognormal(11, 1.0, n_rows).round(2)
+    province = rng.choice(['Gauteng', 'Western Cape', 'KwaZulu-Natal', 'Eastern Cape', 'Limpopo'], n_rows)
+    return pd.DataFrame({
+        'TransactionMonth': rng.choice(pd.date_range('2013-10-01', '2015-08-01', freq='MS').astype(str), n_rows),
+        'IsVATRegistered': rng.random(n_rows) < 0.01,
+        'Title': rng.choice(['Mr', 'Mrs', 'Ms', 'Miss', 'Dr'], n_rows),
+        'Gender': rng.choice(['Male', 'Female', 'Not specified'], n_rows),
+        'Province': province,
+        'CoverType': rng.choice([f'Cover {i}' for i in range(15)], n_rows),
+        'PostalCode': rng.integers(1, 500, n_rows).astype(str),
+        'make': rng.choice(['TOYOTA', 'MERCEDES-BENZ', 'VOLKSWAGEN', 'NISSAN', 'FORD'], n_rows),
+        'CapitalOutstanding': rng.choice(['0', '119300', '52000'], n_rows),
+        'SumInsured': sum_insured,
+        'Cylinders': rng.choice([4, 6, 8], n_rows),
+        'TotalPremium': (sum_insured * 0.002 * np.where(province == 'Gauteng', 1.3, 1.0)
+                         * rng.lognormal(0, 0.3, n_rows)).round(6),
+        'TotalClaims': np.where(rng.random(n_rows) < 0.003, rng.lognormal(9, 1.5, n_rows), 0.0).round(6),
+    })
+
+def build_scorer(n_train: int) -> PremiumScorer:
+    """
+    Fits a sparse pipeline and an XGBoost model on generated policies.
+    """
+    data = make_policies(n_train)
+    pipeline = PreprocessingPipeline(k=20, score_func=f_regression, sparse=True).fit(data)
+    matrix = FeatureMatrix.from_pipeline(pipeline, data)
+    model = make_model('XGBoost', n_estimators=200, early_stopping_rounds=None)
+    model.fit(matrix.X, matrix.y)
+    return PremiumScorer(pipeline, model)
+
+def _load_test(send, records: list, concurrency: int) -> dict:
+    """
+    Sends every record as its own request from `concurrency` client threads.
+    """
+    latencies = np.empty(len(records))
+
+    def client(worker: int):
+        for i in range(worker, len(records), concurrency):
+            start = time.perf_counter()
+            send(records[i])
+            latencies[i] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(client, range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    p50, p95, p99 = np.percentile(latencies * 1000, [50, 95, 99])
+    return {'requests': len(records), 'throughput_rps': len(records) / elapsed,
+            'p50_ms': p50, 'p95_ms': p95, 'p99_ms': p99}
+
+def _http_sender(port: int):
+    """
+    Returns a send function posting one quote over a keep-alive connection per client thread.
+    """
+    local = threading.local()
+
+    def send(record):
+        # A bytes body goes out in the same packet as the headers
+        if not hasattr(local, 'connection'):
+            local.connection = http.client.HTTPConnection('127.0.0.1', port)
+        local.connection.request('POST', '/predict', body=json.dumps(record).encode(),
+                                 headers={'Content-Type': 'application/json'})
+        response = local.connection.getresponse()
+        body = response.read()
+        if response.status != 200:
+            raise RuntimeError(body.decode())
+    return send
+
+def run_benchmark(n_requests: int = 2000, concurrency: tuple = (1, 8, 32), n_train: int = 20_000,
+                  max_batch_size: int = 256, max_wait_ms: float = 2.0) -> pd.DataFrame:
+    """
+    Load-tests the scoring service for each transport, batching setting and concurrency.
+
+    Returns:
+        pd.DataFrame: Throughput and latency percentiles per configuration.
+    """
+    scorer = build_scorer(n_train)
+    quotes = make_policies(n_requests, seed=7).drop(columns=['TotalPremium', 'TotalClaims'])
+    records = json.loads(quotes.to_json(orient='records'))
+
+    rows = []
+    for batch_size in (1, max_batch_size):
+        with MicroBatcher(scorer, max_batch_size=batch_size, max_wait_ms=max_wait_ms) as batcher:
+            server = make_http_server(batcher, port=0)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            try:
+                senders = {'direct': lambda record: batcher.predict(record),
+                           'http': _http_sender(server.server_address[1])}
+                for transport, send in senders.items():
+                    for clients in concurrency:
+                        batcher.batch_sizes.clear()
+                        result = _load_test(send, records, clients)
+                        rows.append({'transport': transport, 'max_batch_size': batch_size, 'concurrency': clients,
+                                     **result, 'mean_batch': float(np.mean(batcher.batch_sizes))})
+            finally:
+                server.shutdown()
+                server.server_close()
+    return pd.DataFrame(rows)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=2000, help='Number of single-quote requests per configuration')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32], help='Numbers of concurrent clients')
+    parser.add_argument('--train-rows', type=int, default=20_000, help='Rows used to fit the pipeline and model')
+    parser.add_argument('--max-batch-size', type=int, default=256, help='Largest micro-batch')
+    parser.add_argument('--max-wait-ms', type=float, default=2.0, help='Longest wait for a micro-batch to fill')
+    args = parser.parse_args()
+    print(run_benchmark(args.requests, tuple(args.concurrency), args.train_rows,
+                        args.max_batch_size, args.max_wait_ms).to_string(index=False, float_format='%.2f'))
@@ -0,0 +1,269 @@
+# benchmarks/run_benchmarks.py
+"""
+Benchmark suite of the analysis steps on synthetic policy data, with stored baselines.
+
+Times and memory-profiles load_data, DataProcessing (missing-data summary and handling),
+DataVisualizer.cap_all_outliers and ABHypothesisTesting.run_all_tests for each data size.
+The data comes from scripts.synthetic_data, which reproduces the schema of the real
+policy file, so no production data is needed.
+
+Every (case, size) runs in a fresh process. Wall time is the best of `repeat` runs, and
+memory is how far the peak RSS rose above the RSS after setup (on Linux; elsewhere the
+tracemalloc peak). Baselines depend on the machine, so record them where they are checked.
+
+Usage:
+    python -m benchmarks.run_benchmarks --rows 1000000 5000000 --save-baseline
+    python -m benchmarks.run_benchmarks --rows 1000000 5000000 --check
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import platform
+import queue as queue_module
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+import matplotlib
+import pandas as pd
+
+# Headless: cap_all_outliers goes through DataVisualizer, which imports pyplot
+matplotlib.use('Agg')
+
+from scripts.data_processing import DataProcessing
+from scripts.data_visualization import DataVisualizer
+from scripts.hypothesis_testing import ABHypothesisTesting
+from scripts.load_data import load_data
+from scripts.synthetic_data import FILENAME, write_policy_archive
+
+CASES = ['load_data', 'data_processing', 'cap_all_outliers', 'run_all_tests']
+
+NUMERICAL_COLUMNS = ['SumInsured', 'CalculatedPremiumPerTerm', 'TotalPremium', 'TotalClaims']
+
+# Cross-tabulating every distinct premium (metric_bins=None) needs a dense table of
+# postal codes x premiums that no longer fits in memory at a million rows
+METRIC_BINS = 10
+
+DEFAULT_BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines.json')
+
+# Seconds between checks that a measuring process is still alive
+POLL_INTERVAL_S = 1.0
+
+def _status_mb(key: str) -> float:
+    """
+    Reads a memory field (e.g. VmRSS, VmHWM) of the current process in MB, or -1 if unavailable.
+    """
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith(key + ':'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return -1.0
+
+def _reset_peak_rss() -> bool:
+    """
+    Resets the peak RSS of the current process to its current RSS (Linux only).
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+def _setup(case: str, archive: str):
+    """
+    Loads what a case needs outside the measured section.
+    """
+    if case == 'load_data':
+        return None
+    return load_data(archive, FILENAME)
+
+def _run(case: str, archive: str, data) -> None:
+    """
+    Runs one case on the prepared data.
+    """
+    if case == 'load_data':
+        load_data(archive, FILENAME)
+    elif case == 'data_processing':
+        processing = DataProcessing(data)
+        summary = processing.missing_data_summary()
+        percentage = summary['Percentage (%)']
+        processing.handle_missing_data('high', list(summary.index[percentage > 50]))
+        processing.handle_missing_data('low', list(summary.index[percentage <= 50]))
+    elif case == 'cap_all_outliers':
+        DataVisualizer(data).cap_all_outliers(NUMERICAL_COLUMNS)
+    elif case == 'run_all_tests':
+        ABHypothesisTesting(data, metric_bins=METRIC_BINS).run_all_tests()
+    else:
+        raise ValueError(f"Unknown case: {case}. Expected one of {CASES}.")
+
+def _measure(case: str, archive: str, repeat: int, queue: mp.Queue) -> None:
+    """
+    Runs one case `repeat` times in this (fresh) process and reports its best time and peak memory.
+    """
+    try:
+        data = _setup(case, archive)
+        times = []
+        peak_mb = 0.0
+        for i in range(repeat):
+            # cap_all_outliers clips in place, so every run gets its own copy, made before measuring
+            run_data = data.copy() if case == 'cap_all_outliers' else data
+            if i == 0 and not _reset_peak_rss():
+                tracemalloc.start()
+            rss_before = _status_mb('VmRSS')
+            start = time.perf_counter()
+            _run(case, archive, run_data)
+            times.append(time.perf_counter() - start)
+            if i == 0:
+                if tracemalloc.is_tracing():
+                    peak_mb = tracemalloc.get_traced_memory()[1] / 2**20
+                    tracemalloc.stop()
+                else:
+                    peak_mb = _status_mb('VmHWM') - rss_before
+            del run_data
+    except Exception as e:
+        queue.put({'error': f'{type(e).__name__}: {e}'})
+        return
+    queue.put({'wall_time_s': min(times), 'peak_mb': peak_mb})
+
+def _wait_for_result(process, queue: mp.Queue, timeout_s: float = None) -> dict:
+    """
+    Waits for the result of a measuring process, or reports why there is none.
+
+    The process is checked every POLL_INTERVAL_S, so a crash (e.g. killed when out of memory)
+    is reported instead of blocking forever. After `timeout_s` it is terminated.
+    """
+    deadline = None if timeout_s is None else time.monotonic() + timeout_s
+    while True:
+        try:
+            return queue.get(timeout=POLL_INTERVAL_S)
+        except queue_module.Empty:
+            pass
+        if not process.is_alive():
+            try:
+                # The result may have been sent just before the process exited
+                return queue.get(timeout=POLL_INTERVAL_S)
+            except queue_module.Empty:
+                return {'error': f'Measuring process exited with code {process.exitcode}'}
+        if deadline is not None and time.monotonic() > deadline:
+            process.terminate()
+            return {'error': f'Timed out after {timeout_s} s'}
+
+def run_benchmark(sizes: tuple = (100_000, 1_000_000), cases: tuple = tuple(CASES), repeat: int = 3,
+                  seed: int = 42, timeout_s: float = None) -> pd.DataFrame:
+    """
+    Runs every case on a synthetic archive of each size.
+
+    Args:
+        timeout_s (float): Longest time a case may take, setup and repeats included. None waits
+            as long as its process is alive.
+
+    Returns:
+        pd.DataFrame: One row per (case, rows) with the best wall time, the peak memory in MB and
+            the error of a case that crashed or timed out (its time and memory are then NaN).
+    """
+    ctx = mp.get_context('spawn')
+    records = []
+    for n_rows in sizes:
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            archive = write_policy_archive(os.path.join(tmp_dir, 'data.zip'), n_rows, seed=seed)
+            for case in cases:
+                queue = ctx.Queue()
+                process = ctx.Process(target=_measure, args=(case, archive, repeat, queue))
+                process.start()
+                result = _wait_for_result(process, queue, timeout_s)
+                process.join()
+                records.append({'case': case, 'rows': n_rows, 'wall_time_s': float('nan'),
+                                'peak_mb': float('nan'), 'error': None, **result})
+        finally:
+            shutil.rmtree(tmp_dir)
+    return pd.DataFrame(records)
+
+def _machine() -> dict:
+    return {'platform': platform.platform(), 'python': platform.python_version(), 'cpus': os.cpu_count(),
+            'pandas': pd.__version__}
+
+def save_baseline(results: pd.DataFrame, path: str = DEFAULT_BASELINE_PATH) -> None:
+    """
+    Stores the results as baselines, keeping the baselines of other cases and sizes.
+    """
+    baseline = load_baseline(path) if os.path.exists(path) else {'results': {}}
+    # Failed cases keep their previous baseline
+    for record in results[results['error'].isna()].to_dict(orient='records'):
+        baseline['results'].setdefault(record['case'], {})[str(record['rows'])] = {
+            'wall_time_s': round(record['wall_time_s'], 4), 'peak_mb': round(record['peak_mb'], 1)}
+    baseline['machine'] = _machine()
+    with open(path, 'w') as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+def load_baseline(path: str = DEFAULT_BASELINE_PATH) -> dict:
+    """
+    Loads baselines written by save_baseline.
+    """
+    with open(path) as f:
+        return json.load(f)
+
+def compare_to_baseline(results: pd.DataFrame, baseline: dict, time_tolerance: float = 0.25,
+                        memory_tolerance: float = 0.10, min_time_s: float = 0.05,
+                        min_memory_mb: float = 16.0) -> pd.DataFrame:
+    """
+    Compares results with the baselines of the same case and size.
+
+    Args:
+        results (pd.DataFrame): Output of run_benchmark.
+        baseline (dict): Output of load_baseline.
+        time_tolerance (float): Allowed relative slowdown before a run counts as a regression.
+        memory_tolerance (float): Allowed relative memory growth before a run counts as a regression.
+        min_time_s (float): Slowdowns smaller than this are timer noise and never flagged.
+        min_memory_mb (float): Memory growth smaller than this is allocator noise and never flagged.
+
+    Returns:
+        pd.DataFrame: The results with the baseline values, the ratios to them and a
+            'regression' flag. Runs without a baseline are never flagged.
+    """
+    compared = results.copy()
+    stored = baseline.get('results', {})
+    for metric in ('wall_time_s', 'peak_mb'):
+        compared[f'baseline_{metric}'] = [stored.get(case, {}).get(str(rows), {}).get(metric, float('nan'))
+                                          for case, rows in zip(compared['case'], compared['rows'])]
+    compared['time_ratio'] = compared['wall_time_s'] / compared['baseline_wall_time_s']
+    compared['memory_ratio'] = compared['peak_mb'] / compared['baseline_peak_mb']
+    slower = ((compared['time_ratio'] > 1 + time_tolerance)
+              & (compared['wall_time_s'] - compared['baseline_wall_time_s'] > min_time_s))
+    larger = ((compared['memory_ratio'] > 1 + memory_tolerance)
+              & (compared['peak_mb'] - compared['baseline_peak_mb'] > min_memory_mb))
+    compared['regression'] = slower | larger
+    return compared
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[100_000, 1_000_000], help='Data sizes to benchmark')
+    parser.add_argument('--cases', nargs='+', default=CASES, choices=CASES, help='Cases to run')
+    parser.add_argument('--repeat', type=int, default=3, help='Number of timed runs per case')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE_PATH, help='Baseline file')
+    parser.add_argument('--save-baseline', action='store_true', help='Store the results as the new baselines')
+    parser.add_argument('--check', action='store_true', help='Exit with status 1 if any case regressed')
+    parser.add_argument('--time-tolerance', type=float, default=0.25, help='Allowed relative slowdown')
+    parser.add_argument('--memory-tolerance', type=float, default=0.10, help='Allowed relative memory growth')
+    parser.add_argument('--timeout', type=float, default=None, help='Seconds allowed per case')
+    args = parser.parse_args()
+
+    benchmark_results = run_benchmark(tuple(args.rows), tuple(args.cases), args.repeat, timeout_s=args.timeout)
+    if args.check:
+        benchmark_results = compare_to_baseline(benchmark_results, load_baseline(args.baseline),
+                                                args.time_tolerance, args.memory_tolerance)
+    print(benchmark_results.to_string(index=False, float_format='%.3f'))
+    if args.save_baseline:
+        save_baseline(benchmark_results, args.baseline)
+    failed = benchmark_results['error'].notna()
+    for record in benchmark_results[failed].itertuples():
+        print(f"{record.case} ({record.rows} rows) failed: {record.error}", file=sys.stderr)
+    if failed.any() or (args.check and benchmark_results['regression'].any()):
+        sys.exit(1)
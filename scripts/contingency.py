@@ -0,0 +1,181 @@
+# scripts/contingency.py
+import numpy as np
+import pandas as pd
+from scipy import sparse, stats
+from typing import Optional, Union
+
+
+class ContingencyBuilder:
+
+    def __init__(self, feature: str, metric: str, bins: Union[int, str] = 10, strategy: str = 'quantile',
+                 edges: Optional[np.ndarray] = None):
+        """
+        Initialize a builder of feature x binned-metric contingency tables.
+
+        Instead of one column per distinct value of a continuous metric, the metric is
+        reduced to a few bins (or a >0 indicator, e.g. claim/no-claim), and counts are
+        accumulated with integer codes and np.bincount, chunk by chunk if needed.
+
+        Args:
+            feature (str): Categorical column forming the table rows.
+            metric (str): Numerical column forming the table columns once binned.
+            bins (int or str): Number of bins, or 'indicator' to split the metric into <= 0 and > 0.
+            strategy (str): 'quantile' for equal-frequency bins or 'fixed' for equal-width bins.
+                When streaming, the edges are taken from the first chunk unless `edges` is given.
+            edges (np.ndarray): Explicit, increasing bin edges. Overrides `bins` and `strategy`.
+        """
+        if strategy not in ('quantile', 'fixed'):
+            raise ValueError(f"Unknown strategy: {strategy}. Expected 'quantile' or 'fixed'.")
+        self.feature = feature
+        self.metric = metric
+        self.bins = bins
+        self.strategy = strategy
+        self.edges = None if edges is None else np.asarray(edges, dtype=np.float64)
+        self.labels = []
+        self.counts = np.zeros((0, 0), dtype=np.int64)
+
+    @property
+    def indicator(self) -> bool:
+        return isinstance(self.bins, str) and self.bins == 'indicator'
+
+    def fit_edges(self, values) -> 'ContingencyBuilder':
+        """
+        Computes the bin edges from a sample of the metric.
+
+        Args:
+            values (array-like): Metric values; missing values are ignored.
+
+        Returns:
+            ContingencyBuilder: The builder with its edges set.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            raise ValueError(f"Cannot compute bin edges: '{self.metric}' has no values.")
+
+        if self.strategy == 'quantile':
+            edges = np.quantile(values, np.linspace(0, 1, self.bins + 1))
+        else:
+            edges = np.linspace(values.min(), values.max(), self.bins + 1)
+        # Heavy ties (e.g. many zero premiums) collapse quantile edges
+        self.edges = np.unique(edges)
+        if len(self.edges) == 1:
+            # A constant metric still gets a single (degenerate) bin
+            self.edges = np.repeat(self.edges, 2)
+        return self
+
+    @property
+    def n_columns(self) -> int:
+        if self.indicator:
+            return 2
+        return max(len(self.edges) - 1, 1)
+
+    def _column_codes(self, values: np.ndarray) -> np.ndarray:
+        """
+        Maps metric values to column codes; missing values get -1.
+        """
+        if self.indicator:
+            codes = (values > 0).astype(np.int64)
+        else:
+            # Values outside the edges fall into the first or last bin
+            codes = np.searchsorted(self.edges[1:-1], values, side='right').astype(np.int64)
+        codes[np.isnan(values)] = -1
+        return codes
+
+    def _row_codes(self, values: pd.Series) -> np.ndarray:
+        """
+        Maps feature values to row codes, registering unseen labels; missing values get -1.
+        """
+        uniques = pd.Index(pd.unique(values.dropna()))
+        index = pd.Index(self.labels)
+        new_labels = uniques[index.get_indexer(uniques) < 0]
+        if len(new_labels):
+            self.labels.extend(new_labels.tolist())
+            index = pd.Index(self.labels)
+        return index.get_indexer(values)
+
+    def _grow(self, n_rows: int) -> None:
+        """
+        Extends the count matrix to hold `n_rows` rows.
+        """
+        if self.counts.shape != (n_rows, self.n_columns):
+            counts = np.zeros((n_rows, self.n_columns), dtype=np.int64)
+            counts[:self.counts.shape[0], :self.counts.shape[1]] = self.counts
+            self.counts = counts
+
+    def update(self, chunk: pd.DataFrame) -> 'ContingencyBuilder':
+        """
+        Accumulates the counts of a chunk of rows.
+
+        Args:
+            chunk (pd.DataFrame): Rows with the feature and metric columns.
+
+        Returns:
+            ContingencyBuilder: The updated builder.
+        """
+        values = chunk[self.metric].to_numpy(dtype=np.float64, na_value=np.nan)
+        if self.edges is None and not self.indicator:
+            self.fit_edges(values)
+
+        rows = self._row_codes(chunk[self.feature])
+        columns = self._column_codes(values)
+        self._grow(len(self.labels))
+
+        valid = (rows >= 0) & (columns >= 0)
+        cells = rows[valid] * self.n_columns + columns[valid]
+        self.counts += np.bincount(cells, minlength=self.counts.size).reshape(self.counts.shape)
+        return self
+
+    def merge(self, other: 'ContingencyBuilder') -> 'ContingencyBuilder':
+        """
+        Adds the counts of another builder with the same bins, e.g. from another worker.
+
+        Returns:
+            ContingencyBuilder: The merged builder.
+        """
+        if self.edges is None and other.edges is not None:
+            self.edges = other.edges
+        if other.n_columns != self.n_columns or (self.edges is not None and not np.array_equal(self.edges, other.edges)):
+            raise ValueError("Cannot merge contingency builders with different bins.")
+
+        other_labels = pd.Index(other.labels)
+        self.labels.extend(other_labels[pd.Index(self.labels).get_indexer(other_labels) < 0].tolist())
+        self._grow(len(self.labels))
+        positions = pd.Index(self.labels).get_indexer(other.labels)
+        self.counts[positions] += other.counts
+        return self
+
+    def column_labels(self) -> list:
+        """
+        Returns readable labels for the table columns.
+        """
+        if self.indicator:
+            return [f'{self.metric} <= 0', f'{self.metric} > 0']
+        return [f'[{low:g}, {high:g})' for low, high in zip(self.edges[:-1], self.edges[1:])]
+
+    def table(self) -> pd.DataFrame:
+        """
+        Returns the compact contingency table, without all-zero rows and columns.
+
+        Returns:
+            pd.DataFrame: Counts indexed by feature value with one column per metric bin.
+        """
+        table = pd.DataFrame(self.counts, index=pd.Index(self.labels, name=self.feature),
+                             columns=self.column_labels())
+        return table.loc[table.sum(axis=1) > 0, table.sum(axis=0) > 0]
+
+    def to_sparse(self) -> sparse.csr_matrix:
+        """
+        Returns the counts as a CSR sparse matrix (rows follow `labels`).
+        """
+        return sparse.csr_matrix(self.counts)
+
+    def chi2(self) -> tuple:
+        """
+        Runs the chi-squared test of independence on the accumulated table.
+
+        Returns:
+            tuple: (chi2, p_value).
+        """
+        chi2, p_value, _, _ = stats.chi2_contingency(self.table())
+        return float(chi2), float(p_value)
@@ -1,18 +1,33 @@
 # scripts/data_processing.py
+from typing import Optional
 import pandas as pd
+from pandas.api.types import is_datetime64_any_dtype, is_numeric_dtype
+
+try:
+    from scripts.execution_backend import PartitionedBackend, is_partitioned
+    from scripts.instrumentation import instrument
+except ImportError:
+    # Notebooks import the scripts directly with the scripts/ directory on sys.path
+    from execution_backend import PartitionedBackend, is_partitioned
+    from instrumentation import instrument
 
 class DataProcessing:
     
-    def __init__(self, data: pd.DataFrame):
+    def __init__(self, data: pd.DataFrame, max_workers: Optional[int] = None):
         """
         Initialize the DataProcessing class with the data.
 
         Args:
-            data (pd.DataFrame): The input DataFrame to process.
+            data (pd.DataFrame or PartitionedDataset): The input data to process. A partitioned
+                dataset is summarised partition by partition on a process pool, and handling
+                its missing data returns a lazy view instead of a DataFrame.
+            max_workers (int): Worker processes for a partitioned dataset. Defaults to the number of CPUs.
         """
         self.data = data
+        self.max_workers = max_workers
     
 
+    @instrument
     def missing_data_summary(self) -> pd.DataFrame:
         """
         Returns a summary of columns with missing data, including count and percentage of missing values.
@@ -20,6 +35,9 @@ class DataProcessing:
         Returns:
             pd.DataFrame: A DataFrame with columns 'Missing Count' and 'Percentage (%)' for columns with missing values.
         """
+        if is_partitioned(self.data):
+            return PartitionedBackend(self.data, self.max_workers).missing_summary()
+
         # Total missing values per column
         missing_data = self.data.isnull().sum()
         
@@ -40,44 +58,143 @@ class DataProcessing:
         
         return missing_df
     
+    @instrument
+    def fit_imputer(self, missing_cols: list) -> 'MissingValueImputer':
+        """
+        Fits an imputer on the current data for the given columns.
+
+        Args:
+            missing_cols (list): Columns to compute fill values for.
+
+        Returns:
+            MissingValueImputer: The fitted imputer, reusable on new batches.
+        """
+        if not is_partitioned(self.data):
+            return MissingValueImputer().fit(self.data, missing_cols)
+
+        # Same split as MissingValueImputer.fit, with merged per-partition statistics (approximate medians)
+        backend = PartitionedBackend(self.data, self.max_workers)
+        columns = [col for col in missing_cols if col in self.data.columns]
+        dtypes = self.data.dtypes
+        median_cols = [col for col in columns
+                       if is_numeric_dtype(dtypes[col]) or is_datetime64_any_dtype(dtypes[col])]
+        mode_cols = [col for col in columns if col not in median_cols]
+        medians = backend.quantiles(median_cols, [0.5]).loc[0.5] if median_cols else {}
+        modes = backend.modes(mode_cols) if mode_cols else {}
+        return MissingValueImputer().set_fill_values(columns, medians, modes)
+
+    @instrument
     def handle_missing_data(self, missing_type: str, missing_cols: list) -> pd.DataFrame:
         """
         Handles missing data based on predefined strategies.
+
+        'high' drops the columns. Any other type ('moderate' or the default 'low')
+        imputes them; the fitted imputer is kept on `self.imputer`. A partitioned dataset
+        is not rewritten: the result is a view that drops or imputes as partitions are read.
         """
         if missing_type == 'high':
             # Drop columns with high missing data
             self.data = self.data.drop(columns=missing_cols, errors='ignore')
-        elif missing_type == 'moderate':
-            # Impute or drop columns with moderate missing data
-            for col in missing_cols:
-                if col in self.data.columns:
-                    if self.data[col].dtype == 'object':
-                        # Impute categorical columns with mode (check if mode exists)
-                        if not self.data[col].mode().empty:
-                            self.data[col] = self.data[col].fillna(self.data[col].mode()[0])
-                        else:
-                            self.data[col] = self.data[col].fillna('Unknown')  # Default for empty mode
-                    else:
-                        # Impute numerical columns with median (check if median exists)
-                        if not self.data[col].isnull().all():  # Ensure column has some numeric values
-                            self.data[col] = self.data[col].fillna(self.data[col].median())
-                        else:
-                            self.data[col] = self.data[col].fillna(0)  # Default for empty median
         else:
-            # Handle low missing data (default)
-            for col in missing_cols:
-                if col in self.data.columns:
-                    if self.data[col].dtype == 'object':
-                        if not self.data[col].mode().empty:
-                            self.data[col] = self.data[col].fillna(self.data[col].mode()[0])
-                        else:
-                            self.data[col] = self.data[col].fillna('Unknown')  # Default for empty mode
-                    else:
-                        if not self.data[col].isnull().all():
-                            self.data[col] = self.data[col].fillna(self.data[col].median())
-                        else:
-                            self.data[col] = self.data[col].fillna(0)  # Default for empty median
+            # Impute moderate and low missing data with the same single-pass statistics
+            self.imputer = self.fit_imputer(missing_cols)
+            if is_partitioned(self.data):
+                # Imputed as each partition is read
+                self.data = self.data.map(self.imputer.transform)
+            else:
+                self.data = self.imputer.transform(self.data)
 
         return self.data
 
 
+class MissingValueImputer:
+
+    def __init__(self):
+        """
+        Initialize an unfitted imputer.
+
+        Numerical (and datetime) columns are filled with their median, or 0 when the
+        column is entirely missing. Other columns are filled with their mode, or
+        'Unknown' when the column is entirely missing.
+        """
+        self.fill_values = None
+
+    @instrument
+    def fit(self, data: pd.DataFrame, columns: list) -> 'MissingValueImputer':
+        """
+        Computes the fill value of every column in one batched pass.
+
+        Args:
+            data (pd.DataFrame): The data to compute statistics on.
+            columns (list): Columns to impute. Columns missing from `data` are ignored.
+
+        Returns:
+            MissingValueImputer: The fitted imputer.
+        """
+        columns = [col for col in columns if col in data.columns]
+        median_cols = [col for col in columns
+                       if is_numeric_dtype(data[col]) or is_datetime64_any_dtype(data[col])]
+        mode_cols = [col for col in columns if col not in median_cols]
+
+        medians = data[median_cols].median() if median_cols else {}
+        modes = data[mode_cols].mode() if mode_cols else pd.DataFrame()
+        return self.set_fill_values(columns, medians, {col: modes[col].iloc[0] if len(modes) else None
+                                                       for col in mode_cols})
+
+    def set_fill_values(self, columns: list, medians: dict, modes: dict) -> 'MissingValueImputer':
+        """
+        Sets the fill values from precomputed statistics, e.g. merged across the partitions of a dataset.
+
+        Args:
+            columns (list): Columns to impute, in order.
+            medians (dict): Median of every numerical or datetime column; missing if the column is empty.
+            modes (dict): Mode of every other column; missing if the column is empty.
+
+        Returns:
+            MissingValueImputer: The fitted imputer.
+        """
+        fill_values = {col: 0 if pd.isna(median) else median for col, median in dict(medians).items()}
+        fill_values.update({col: 'Unknown' if pd.isna(mode) else mode for col, mode in dict(modes).items()})
+
+        # Keep the caller's column order
+        self.fill_values = {col: fill_values[col] for col in columns}
+        return self
+
+    @instrument
+    def transform(self, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Fills missing values with the fitted statistics in a single fillna call.
+
+        Args:
+            data (pd.DataFrame): The data to impute.
+
+        Returns:
+            pd.DataFrame: The imputed data.
+        """
+        if self.fill_values is None:
+            raise RuntimeError("MissingValueImputer must be fitted before calling transform.")
+
+        fill_values = {col: value for col, value in self.fill_values.items() if col in data.columns}
+
+        # Categorical columns can only be filled with one of their categories
+        new_categories = {col: value for col, value in fill_values.items()
+                          if isinstance(data[col].dtype, pd.CategoricalDtype)
+                          and value not in data[col].cat.categories}
+        if new_categories:
+            data = data.assign(**{col: data[col].cat.add_categories([value])
+                                  for col, value in new_categories.items()})
+
+        return data.fillna(value=fill_values)
+
+    def fit_transform(self, data: pd.DataFrame, columns: list) -> pd.DataFrame:
+        """
+        Fits the imputer on `data` and imputes it.
+
+        Args:
+            data (pd.DataFrame): The data to impute.
+            columns (list): Columns to impute.
+
+        Returns:
+            pd.DataFrame: The imputed data.
+        """
+        return self.fit(data, columns).transform(data)
@@ -0,0 +1,217 @@
+# scripts/data_profiling.py
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_datetime64_any_dtype, is_numeric_dtype, is_bool_dtype
+
+
+class HyperLogLog:
+
+    def __init__(self, precision: int = 12):
+        """
+        Initialize an empty HyperLogLog distinct-count sketch.
+
+        Args:
+            precision (int): Number of index bits; the sketch keeps 2**precision registers
+                and has a relative standard error of about 1.04 / sqrt(2**precision).
+        """
+        if not 4 <= precision <= 16:
+            raise ValueError("precision must be between 4 and 16.")
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    @staticmethod
+    def _bit_length(values: np.ndarray) -> np.ndarray:
+        """
+        Vectorized int.bit_length for uint64 values, exact for the full 64-bit range.
+        """
+        high = (values >> np.uint64(32)).astype(np.float64)
+        low = (values & np.uint64(0xFFFFFFFF)).astype(np.float64)
+        # frexp returns the binary exponent, which is the bit length for exact floats
+        high_bits = np.frexp(high)[1]
+        low_bits = np.frexp(low)[1]
+        return np.where(high > 0, high_bits + 32, low_bits)
+
+    def update(self, values: pd.Series) -> 'HyperLogLog':
+        """
+        Adds the non-null values of a Series to the sketch.
+
+        Args:
+            values (pd.Series): The values to add.
+
+        Returns:
+            HyperLogLog: The updated sketch.
+        """
+        values = values.dropna()
+        if values.empty:
+            return self
+
+        hashes = pd.util.hash_pandas_object(values, index=False).to_numpy(dtype=np.uint64)
+        value_bits = 64 - self.precision
+        index = (hashes >> np.uint64(value_bits)).astype(np.intp)
+        remainder = hashes & np.uint64((1 << value_bits) - 1)
+        # Rank is the position of the leftmost 1-bit in the remaining bits
+        rank = (value_bits - self._bit_length(remainder) + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+        return self
+
+    def merge(self, other: 'HyperLogLog') -> 'HyperLogLog':
+        """
+        Merges another sketch of the same precision into this one.
+
+        Returns:
+            HyperLogLog: The merged sketch.
+        """
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLog sketches with different precision.")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self) -> int:
+        """
+        Estimates the number of distinct values added so far.
+
+        Returns:
+            int: The estimated distinct count.
+        """
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.exp2(-self.registers.astype(np.float64)))
+        zeros = np.count_nonzero(self.registers == 0)
+        if raw <= 2.5 * m and zeros > 0:
+            # Linear counting is more accurate for small cardinalities
+            raw = m * np.log(m / zeros)
+        return int(round(raw))
+
+
+class MissingDataProfiler:
+
+    def __init__(self, track_distinct: bool = True, precision: int = 12):
+        """
+        Initialize an empty profiler that can be updated chunk by chunk and merged across workers.
+
+        Args:
+            track_distinct (bool): Keep a HyperLogLog distinct-count sketch per column.
+            precision (int): Precision of the distinct-count sketches.
+        """
+        self.track_distinct = track_distinct
+        self.precision = precision
+        self.row_count = 0
+        self.null_counts = {}
+        self.sketches = {}
+        self.minimums = {}
+        self.maximums = {}
+
+    def _add_column(self, column: str) -> None:
+        """
+        Starts tracking a column first seen after `row_count` rows, all of which count as missing.
+        """
+        self.null_counts[column] = self.row_count
+        if self.track_distinct:
+            self.sketches[column] = HyperLogLog(self.precision)
+
+    @staticmethod
+    def _combine(current, value, func):
+        """
+        Combines two running extremes, ignoring missing ones.
+        """
+        if current is None or pd.isna(current):
+            return value
+        if value is None or pd.isna(value):
+            return current
+        return func(current, value)
+
+    def update(self, chunk: pd.DataFrame) -> 'MissingDataProfiler':
+        """
+        Adds a chunk of rows to the profile.
+
+        Args:
+            chunk (pd.DataFrame): The rows to profile.
+
+        Returns:
+            MissingDataProfiler: The updated profiler.
+        """
+        for column in chunk.columns:
+            if column not in self.null_counts:
+                self._add_column(column)
+
+        chunk_nulls = chunk.isnull().sum()
+        for column in self.null_counts:
+            # Columns absent from this chunk are missing for all of its rows
+            self.null_counts[column] += int(chunk_nulls[column]) if column in chunk_nulls.index else len(chunk)
+
+        for column in chunk.columns:
+            series = chunk[column]
+            if self.track_distinct:
+                self.sketches[column].update(series)
+            if (is_numeric_dtype(series) and not is_bool_dtype(series)) or is_datetime64_any_dtype(series):
+                self.minimums[column] = self._combine(self.minimums.get(column), series.min(), min)
+                self.maximums[column] = self._combine(self.maximums.get(column), series.max(), max)
+
+        self.row_count += len(chunk)
+        return self
+
+    def merge(self, other: 'MissingDataProfiler') -> 'MissingDataProfiler':
+        """
+        Merges the profile of another worker into this one, as if its rows were appended.
+
+        Args:
+            other (MissingDataProfiler): The profiler to merge.
+
+        Returns:
+            MissingDataProfiler: The merged profiler.
+        """
+        if self.track_distinct and not other.track_distinct:
+            raise ValueError("Cannot merge a profiler without distinct tracking into one with it.")
+
+        for column in other.null_counts:
+            if column not in self.null_counts:
+                self._add_column(column)
+        for column in self.null_counts:
+            self.null_counts[column] += other.null_counts.get(column, other.row_count)
+
+        if self.track_distinct:
+            for column, sketch in other.sketches.items():
+                self.sketches[column].merge(sketch)
+        for column, value in other.minimums.items():
+            self.minimums[column] = self._combine(self.minimums.get(column), value, min)
+        for column, value in other.maximums.items():
+            self.maximums[column] = self._combine(self.maximums.get(column), value, max)
+
+        self.row_count += other.row_count
+        return self
+
+    def summary(self) -> pd.DataFrame:
+        """
+        Returns a summary of columns with missing data, identical to DataProcessing.missing_data_summary.
+
+        Returns:
+            pd.DataFrame: A DataFrame with columns 'Missing Count' and 'Percentage (%)' for columns with missing values.
+        """
+        missing_data = pd.Series(self.null_counts, dtype='int64')
+        missing_data = missing_data[missing_data > 0]
+        missing_percentage = (missing_data / self.row_count) * 100
+        missing_df = pd.DataFrame({
+            'Missing Count': missing_data,
+            'Percentage (%)': missing_percentage
+        })
+        missing_df = missing_df.sort_values(by='Percentage (%)', ascending=False)
+        return missing_df
+
+    def profile(self) -> pd.DataFrame:
+        """
+        Returns the full per-column profile.
+
+        Returns:
+            pd.DataFrame: One row per column with 'Missing Count', 'Non-Null Count',
+                'Distinct (approx.)', 'Min' and 'Max'.
+        """
+        columns = list(self.null_counts)
+        profile = pd.DataFrame({
+            'Missing Count': [self.null_counts[col] for col in columns],
+            'Non-Null Count': [self.row_count - self.null_counts[col] for col in columns],
+        }, index=columns)
+        if self.track_distinct:
+            profile['Distinct (approx.)'] = [self.sketches[col].estimate() for col in columns]
+        profile['Min'] = pd.Series([self.minimums.get(col) for col in columns], index=columns, dtype='object')
+        profile['Max'] = pd.Series([self.maximums.get(col) for col in columns], index=columns, dtype='object')
+        return profile
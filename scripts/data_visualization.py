@@ -1,19 +1,106 @@
 # scripts/data_visualization.py
+import os
+import re
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+try:
+    from scripts.execution_backend import PartitionedBackend, is_partitioned
+    from scripts.instrumentation import instrument
+    from scripts.outlier_capping import IQRCapper
+    from scripts import plot_aggregation as agg
+except ImportError:
+    # Notebooks import the scripts directly with the scripts/ directory on sys.path
+    from execution_backend import PartitionedBackend, is_partitioned
+    from instrumentation import instrument
+    from outlier_capping import IQRCapper
+    import plot_aggregation as agg
+
 class DataVisualizer:
-    def __init__(self, data: pd.DataFrame):
+    def __init__(self, data: pd.DataFrame, aggregate: bool = False, sample_size: int = agg.DEFAULT_SAMPLE_SIZE,
+                 output_dir: str = None, formats=('png',), max_workers: int = None):
         """
         Initializes the DataVisualizer class with a dataset.
 
         Args:
             data (pd.DataFrame): The DataFrame containing the data to visualize.
+            aggregate (bool): Pre-aggregate the data (counts, histogram bins, box summaries,
+                sampled KDEs) and draw from the summaries instead of handing every row to seaborn.
+                Recommended for large datasets.
+            sample_size (int): Maximum rows (per group) used by sample-based plots in aggregate mode.
+            output_dir (str): Save figures to this directory instead of showing them. Use with the
+                Agg backend for headless runs.
+            formats (tuple): File formats to save each figure in, e.g. ('png', 'svg').
+            max_workers (int): Worker processes used by cap_all_outliers on a partitioned dataset.
         """
         self.data = data
+        self.max_workers = max_workers
+        self.aggregate = aggregate
+        self.sample_size = sample_size
+        self.output_dir = output_dir
+        self.formats = formats
+        self.saved_figures = []
         sns.set(style="whitegrid")  # Set a global seaborn style
 
+    def _finish(self, name):
+        """
+        Shows the current figure, or saves and closes it when an output directory is set.
+
+        Args:
+            name (str): Base file name of the figure.
+        """
+        if self.output_dir is None:
+            plt.show()
+            return
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        fig = plt.gcf()
+        safe_name = re.sub(r'[^\w.-]+', '_', name)
+        for fmt in self.formats:
+            path = os.path.join(self.output_dir, f'{safe_name}.{fmt}')
+            fig.savefig(path, format=fmt, bbox_inches='tight')
+            self.saved_figures.append(path)
+        plt.close(fig)
+
+    def _draw_counts(self, ax, counts, palette=None):
+        """
+        Draws pre-computed category counts (optionally split by hue columns) as bars.
+        """
+        if isinstance(counts, pd.DataFrame):
+            colors = sns.color_palette(palette, counts.shape[1])
+            counts.plot.bar(ax=ax, color=colors, width=0.8)
+        else:
+            colors = sns.color_palette(palette, len(counts))
+            ax.bar(counts.index.astype(str), counts.to_numpy(), color=colors)
+        ax.set_xlabel(counts.index.name)
+
+    def _draw_boxes(self, ax, data, y, x=None, showmeans=False):
+        """
+        Draws boxplots from pre-computed five-number summaries.
+        """
+        summaries = agg.box_summary(data, y, x)
+        ax.bxp(summaries, showmeans=showmeans, showfliers=False, patch_artist=True,
+               boxprops={'facecolor': 'lightblue'})
+        ax.set_xlabel(x if x is not None else '')
+        ax.set_ylabel(y)
+
+    @staticmethod
+    def univariate_columns(data: pd.DataFrame):
+        """
+        Detects the numerical and categorical columns univariate_analysis plots by default.
+
+        Args:
+            data (pd.DataFrame): The data, or an empty frame with its dtypes.
+
+        Returns:
+            tuple: (num_cols, cat_cols) lists of column names.
+        """
+        num_cols = data.select_dtypes(include=['float64', 'int64']).columns.tolist()
+        cat_cols = data.select_dtypes(include=['object', 'category']).columns.tolist()
+        return num_cols, cat_cols
+
+    @instrument
     def univariate_analysis(self, num_cols=None, cat_cols=None):
         """
         Performs univariate analysis by plotting histograms for numerical columns 
@@ -23,37 +110,49 @@ class DataVisualizer:
             num_cols (list): List of numerical columns to plot histograms. If None, automatically detect numerical columns.
             cat_cols (list): List of categorical columns to plot bar charts. If None, automatically detect categorical columns.
         """
+        detected_num_cols, detected_cat_cols = self.univariate_columns(self.data)
         if num_cols is None:
-            num_cols = self.data.select_dtypes(include=['float64', 'int64']).columns.tolist()
+            num_cols = detected_num_cols
         
         if cat_cols is None:
-            cat_cols = self.data.select_dtypes(include=['object', 'category']).columns.tolist()
+            cat_cols = detected_cat_cols
 
         # Histograms for Numerical Columns
         for col in num_cols:
             plt.figure(figsize=(10, 3))
-            sns.histplot(self.data[col].dropna(), kde=True, bins=30, color='royalblue', edgecolor='black', alpha=0.7)
+            if self.aggregate:
+                counts, edges = agg.histogram(self.data[col], bins=30)
+                plt.stairs(counts, edges, fill=True, color='royalblue', edgecolor='black', alpha=0.7)
+                curve = agg.kde_curve(self.data[col], edges, n=self.sample_size)
+                if curve is not None:
+                    plt.plot(*curve, color='royalblue')
+            else:
+                sns.histplot(self.data[col].dropna(), kde=True, bins=30, color='royalblue', edgecolor='black', alpha=0.7)
             plt.title(f'Distribution of {col}', fontsize=18, fontweight='bold', color='navy')
             plt.xlabel(col, fontsize=12)
             plt.ylabel('Frequency', fontsize=12)
             plt.grid(axis='y', linestyle='--', alpha=0.7)
             plt.legend([col], loc='upper right', fontsize=12)
             plt.tight_layout()
-            plt.show()
+            self._finish(f'univariate_{col}')
 
         # Bar Charts for Categorical Columns
         for col in cat_cols:
             plt.figure(figsize=(10, 4))
-            colors = sns.color_palette("coolwarm", len(self.data[col].unique()))
-            sns.countplot(x=col, data=self.data, hue=col, legend=False, palette=colors, order=self.data[col].value_counts().index)
+            if self.aggregate:
+                self._draw_counts(plt.gca(), agg.count_table(self.data, col), palette="coolwarm")
+            else:
+                colors = sns.color_palette("coolwarm", len(self.data[col].unique()))
+                sns.countplot(x=col, data=self.data, hue=col, legend=False, palette=colors, order=self.data[col].value_counts().index)
             plt.title(f'Distribution of {col}', fontsize=18, fontweight='bold', color='darkred')
             plt.xlabel(col, fontsize=12)
             plt.ylabel('Count', fontsize=12)
             plt.xticks(rotation=45, ha='right', fontsize=12)
             plt.grid(axis='y', linestyle='--', alpha=0.7)
             plt.tight_layout()
-            plt.show()
+            self._finish(f'univariate_{col}')
     
+    @instrument
     def scatter_plot(self, x_col, y_col, hue_col=None):
         """
         Creates a scatter plot to visualize the relationship between two numerical variables.
@@ -64,11 +163,13 @@ class DataVisualizer:
             hue_col (str): Column to color the points by (optional).
         """
         plt.figure(figsize=(8, 4))
-        sns.scatterplot(data=self.data, x=x_col, y=y_col, hue=hue_col)
+        data = agg.sample_rows(self.data, n=self.sample_size) if self.aggregate else self.data
+        sns.scatterplot(data=data, x=x_col, y=y_col, hue=hue_col)
         plt.title(f'Scatter Plot of {x_col} vs {y_col}')
         #plt.legend(title='PostalCode', bbox_to_anchor=(1.05, 1), loc='upper left')
-        plt.show()
+        self._finish(f'scatter_{x_col}_vs_{y_col}')
 
+    @instrument
     def correlation_matrix(self, cols):
         """
         Displays a heatmap of the correlation matrix for the specified columns.
@@ -80,9 +181,10 @@ class DataVisualizer:
         plt.figure(figsize=(8, 4))
         sns.heatmap(corr_matrix, annot=True, cmap='coolwarm', fmt='.2f', linewidths=0.5)
         plt.title('Correlation Matrix')
-        plt.show()
+        self._finish('correlation_matrix')
         
     
+    @instrument
     def plot_geographical_trends(self, cover_types):
         # Set up the figure with 2 rows and 2 columns for combined visualizations
         fig, axs = plt.subplots(2, 2, figsize=(16, 12))
@@ -91,7 +193,10 @@ class DataVisualizer:
         filtered_data = self.data[self.data['CoverType'].isin(cover_types)]
 
         # 1. Cover Type Distribution by Province (bar plot)
-        sns.countplot(x='Province', hue='CoverType', data=filtered_data, palette='Set3', ax=axs[0, 0])
+        if self.aggregate:
+            self._draw_counts(axs[0, 0], agg.count_table(filtered_data, 'Province', hue='CoverType'), palette='Set3')
+        else:
+            sns.countplot(x='Province', hue='CoverType', data=filtered_data, palette='Set3', ax=axs[0, 0])
         axs[0, 0].set_title('Distribution of Common Cover Types Across Provinces')
         axs[0, 0].set_xlabel('Province')
         axs[0, 0].set_ylabel('Count')
@@ -107,14 +212,20 @@ class DataVisualizer:
         axs[0, 1].tick_params(axis='x', rotation=45)
 
         # 3. Total Premium by Province (box plot)
-        sns.boxplot(x='Province', y='TotalPremium', data=self.data, showmeans=True, ax=axs[1, 0])
+        if self.aggregate:
+            self._draw_boxes(axs[1, 0], self.data, 'TotalPremium', x='Province', showmeans=True)
+        else:
+            sns.boxplot(x='Province', y='TotalPremium', data=self.data, showmeans=True, ax=axs[1, 0])
         axs[1, 0].set_title('Distribution of Total Premium by Province')
         axs[1, 0].set_xlabel('Province')
         axs[1, 0].set_ylabel('Total Premium')
         axs[1, 0].tick_params(axis='x', rotation=45)
 
         # 4. Vehicle Type Distribution by Province (count plot)
-        sns.countplot(x='Province', hue='VehicleType', data=self.data, palette='Set1', ax=axs[1, 1])
+        if self.aggregate:
+            self._draw_counts(axs[1, 1], agg.count_table(self.data, 'Province', hue='VehicleType'), palette='Set1')
+        else:
+            sns.countplot(x='Province', hue='VehicleType', data=self.data, palette='Set1', ax=axs[1, 1])
         axs[1, 1].set_title('Vehicle Type Distribution by Province')
         axs[1, 1].set_xlabel('Province')
         axs[1, 1].set_ylabel('Count of Vehicle Types')
@@ -123,10 +234,11 @@ class DataVisualizer:
 
         # Adjust layout to prevent overlapping
         plt.tight_layout()
-        plt.show()
+        self._finish('geographical_trends')
 
 
 
+    @instrument
     def plot_outliers_boxplot(self, cols):
         """
         Plots box plots to detect outliers in numerical columns.
@@ -138,61 +250,80 @@ class DataVisualizer:
         # Plotting a box plot for each numerical column
         for i, col in enumerate(cols, 1):
             plt.subplot(1, len(cols), i)
-            sns.boxplot(y=self.data[col], color='lightblue')
+            if self.aggregate:
+                self._draw_boxes(plt.gca(), self.data, col)
+            else:
+                sns.boxplot(y=self.data[col], color='lightblue')
             plt.title(f'Box Plot of {col}')
             plt.tight_layout()
 
-        plt.show()
+        self._finish('outliers_boxplot')
     
     
+    @instrument
     def cap_all_outliers(self, numerical_columns):
         """
         Caps the outliers for all numerical columns in the dataframe 
         using the IQR method.
+
+        The quartiles of all columns come from one batched quantile call and the
+        columns are clipped in place; the fitted IQRCapper is kept on `self.capper`
+        so the same bounds can be reused on future data.
+
+        A partitioned dataset gets approximate quartiles from quantile sketches merged across
+        its partitions, and `self.data` becomes a view that caps each partition as it is read.
         """
-        for column in numerical_columns:
-            Q1 = self.data[column].quantile(0.25)
-            Q3 = self.data[column].quantile(0.75)
-            IQR = Q3 - Q1
-            
-            lower_bound = Q1 - 1.5 * IQR
-            upper_bound = Q3 + 1.5 * IQR
-            
-            # Cap the outliers
-            self.data[column] = self.data[column].apply(lambda x: lower_bound if x < lower_bound else (upper_bound if x > upper_bound else x))
+        if is_partitioned(self.data):
+            self.capper = IQRCapper()
+            sketches = PartitionedBackend(self.data, self.max_workers).sketches(numerical_columns, self.capper.k,
+                                                                                self.capper.seed)
+            self.capper.fit_sketches(sketches)
+            self.data = self.data.map(self.capper.transform)
+            return self.data
+
+        self.capper = IQRCapper().fit(self.data, numerical_columns)
+        self.capper.transform(self.data, inplace=True)
         
         return self.data
 
     
+    @instrument
     def plot_violin_premium_by_cover(self, x_col, y_col):
         """
         Creates a violin plot showing the distribution of TotalPremium by CoverType.
         """
         plt.figure(figsize=(10, 4))
-        sns.violinplot(x=x_col, y=y_col, data=self.data, palette='muted', inner='quartile')
+        # In aggregate mode each violin's KDE is estimated on a bounded per-group sample
+        data = agg.sample_rows(self.data, n=self.sample_size, by=x_col) if self.aggregate else self.data
+        sns.violinplot(x=x_col, y=y_col, data=data, palette='muted', inner='quartile')
         plt.title('Distribution of TotalPremium by CoverType')
         plt.xticks(rotation=45)
         plt.tight_layout()
-        plt.show()
+        self._finish(f'violin_{y_col}_by_{x_col}')
         
+    @instrument
     def plot_pairplot(self, cols):
         """
         Creates a pair plot to explore the relationships between numerical features.
         """
-        sns.pairplot(self.data[cols], palette='coolwarm')
+        data = agg.sample_rows(self.data[cols], n=self.sample_size) if self.aggregate else self.data[cols]
+        sns.pairplot(data, palette='coolwarm')
         plt.title('Pair Plot of Key Numerical Features')
         plt.tight_layout()
-        plt.show()
+        self._finish('pairplot')
     
+    @instrument
     def plot_pairplot(self, cols):
         """
         Creates a pair plot to explore the relationships between numerical features.
         """
-        sns.pairplot(self.data[cols], palette='coolwarm')
+        data = agg.sample_rows(self.data[cols], n=self.sample_size) if self.aggregate else self.data[cols]
+        sns.pairplot(data, palette='coolwarm')
         plt.title('Pair Plot of Key Numerical Features')
         plt.tight_layout()
-        plt.show()
+        self._finish('pairplot')
         
+    @instrument
     def plot_correlation_heatmap(self, cols):
         """
         Creates a correlation heatmap for key numerical columns.
@@ -202,7 +333,7 @@ class DataVisualizer:
         sns.heatmap(corr_matrix, annot=True, cmap='RdYlGn', linewidths=0.5)
         plt.title('Correlation Heatmap')
         plt.tight_layout()
-        plt.show()
+        self._finish('correlation_heatmap')
 
 
 
@@ -0,0 +1,270 @@
+# scripts/dtype_optimization.py
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from typing import NamedTuple, Optional
+import numpy as np
+import pandas as pd
+from pandas.api.types import (is_bool_dtype, is_float_dtype, is_integer_dtype, is_numeric_dtype,
+                              is_object_dtype, is_string_dtype)
+
+try:
+    from scripts.instrumentation import instrument
+except ImportError:
+    # Notebooks import the scripts directly with the scripts/ directory on sys.path
+    from instrumentation import instrument
+
+# Text values parsed as booleans (the policy file's Yes/No flags)
+DEFAULT_TRUE_VALUES = ['Yes']
+DEFAULT_FALSE_VALUES = ['No']
+
+# Numeric codes that are labels rather than quantities, so they become categoricals
+CODE_COLUMNS = ['PostalCode']
+
+# Text columns become categorical when they have at most this many distinct values per non-null value
+MAX_CATEGORY_RATIO = 0.5
+
+# Largest relative error allowed when narrowing float64 to float32
+FLOAT32_RTOL = 1e-6
+
+# Largest absolute error allowed when narrowing float64 to float32: below half a cent, so money
+# amounts still round to the same cents (float32 alone only keeps ~7 significant digits)
+FLOAT32_ATOL = 0.005
+
+# Nullable integer dtypes, smallest first
+INTEGER_DTYPES = ['Int8', 'Int16', 'Int32', 'Int64']
+
+# Integer dtypes must hold this multiple of the largest magnitude seen, because the parser
+# silently wraps values that overflow the schema's dtype (e.g. IDs growing in later files)
+INTEGER_HEADROOM = 10
+
+
+@dataclass
+class DtypeSchema:
+    dtypes: dict
+    true_values: list = field(default_factory=lambda: list(DEFAULT_TRUE_VALUES))
+    false_values: list = field(default_factory=lambda: list(DEFAULT_FALSE_VALUES))
+    # Float columns narrowed because of the values they held, which later files may not share
+    float_columns: list = field(default_factory=list)
+
+    def read_options(self) -> dict:
+        """
+        Keyword arguments applying the schema while parsing, e.g. load_data(path, filename, **schema.read_options()).
+
+        Float columns are parsed as float64, so a later file with cents in a column that only
+        held whole numbers neither fails nor loses them; apply_schema narrows them afterwards
+        where the new values allow it.
+        """
+        dtypes = {column: 'float64' if column in self.float_columns else dtype for column, dtype in self.dtypes.items()}
+        return {'dtype': dtypes, 'true_values': list(self.true_values), 'false_values': list(self.false_values)}
+
+
+class OptimizedData(NamedTuple):
+    data: pd.DataFrame
+    schema: DtypeSchema
+    report: pd.DataFrame
+
+
+def _integer_dtype(minimum, maximum, headroom: float) -> str:
+    """
+    Returns the smallest nullable integer dtype holding `headroom` times every value between minimum and maximum.
+    """
+    for dtype in INTEGER_DTYPES:
+        info = np.iinfo(dtype.lower())
+        if info.min <= headroom * min(minimum, 0) and headroom * max(maximum, 0) <= info.max:
+            return dtype
+    return INTEGER_DTYPES[-1]
+
+
+def _float32_safe(values: np.ndarray, rtol: float, atol: float) -> bool:
+    """
+    Whether float64 values survive the round trip through float32 within both `rtol` and `atol`.
+    """
+    with np.errstate(over='ignore'):
+        narrowed = values.astype(np.float32).astype(np.float64)
+    return bool(np.isfinite(narrowed).all() and np.allclose(narrowed, values, rtol=rtol, atol=0)
+                and np.allclose(narrowed, values, rtol=0, atol=atol))
+
+
+def _fits(values: np.ndarray, dtype: str) -> bool:
+    """
+    Whether float64 values can be stored as `dtype` (float32 or a nullable integer) without loss.
+    """
+    if values.size == 0:
+        return True
+    if dtype == 'float32':
+        return _float32_safe(values, FLOAT32_RTOL, FLOAT32_ATOL)
+    if dtype in INTEGER_DTYPES:
+        info = np.iinfo(dtype.lower())
+        return bool(np.isfinite(values).all() and (values == np.round(values)).all()
+                    and info.min <= values.min() and values.max() <= info.max)
+    return True
+
+
+def _column_dtype(series: pd.Series, max_category_ratio: float, float_rtol: float, float_atol: float,
+                  integer_headroom: float, true_values: list, false_values: list, code: bool) -> Optional[str]:
+    """
+    Infers the most compact safe dtype of one column, or None to keep the current one.
+    """
+    values = series.dropna()
+    if values.empty:
+        # Nothing to infer from; all-missing columns keep their dtype
+        return None
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return 'category'
+    if is_bool_dtype(series):
+        # Already one byte per value
+        return None
+
+    if is_numeric_dtype(series):
+        if code:
+            return 'category'
+        if is_integer_dtype(series):
+            return _integer_dtype(values.min(), values.max(), integer_headroom)
+        if is_float_dtype(series):
+            floats = values.to_numpy(dtype=np.float64)
+            if np.isfinite(floats).all() and (floats == np.round(floats)).all():
+                # Integer-valued floats (e.g. counts stored as float because of missing values)
+                return _integer_dtype(floats.min(), floats.max(), integer_headroom)
+            if series.dtype != np.float32 and _float32_safe(floats, float_rtol, float_atol):
+                return 'float32'
+        return None
+
+    if is_string_dtype(series) or is_object_dtype(series):
+        distinct = values.unique()
+        if set(distinct) <= set(true_values) | set(false_values):
+            return 'boolean'
+        if len(distinct) <= max_category_ratio * len(values):
+            return 'category'
+    return None
+
+
+@instrument
+def infer_schema(data: pd.DataFrame, max_category_ratio: float = MAX_CATEGORY_RATIO,
+                 float_rtol: float = FLOAT32_RTOL, float_atol: float = FLOAT32_ATOL,
+                 integer_headroom: float = INTEGER_HEADROOM,
+                 true_values: Optional[list] = None, false_values: Optional[list] = None,
+                 code_columns: Optional[list] = None) -> DtypeSchema:
+    """
+    Infers the most compact dtype of every column that can be narrowed without losing information.
+
+    - Text columns made only of the true/false values (Yes/No flags) become nullable booleans.
+    - Other text columns with few distinct values become categoricals.
+    - Integers, and floats holding only whole numbers, become the smallest nullable integer
+      with `integer_headroom` to spare.
+    - Other floats become float32 where every value round-trips within `float_rtol` and
+      `float_atol`, so amounts such as a sum insured of 9876543.21 keep their cents as float64.
+
+    Args:
+        data (pd.DataFrame): Loaded policy data.
+        max_category_ratio (float): Largest distinct-to-non-null ratio of a categorical text column.
+        float_rtol (float): Largest relative error allowed by float32.
+        float_atol (float): Largest absolute error allowed by float32.
+        integer_headroom (float): Multiple of the observed magnitudes an integer dtype must hold.
+        true_values (list): Text parsed as True. Defaults to DEFAULT_TRUE_VALUES.
+        false_values (list): Text parsed as False. Defaults to DEFAULT_FALSE_VALUES.
+        code_columns (list): Numeric label columns made categorical. Defaults to CODE_COLUMNS.
+
+    Returns:
+        DtypeSchema: The narrowed dtypes. Columns that cannot be narrowed are left out.
+    """
+    true_values = list(DEFAULT_TRUE_VALUES if true_values is None else true_values)
+    false_values = list(DEFAULT_FALSE_VALUES if false_values is None else false_values)
+    code_columns = CODE_COLUMNS if code_columns is None else code_columns
+
+    dtypes, float_columns = {}, []
+    for column in data.columns:
+        dtype = _column_dtype(data[column], max_category_ratio, float_rtol, float_atol, integer_headroom,
+                              true_values, false_values, column in code_columns)
+        if dtype is not None:
+            dtypes[column] = dtype
+            if is_float_dtype(data[column]) and dtype != 'category':
+                float_columns.append(column)
+    return DtypeSchema(dtypes, true_values, false_values, float_columns)
+
+
+def apply_schema(data: pd.DataFrame, schema: DtypeSchema) -> pd.DataFrame:
+    """
+    Converts loaded data to the schema's dtypes. Columns missing from `data` are ignored.
+
+    Float columns whose values no longer fit the schema's dtype (e.g. cents in a column
+    inferred as an integer, or amounts float32 would round) are kept as float64.
+
+    Returns:
+        pd.DataFrame: The converted data.
+    """
+    mapping = {**{value: True for value in schema.true_values}, **{value: False for value in schema.false_values}}
+    converted = {}
+    for column, dtype in schema.dtypes.items():
+        if column not in data.columns:
+            continue
+        series = data[column]
+        if column in schema.float_columns and not _fits(series.dropna().to_numpy(dtype=np.float64), dtype):
+            dtype = 'float64'
+        if dtype == 'category' and is_numeric_dtype(series):
+            # Categories as the parser reads them from the text file
+            series = series.astype('str')
+        elif dtype in ('boolean', 'bool') and not is_bool_dtype(series):
+            # Flags the schema does not know become missing, as they are not booleans
+            series = series.map(mapping).astype('boolean')
+        converted[column] = series.astype(dtype)
+    return data.assign(**converted)
+
+
+def memory_report(before: pd.DataFrame, after: pd.DataFrame) -> pd.DataFrame:
+    """
+    Compares the memory of every column before and after a dtype change.
+
+    Returns:
+        pd.DataFrame: Per column, the dtypes, the deep memory usage in MB and the reduction in
+            percent, with a final 'Total' row.
+    """
+    memory_before = before.memory_usage(deep=True, index=False) / 2**20
+    memory_after = after.memory_usage(deep=True, index=False) / 2**20
+    report = pd.DataFrame({
+        'dtype_before': before.dtypes.astype(str),
+        'dtype_after': after.dtypes.astype(str),
+        'memory_before_mb': memory_before,
+        'memory_after_mb': memory_after,
+    })
+    report.loc['Total'] = ['', '', memory_before.sum(), memory_after.sum()]
+    report['reduction_pct'] = (1 - report['memory_after_mb'] / report['memory_before_mb']) * 100
+    return report
+
+
+@instrument
+def optimize_dtypes(data: pd.DataFrame, schema: Optional[DtypeSchema] = None, **kwargs) -> OptimizedData:
+    """
+    Narrows the dtypes of loaded data and reports the memory saved per column.
+
+    Args:
+        data (pd.DataFrame): Loaded policy data. It is not modified.
+        schema (DtypeSchema): Schema to apply. If None, it is inferred from `data`.
+        **kwargs: Passed to infer_schema.
+
+    Returns:
+        OptimizedData: The converted data, the schema used and the memory report.
+    """
+    if schema is None:
+        schema = infer_schema(data, **kwargs)
+    optimized = apply_schema(data, schema)
+    return OptimizedData(optimized, schema, memory_report(data, optimized))
+
+
+def save_schema(schema: DtypeSchema, path: str) -> None:
+    """
+    Stores a schema as JSON, replacing the file atomically.
+    """
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, 'w') as f:
+        json.dump(asdict(schema), f, indent=2)
+        f.write('\n')
+    os.replace(tmp_path, path)
+
+
+def load_schema(path: str) -> DtypeSchema:
+    """
+    Loads a schema written by save_schema.
+    """
+    with open(path) as f:
+        return DtypeSchema(**json.load(f))
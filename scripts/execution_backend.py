@@ -0,0 +1,443 @@
+# scripts/execution_backend.py
+import copy
+import glob
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable, Iterator, Optional, Union
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_datetime64_any_dtype
+
+try:
+    from scripts.contingency import ContingencyBuilder
+    from scripts.data_profiling import MissingDataProfiler
+    from scripts.group_statistics import MOMENT_COLUMNS, GroupMoments
+    from scripts.load_data import DEFAULT_CHUNKSIZE, _require_pyarrow, concat_chunks, load_data, write_columnar
+    from scripts.outlier_capping import KLLSketch
+    from scripts.windowed_testing import monthly_moments
+except ImportError:
+    # Notebooks import the scripts directly with the scripts/ directory on sys.path
+    from contingency import ContingencyBuilder
+    from data_profiling import MissingDataProfiler
+    from group_statistics import MOMENT_COLUMNS, GroupMoments
+    from load_data import DEFAULT_CHUNKSIZE, _require_pyarrow, concat_chunks, load_data, write_columnar
+    from outlier_capping import KLLSketch
+    from windowed_testing import monthly_moments
+
+# Dataset read by the current worker process, set once by _init_worker
+_worker_dataset = None
+
+
+def _parquet_files(path: str) -> list:
+    """
+    Lists the Parquet files under a directory, skipping hidden and '_'-prefixed directories.
+    """
+    files = []
+    for root, directories, names in os.walk(path):
+        directories[:] = [name for name in directories if not name.startswith(('_', '.'))]
+        files.extend(os.path.join(root, name) for name in names if name.endswith('.parquet'))
+    return sorted(files)
+
+
+class PartitionedDataset:
+
+    def __init__(self, path: str, columns: Optional[list] = None, transforms: tuple = ()):
+        """
+        Initialize a dataset stored as Parquet files, one partition per row group.
+
+        Only the file footers are read here. Partitions are read on demand, so the
+        analysis classes can aggregate data that does not fit in memory one partition
+        at a time, in parallel (see PartitionedBackend).
+
+        Args:
+            path (str): A directory of .parquet files, possibly in subdirectories such as the month
+                partitions written by ingestion.ingest_archives (read in path order), or a single
+                Parquet file. Directories starting with '_' or '.' (e.g. staging areas) are skipped.
+            columns (list): Columns exposed by the dataset. Defaults to every stored column.
+            transforms (tuple): Functions applied to every partition after it is read, in order
+                (e.g. an imputer's transform). They must be picklable to run in worker processes.
+        """
+        pa = _require_pyarrow()
+        self.path = path
+        files = _parquet_files(path) if os.path.isdir(path) else [path]
+        if not files:
+            raise FileNotFoundError(f"No Parquet files found in {path}")
+
+        self.partitions = []
+        for file in files:
+            metadata = pa.parquet.ParquetFile(file).metadata
+            for row_group in range(metadata.num_row_groups):
+                self.partitions.append((file, row_group, metadata.row_group(row_group).num_rows))
+        self.offsets = np.cumsum([0] + [n_rows for _, _, n_rows in self.partitions])
+        # Pandas metadata is used for the dtypes, so categoricals and strings come back as written
+        self._empty = pa.parquet.ParquetFile(files[0]).schema_arrow.empty_table().to_pandas()
+        self._columns = list(columns) if columns is not None else list(self._empty.columns)
+        self.transforms = tuple(transforms)
+
+    @property
+    def columns(self) -> pd.Index:
+        return pd.Index(self._columns)
+
+    @property
+    def dtypes(self) -> pd.Series:
+        return self._empty.dtypes[self._columns]
+
+    @property
+    def n_partitions(self) -> int:
+        return len(self.partitions)
+
+    def __len__(self) -> int:
+        return int(self.offsets[-1])
+
+    def _view(self, columns: list, transforms: tuple) -> 'PartitionedDataset':
+        view = copy.copy(self)
+        view._columns = list(columns)
+        view.transforms = transforms
+        return view
+
+    def drop(self, columns=None, errors: str = 'raise') -> 'PartitionedDataset':
+        """
+        Returns a view without some columns, like DataFrame.drop(columns=...).
+        """
+        columns = [columns] if isinstance(columns, str) else list(columns or [])
+        missing = [column for column in columns if column not in self._columns]
+        if missing and errors == 'raise':
+            raise KeyError(f"{missing} not found in columns")
+        return self._view([column for column in self._columns if column not in columns], self.transforms)
+
+    def select(self, columns: list) -> 'PartitionedDataset':
+        """
+        Returns a view with only the given columns.
+        """
+        return self._view(columns, self.transforms)
+
+    def map(self, func: Callable[[pd.DataFrame], pd.DataFrame]) -> 'PartitionedDataset':
+        """
+        Returns a view applying `func` to every partition when it is read. Nothing is computed now.
+        """
+        return self._view(self._columns, self.transforms + (func,))
+
+    def read_partition(self, index: int, columns: Optional[list] = None) -> pd.DataFrame:
+        """
+        Reads one partition.
+
+        Args:
+            index (int): Partition number.
+            columns (list): Columns to read. Defaults to the dataset's columns.
+
+        Returns:
+            pd.DataFrame: The rows, indexed by their position in the whole dataset.
+        """
+        pa = _require_pyarrow()
+        file, row_group, n_rows = self.partitions[index]
+        columns = self._columns if columns is None else list(columns)
+        # Transforms may need any column, so they see the full partition
+        read_columns = self._columns if self.transforms else columns
+        data = pa.parquet.ParquetFile(file).read_row_group(row_group, columns=read_columns).to_pandas()
+        data.index = pd.RangeIndex(self.offsets[index], self.offsets[index] + n_rows)
+        for transform in self.transforms:
+            data = transform(data)
+        return data[columns]
+
+    def iter_partitions(self, columns: Optional[list] = None) -> Iterator[pd.DataFrame]:
+        """
+        Yields the partitions in order, one at a time.
+        """
+        for index in range(self.n_partitions):
+            yield self.read_partition(index, columns)
+
+    def to_pandas(self, columns: Optional[list] = None) -> pd.DataFrame:
+        """
+        Reads the whole dataset (or some columns) into one DataFrame.
+        """
+        return concat_chunks(self.iter_partitions(columns))
+
+    @classmethod
+    def write(cls, chunks: Iterable[pd.DataFrame], path: str) -> 'PartitionedDataset':
+        """
+        Writes chunks of rows as a partitioned dataset, one Parquet file per chunk.
+
+        Args:
+            chunks (Iterable[pd.DataFrame]): The rows, e.g. from load_data(..., chunksize=...).
+            path (str): Directory to write to. Existing partitions in it are replaced.
+
+        Returns:
+            PartitionedDataset: The written dataset.
+        """
+        os.makedirs(path, exist_ok=True)
+        for stale in glob.glob(os.path.join(path, '*.parquet')):
+            os.remove(stale)
+        for index, chunk in enumerate(chunks):
+            write_columnar(chunk, os.path.join(path, f'part-{index:05d}.parquet'))
+        return cls(path)
+
+    @classmethod
+    def from_archive(cls, outer_zip_path: str, filename: str, path: str, chunksize: int = DEFAULT_CHUNKSIZE,
+                     dtype: Optional[dict] = None, usecols: Optional[list] = None) -> 'PartitionedDataset':
+        """
+        Streams the policy file out of the nested zip into a partitioned dataset, one partition per chunk.
+
+        Only one chunk is held in memory at a time, so the file never has to fit in memory.
+
+        Args:
+            outer_zip_path (str): Path to the outer zip file.
+            filename (str): The name of the TXT file to load.
+            path (str): Directory to write the partitions to.
+            chunksize (int): Rows per partition.
+            dtype (dict): Per-column dtypes. Defaults to POLICY_DTYPES.
+            usecols (list): Subset of columns to keep.
+
+        Returns:
+            PartitionedDataset: The written dataset.
+        """
+        return cls.write(load_data(outer_zip_path, filename, chunksize=chunksize, dtype=dtype, usecols=usecols), path)
+
+
+def is_partitioned(data) -> bool:
+    return isinstance(data, PartitionedDataset)
+
+
+def _init_worker(dataset: PartitionedDataset) -> None:
+    global _worker_dataset
+    _worker_dataset = dataset
+
+
+def _run_partition(task: tuple):
+    """
+    Reads one partition in a worker and applies a partial aggregation to it.
+    """
+    func, index, columns, args = task
+    return func(_worker_dataset.read_partition(index, columns), *args)
+
+
+def _profile_partition(data: pd.DataFrame) -> MissingDataProfiler:
+    return MissingDataProfiler(track_distinct=False).update(data)
+
+
+def _float_values(series: pd.Series) -> np.ndarray:
+    """
+    Numerical values as floats for the quantile sketches; datetimes become nanoseconds since the epoch.
+    """
+    if is_datetime64_any_dtype(series):
+        values = series.to_numpy(dtype='datetime64[ns]')
+        return np.where(np.isnat(values), np.nan, values.astype(np.int64).astype(np.float64))
+    return series.to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def _sketch_partition(data: pd.DataFrame, k: int, seed: Optional[int]) -> dict:
+    return {column: KLLSketch(k, seed).update(_float_values(data[column])) for column in data.columns}
+
+
+def _value_counts_partition(data: pd.DataFrame) -> dict:
+    return {column: data[column].value_counts() for column in data.columns}
+
+
+def _moments_partition(data: pd.DataFrame, feature: str, metric: str) -> GroupMoments:
+    return GroupMoments.from_frame(data, feature, metric)
+
+
+def _monthly_partition(data: pd.DataFrame, feature: str, metric: str, time_column: str) -> list:
+    return monthly_moments(data, feature, metric, time_column)
+
+
+def _contingency_partition(data: pd.DataFrame, feature: str, metric: str, bins, edges) -> ContingencyBuilder:
+    return ContingencyBuilder(feature, metric, bins=bins, edges=edges).update(data)
+
+
+def _pair_counts_partition(data: pd.DataFrame, feature: str, metric: str) -> pd.Series:
+    return data.groupby([feature, metric], observed=True).size()
+
+
+def _filter_partition(data: pd.DataFrame, feature: str, value, exclude_values, columns: list) -> pd.DataFrame:
+    # Missing values are kept unless a value is required
+    mask = ~data[feature].isin(exclude_values).to_numpy(dtype=bool)
+    if value is not None:
+        mask &= (data[feature] == value).fillna(False).to_numpy(dtype=bool)
+    return data.loc[mask, columns]
+
+
+def _first_rows_partition(data: pd.DataFrame, feature: str) -> pd.Series:
+    first = data[feature].dropna().drop_duplicates()
+    return pd.Series(first.index, index=first.to_numpy())
+
+
+def _as_object_index(moments: GroupMoments) -> GroupMoments:
+    """
+    Turns a categorical group index into plain labels, as categories differ between partitions.
+    """
+    frame = moments.moments.copy()
+    frame.index = pd.Index(frame.index.to_numpy(dtype=object), name=frame.index.name)
+    return GroupMoments(frame)
+
+
+def _merge_moments(partials: list) -> GroupMoments:
+    """
+    Sums per-partition group moments, keeping the category order a categorical groupby would give.
+    """
+    total = GroupMoments(pd.DataFrame(columns=MOMENT_COLUMNS, dtype=np.float64))
+    for moments in partials:
+        total = total + _as_object_index(moments)
+    categories = [moments.moments.index.categories for moments in partials
+                  if isinstance(moments.moments.index, pd.CategoricalIndex)]
+    if not categories:
+        return total
+    order = pd.Index(np.concatenate([c.to_numpy(dtype=object) for c in categories])).unique()
+    frame = total.moments.loc[order[order.isin(total.moments.index)]]
+    frame.index = pd.CategoricalIndex(frame.index, categories=order, name=total.moments.index.name)
+    return GroupMoments(frame)
+
+
+class PartitionedBackend:
+
+    def __init__(self, dataset: PartitionedDataset, max_workers: Optional[int] = None):
+        """
+        Initialize a partition-parallel executor of the analysis aggregations.
+
+        Every aggregation is computed per partition on a process pool and the partial
+        results are merged: null counts are added, quantiles come from merged KLL sketches
+        (approximate), group moments and contingency counts are summed.
+
+        Args:
+            dataset (PartitionedDataset): The data.
+            max_workers (int): Worker processes. Defaults to the number of CPUs; 1 runs
+                the partitions in the current process.
+        """
+        self.dataset = dataset
+        self.max_workers = max_workers or os.cpu_count() or 1
+
+    def map_partitions(self, func: Callable, columns: list, *args) -> list:
+        """
+        Applies a picklable func(partition, *args) to every partition, reading only `columns`.
+
+        Returns:
+            list: The result of every partition, in partition order.
+        """
+        tasks = [(func, index, list(columns), args) for index in range(self.dataset.n_partitions)]
+        n_workers = min(self.max_workers, len(tasks))
+        if n_workers <= 1:
+            _init_worker(self.dataset)
+            return [_run_partition(task) for task in tasks]
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker,
+                                 initargs=(self.dataset,)) as executor:
+            return list(executor.map(_run_partition, tasks))
+
+    def missing_summary(self) -> pd.DataFrame:
+        """
+        Same output as DataProcessing.missing_data_summary, from merged per-partition null counts.
+        """
+        profiles = self.map_partitions(_profile_partition, self.dataset.columns)
+        merged = MissingDataProfiler(track_distinct=False)
+        for profile in profiles:
+            merged.merge(profile)
+        return merged.summary()
+
+    def sketches(self, columns: list, k: int = 200, seed: Optional[int] = None) -> dict:
+        """
+        Returns one merged KLL quantile sketch per numerical column.
+        """
+        merged = {column: KLLSketch(k, seed) for column in columns}
+        for partial in self.map_partitions(_sketch_partition, columns, k, seed):
+            for column, sketch in partial.items():
+                merged[column].merge(sketch)
+        return merged
+
+    def quantiles(self, columns: list, q: list, k: int = 200) -> pd.DataFrame:
+        """
+        Approximate quantiles of numerical columns, in the layout of DataFrame.quantile(list).
+        """
+        sketches = self.sketches(columns, k)
+        dtypes = self.dataset.dtypes
+        quantiles = {}
+        for column in columns:
+            values = sketches[column].quantile(q)
+            quantiles[column] = pd.to_datetime(values, unit='ns') if is_datetime64_any_dtype(dtypes[column]) else values
+        return pd.DataFrame(quantiles, index=q)
+
+    def modes(self, columns: list) -> pd.Series:
+        """
+        The most frequent value of every column (NaN for an all-missing column), from summed value counts.
+        """
+        totals = {}
+        for partial in self.map_partitions(_value_counts_partition, columns):
+            for column, counts in partial.items():
+                counts.index = counts.index.astype(object)
+                totals[column] = counts if column not in totals else totals[column].add(counts, fill_value=0)
+        modes = {}
+        for column in columns:
+            counts = totals.get(column)
+            # Ties resolve to the smallest value, like DataFrame.mode
+            modes[column] = np.nan if counts is None or counts.empty else \
+                counts[counts == counts.max()].sort_index().index[0]
+        return pd.Series(modes, dtype=object)
+
+    def group_moments(self, feature: str, metric: str) -> GroupMoments:
+        """
+        Per-group count, sum and sum of squares of a metric, summed over the partitions.
+        """
+        return _merge_moments(self.map_partitions(_moments_partition, [feature, metric], feature, metric))
+
+    def monthly_moments(self, feature: str, metric: str, time_column: str = 'TransactionMonth') -> list:
+        """
+        Per-month group moments (see windowed_testing.monthly_moments), summed over the partitions.
+        """
+        months = {}
+        for partial in self.map_partitions(_monthly_partition, [time_column, feature, metric],
+                                           feature, metric, time_column):
+            for month, moments in partial:
+                months.setdefault(month, []).append(moments)
+        return [(month, _merge_moments(months[month])) for month in sorted(months)]
+
+    def contingency(self, feature: str, metric: str, bins: Union[int, str] = 10,
+                    strategy: str = 'quantile') -> ContingencyBuilder:
+        """
+        Feature x binned-metric counts, summed over the partitions.
+
+        Bin edges are fixed up front from a merged sketch of the metric, so every
+        partition bins the same way.
+        """
+        edges = None
+        if not (isinstance(bins, str) and bins == 'indicator'):
+            sketch = self.sketches([metric])[metric]
+            if sketch.count == 0:
+                raise ValueError(f"Cannot compute bin edges: '{metric}' has no values.")
+            if strategy == 'quantile':
+                edges = np.unique(sketch.quantile(np.linspace(0, 1, bins + 1)))
+            else:
+                edges = np.linspace(sketch.min, sketch.max, bins + 1)
+            if len(edges) == 1:
+                edges = np.repeat(edges, 2)
+
+        merged = ContingencyBuilder(feature, metric, bins=bins, strategy=strategy, edges=edges)
+        for builder in self.map_partitions(_contingency_partition, [feature, metric], feature, metric, bins, edges):
+            merged.merge(builder)
+        return merged
+
+    def crosstab(self, feature: str, metric: str) -> pd.DataFrame:
+        """
+        pd.crosstab of a feature and every distinct metric value, from summed pair counts.
+        """
+        partials = self.map_partitions(_pair_counts_partition, [feature, metric], feature, metric)
+        counts = pd.concat(partials)
+        counts.index = pd.MultiIndex.from_arrays([counts.index.get_level_values(level).to_numpy(dtype=object)
+                                                  for level in range(2)], names=[feature, metric])
+        return counts.groupby(level=[0, 1]).sum().unstack(fill_value=0)
+
+    def filter_rows(self, feature: str, value=None, exclude_values: Optional[list] = None,
+                    columns: Optional[list] = None) -> pd.DataFrame:
+        """
+        Collects the rows of one segment (feature == value, or feature not in exclude_values).
+
+        Returns:
+            pd.DataFrame: The segment's rows, indexed by their position in the dataset.
+        """
+        columns = list(self.dataset.columns) if columns is None else list(columns)
+        read = columns if feature in columns else columns + [feature]
+        parts = self.map_partitions(_filter_partition, read, feature, value, exclude_values or [], columns)
+        return concat_chunks(parts).set_axis(np.concatenate([part.index for part in parts]).astype(np.int64))
+
+    def first_rows(self, feature: str) -> pd.Series:
+        """
+        Position of the first row of every value of a feature, in order of appearance.
+        """
+        firsts = pd.concat(self.map_partitions(_first_rows_partition, [feature], feature))
+        return firsts[~firsts.index.duplicated()]
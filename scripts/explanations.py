@@ -0,0 +1,208 @@
+# scripts/explanations.py
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Optional, Union
+import numpy as np
+import pandas as pd
+import shap
+from scipy import sparse
+
+# Number of explained rows kept in the cache
+DEFAULT_CACHE_SIZE = 100_000
+
+
+def summarize_background(X, n_samples: int = 100, method: str = 'kmeans', seed: int = 0) -> np.ndarray:
+    """
+    Reduces training rows to a small background set for interventional tree SHAP.
+
+    The cost of interventional SHAP grows with the number of background rows, so a
+    few k-means centroids (or a random sample) stand in for the full training data.
+
+    Args:
+        X (array-like or sparse matrix): Training features.
+        n_samples (int): Number of background rows to keep.
+        method (str): 'kmeans' for cluster centroids or 'sample' for random rows.
+        seed (int): Seed of the random sample.
+
+    Returns:
+        np.ndarray: The background rows.
+    """
+    X = _to_dense(X)
+    if len(X) <= n_samples:
+        return X
+    if method == 'kmeans':
+        return np.asarray(shap.kmeans(X, n_samples).data, dtype=X.dtype)
+    if method == 'sample':
+        return shap.sample(X, n_samples, random_state=seed)
+    raise ValueError(f"Unknown method: {method}. Expected 'kmeans' or 'sample'.")
+
+
+def _to_dense(X) -> np.ndarray:
+    """
+    Converts features (array, DataFrame or sparse matrix) to a dense float32 array.
+    """
+    if sparse.issparse(X):
+        X = X.toarray()
+    elif isinstance(X, pd.DataFrame):
+        X = X.to_numpy()
+    return np.ascontiguousarray(X, dtype=np.float32)
+
+
+def row_keys(X: np.ndarray) -> np.ndarray:
+    """
+    Hashes every row of a dense matrix to a 64-bit key, vectorized over rows.
+
+    Args:
+        X (np.ndarray): Dense features.
+
+    Returns:
+        np.ndarray: One uint64 key per row.
+    """
+    return pd.util.hash_pandas_object(pd.DataFrame(X), index=False).to_numpy()
+
+
+class ShapExplainer:
+
+    def __init__(self, model, background=None, feature_names: Optional[list] = None,
+                 cache_size: int = DEFAULT_CACHE_SIZE, chunk_size: int = 1024, n_jobs: Optional[int] = None,
+                 approximate: bool = False):
+        """
+        Initialize a batched, cached tree SHAP explainer for a trained tree model (e.g. XGBoost).
+
+        Without background data the tree-path-dependent algorithm is used, which needs no
+        background because the trees' own cover statistics summarise the training data. With
+        background data (see summarize_background) interventional tree SHAP is used.
+
+        Explanations are cached by a hash of the feature vector, so repeated or identical
+        policies are explained once. Rows are explained in chunks on a thread pool.
+
+        Args:
+            model: Trained tree model (XGBoost, Random Forest, Decision Tree, ...).
+            background (array-like): Optional summarized background rows.
+            feature_names (list): Feature names, used by importance().
+            cache_size (int): Maximum number of cached row explanations (least recently used are evicted).
+            chunk_size (int): Rows explained per task.
+            n_jobs (int): Number of threads. Defaults to the number of CPUs.
+            approximate (bool): Use the much faster Saabas approximation (path-dependent only).
+        """
+        if background is None:
+            self.explainer = shap.TreeExplainer(model, feature_perturbation='tree_path_dependent')
+        else:
+            if approximate:
+                raise ValueError("approximate is only supported without background data.")
+            self.explainer = shap.TreeExplainer(model, data=_to_dense(background), feature_perturbation='interventional')
+        self.feature_names = feature_names
+        self.cache_size = cache_size
+        self.chunk_size = chunk_size
+        self.n_jobs = n_jobs or os.cpu_count() or 1
+        self.approximate = approximate
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def expected_value(self) -> float:
+        return float(np.ravel(self.explainer.expected_value)[0])
+
+    def _compute(self, X: np.ndarray) -> np.ndarray:
+        """
+        Runs tree SHAP on dense rows.
+        """
+        options = {'approximate': True} if self.approximate else {}
+        return np.asarray(self.explainer.shap_values(X, check_additivity=False, **options), dtype=np.float64)
+
+    def _compute_parallel(self, X: np.ndarray) -> np.ndarray:
+        """
+        Splits rows into chunks explained concurrently (tree SHAP runs in native code).
+        """
+        chunks = [X[start:start + self.chunk_size] for start in range(0, len(X), self.chunk_size)]
+        if len(chunks) <= 1 or self.n_jobs == 1:
+            return self._compute(X) if len(X) else np.empty((0, X.shape[1]))
+        with ThreadPoolExecutor(max_workers=min(self.n_jobs, len(chunks))) as pool:
+            return np.vstack(list(pool.map(self._compute, chunks)))
+
+    def _explain_dense(self, X: np.ndarray) -> np.ndarray:
+        """
+        Explains dense rows, computing only distinct rows that are not cached yet.
+        """
+        keys = row_keys(X)
+        unique_keys, first_rows, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        values = np.empty((len(unique_keys), X.shape[1]))
+
+        missing = []
+        with self._lock:
+            for position, key in enumerate(unique_keys.tolist()):
+                cached = self._cache.get(key)
+                if cached is None:
+                    missing.append(position)
+                else:
+                    self._cache.move_to_end(key)
+                    values[position] = cached
+            self.hits += len(X) - len(missing)
+            self.misses += len(missing)
+
+        if missing:
+            missing = np.asarray(missing)
+            computed = self._compute_parallel(X[first_rows[missing]])
+            values[missing] = computed
+            with self._lock:
+                for key, row in zip(unique_keys[missing].tolist(), computed):
+                    self._cache[key] = row
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return values[inverse.ravel()]
+
+    def _blocks(self, X) -> Iterable[np.ndarray]:
+        """
+        Yields dense blocks of rows, so sparse inputs are only densified a block at a time.
+        """
+        block = self.chunk_size * self.n_jobs
+        for start in range(0, X.shape[0], block):
+            yield _to_dense(X[start:start + block])
+
+    def explain(self, X) -> np.ndarray:
+        """
+        Computes the SHAP values of every row.
+
+        Args:
+            X (array-like, DataFrame or sparse matrix): Features, as the model was trained on.
+
+        Returns:
+            np.ndarray: SHAP values, one row per input row and one column per feature.
+        """
+        blocks = [self._explain_dense(block) for block in self._blocks(X)]
+        return np.vstack(blocks) if blocks else np.empty((0, X.shape[1]))
+
+    def importance(self, X: Union[np.ndarray, sparse.spmatrix, pd.DataFrame, Iterable]) -> pd.Series:
+        """
+        Computes the mean absolute SHAP value of every feature, a block at a time.
+
+        Only running sums are kept, so the full SHAP matrix is never materialized.
+
+        Args:
+            X: Features, or an iterable of feature chunks (e.g. one per month of quotes).
+
+        Returns:
+            pd.Series: Mean |SHAP| per feature, largest first.
+        """
+        chunks = [X] if hasattr(X, 'shape') else X
+        total, count = None, 0
+        for chunk in chunks:
+            for block in self._blocks(chunk):
+                abs_sum = np.abs(self._explain_dense(block)).sum(axis=0)
+                total = abs_sum if total is None else total + abs_sum
+                count += len(block)
+        if total is None:
+            raise ValueError("No rows to explain.")
+
+        names = self.feature_names or [f'feature_{i}' for i in range(len(total))]
+        return pd.Series(total / count, index=names, name='mean_abs_shap').sort_values(ascending=False)
+
+    def cache_info(self) -> dict:
+        """
+        Returns the cache hits, misses and current size.
+        """
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._cache), 'max_size': self.cache_size}
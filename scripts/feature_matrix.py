@@ -0,0 +1,139 @@
+# scripts/feature_matrix.py
+import json
+import os
+from typing import Optional
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+try:
+    from scripts.preprocessing_pipeline import PreprocessingPipeline
+except ImportError:
+    # Notebooks import the scripts directly with the scripts/ directory on sys.path
+    from preprocessing_pipeline import PreprocessingPipeline
+
+# Files of the on-disk format: the three CSR arrays, the target and a JSON header
+ARRAY_FILES = ('data', 'indices', 'indptr', 'y')
+META_FILE = 'meta.json'
+FORMAT_VERSION = 1
+
+
+class FeatureMatrix:
+
+    def __init__(self, X: sparse.csr_matrix, y: np.ndarray, feature_names: list):
+        """
+        Initialize a training matrix: CSR features, target and feature names.
+
+        Args:
+            X (sparse.csr_matrix): Features, one row per policy. Dense arrays are converted.
+            y (np.ndarray): Target values, one per row.
+            feature_names (list): Name of every column of X.
+        """
+        X = sparse.csr_matrix(X)
+        y = np.asarray(y)
+        if X.shape[0] != len(y):
+            raise ValueError(f"X has {X.shape[0]} rows but y has {len(y)} values.")
+        if X.shape[1] != len(feature_names):
+            raise ValueError(f"X has {X.shape[1]} columns but {len(feature_names)} feature names were given.")
+        self.X = X
+        self.y = y
+        self.feature_names = list(feature_names)
+
+    @classmethod
+    def from_pipeline(cls, pipeline: PreprocessingPipeline, data: pd.DataFrame) -> 'FeatureMatrix':
+        """
+        Builds the matrix of a batch with a fitted pipeline.
+
+        Args:
+            pipeline (PreprocessingPipeline): A fitted pipeline, ideally with sparse=True so
+                the one-hot features are never materialized densely.
+            data (pd.DataFrame): Raw policy rows, including the target column.
+
+        Returns:
+            FeatureMatrix: The selected, scaled features and the target.
+        """
+        X = pipeline.transform(data)
+        if isinstance(X, pd.DataFrame):
+            X = X.to_numpy(dtype=np.float32)
+        return cls(X, data[pipeline.target].to_numpy(dtype=np.float64), pipeline.selected_features)
+
+    @property
+    def shape(self) -> tuple:
+        return self.X.shape
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Memory used by the CSR arrays and the target.
+        """
+        return self.X.data.nbytes + self.X.indices.nbytes + self.X.indptr.nbytes + self.y.nbytes
+
+    def take(self, rows) -> tuple:
+        """
+        Returns the features and target of a subset of rows, e.g. a cross-validation fold.
+
+        Args:
+            rows (array-like): Row positions.
+
+        Returns:
+            tuple: (X, y) of the selected rows.
+        """
+        rows = np.asarray(rows)
+        return self.X[rows], self.y[rows]
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Returns the features as a dense DataFrame with the target as the last column, like preprocessed_data.csv.
+        """
+        frame = pd.DataFrame(self.X.toarray(), columns=self.feature_names)
+        frame['target'] = self.y
+        return frame
+
+    def save(self, directory: str) -> None:
+        """
+        Writes the matrix as uncompressed .npy arrays plus a JSON header, so it can be memory-mapped.
+
+        Args:
+            directory (str): Directory to write to (created if needed).
+        """
+        os.makedirs(directory, exist_ok=True)
+        X = self.X
+        if not X.has_canonical_format:
+            X = X.copy()
+            X.sum_duplicates()
+        arrays = {'data': X.data, 'indices': X.indices, 'indptr': X.indptr, 'y': self.y}
+        for name, array in arrays.items():
+            np.save(os.path.join(directory, f'{name}.npy'), np.ascontiguousarray(array))
+
+        meta = {'version': FORMAT_VERSION, 'shape': list(X.shape), 'feature_names': self.feature_names}
+        tmp_path = os.path.join(directory, META_FILE + '.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        # The header is written last, so a directory with a header is complete
+        os.replace(tmp_path, os.path.join(directory, META_FILE))
+
+    @classmethod
+    def load(cls, directory: str, mmap: Optional[bool] = True) -> 'FeatureMatrix':
+        """
+        Loads a matrix written by save().
+
+        Args:
+            directory (str): Directory written by save().
+            mmap (bool): Memory-map the arrays (read-only) instead of reading them, so worker
+                processes share the operating system's page cache instead of holding copies.
+
+        Returns:
+            FeatureMatrix: The loaded matrix.
+        """
+        meta_path = os.path.join(directory, META_FILE)
+        if not os.path.exists(meta_path):
+            raise FileNotFoundError(f"No feature matrix found in {directory}.")
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if meta.get('version') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported feature matrix format version: {meta.get('version')}.")
+
+        mmap_mode = 'r' if mmap else None
+        arrays = {name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode=mmap_mode) for name in ARRAY_FILES}
+        X = sparse.csr_matrix((arrays['data'], arrays['indices'], arrays['indptr']), shape=tuple(meta['shape']))
+        return cls(X, arrays['y'], meta['feature_names'])
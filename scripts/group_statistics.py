@@ -0,0 +1,229 @@
+# scripts/group_statistics.py
+import numpy as np
+import pandas as pd
+from scipy import stats
+from typing import Optional
+
+# Columns of the sufficient statistics kept per group
+MOMENT_COLUMNS = ['count', 'sum', 'sumsq']
+
+
+class GroupMoments:
+
+    def __init__(self, moments: pd.DataFrame):
+        """
+        Initialize from per-group sufficient statistics.
+
+        Means, variances and every two-group z/t statistic can be derived from
+        the count, sum and sum of squares of each group, so the data only has to
+        be scanned once. Moments of different chunks or windows can be added and
+        subtracted.
+
+        Args:
+            moments (pd.DataFrame): Indexed by group with columns 'count', 'sum' and 'sumsq'.
+        """
+        self.moments = moments[MOMENT_COLUMNS]
+
+    @classmethod
+    def from_frame(cls, data: pd.DataFrame, feature: str, metric: str) -> 'GroupMoments':
+        """
+        Computes the per-group count, sum and sum of squares of a metric with a single groupby.
+
+        Args:
+            data (pd.DataFrame): The data to aggregate.
+            feature (str): The grouping column.
+            metric (str): The numerical column to summarise. Missing values are ignored.
+
+        Returns:
+            GroupMoments: The per-group moments.
+        """
+        values = data[metric].astype(np.float64)
+        filled = values.fillna(0.0)
+        parts = pd.DataFrame({
+            'count': values.notna().astype(np.int64),
+            'sum': filled,
+            'sumsq': filled * filled,
+        })
+        return cls(parts.groupby(data[feature], observed=True).sum())
+
+    def _combine(self, other: 'GroupMoments', sign: int) -> 'GroupMoments':
+        """
+        Adds (sign=1) or subtracts (sign=-1) the moments of another set of rows.
+        """
+        combined = self.moments.add(sign * other.moments, fill_value=0)
+        combined['count'] = combined['count'].round().astype(np.int64)
+        # Groups without rows left (e.g. after dropping a window) disappear
+        return GroupMoments(combined[combined['count'] > 0])
+
+    def __add__(self, other: 'GroupMoments') -> 'GroupMoments':
+        return self._combine(other, 1)
+
+    def __sub__(self, other: 'GroupMoments') -> 'GroupMoments':
+        return self._combine(other, -1)
+
+    @property
+    def groups(self) -> pd.Index:
+        return self.moments.index
+
+    def total(self) -> pd.Series:
+        """
+        Returns the moments of all groups pooled together.
+        """
+        return self.moments.sum()
+
+    def summary(self) -> pd.DataFrame:
+        """
+        Returns the count, mean and sample standard deviation (ddof=1) of every group.
+        """
+        count, mean, var = _mean_var(self.moments['count'], self.moments['sum'], self.moments['sumsq'])
+        return pd.DataFrame({'count': count, 'mean': mean, 'std': np.sqrt(var)}, index=self.groups)
+
+
+def _mean_var(count, total, sumsq):
+    """
+    Derives the mean and sample variance (ddof=1) from sufficient statistics.
+    """
+    count = np.asarray(count, dtype=np.float64)
+    total = np.asarray(total, dtype=np.float64)
+    sumsq = np.asarray(sumsq, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = total / count
+        # Rounding can push the centred sum of squares slightly below zero
+        var = np.maximum(sumsq - total * mean, 0.0) / (count - 1)
+    return count, mean, var
+
+
+def two_sample_statistics(n_a, sum_a, sumsq_a, n_b, sum_b, sumsq_b, test: str = 'z'):
+    """
+    Computes two-sample test statistics and p-values from sufficient statistics, vectorized over pairs.
+
+    Args:
+        n_a, sum_a, sumsq_a (array-like): Count, sum and sum of squares of the first groups.
+        n_b, sum_b, sumsq_b (array-like): Count, sum and sum of squares of the second groups.
+        test (str): 'z' (large-sample z-test), 't' (Student's t-test with pooled variance,
+            as scipy.stats.ttest_ind) or 'welch' (Welch's unequal-variance t-test).
+
+    Returns:
+        tuple: (statistic, p_value) arrays. Pairs with no variance or too few rows get NaN.
+    """
+    n_a, mean_a, var_a = _mean_var(n_a, sum_a, sumsq_a)
+    n_b, mean_b, var_b = _mean_var(n_b, sum_b, sumsq_b)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if test == 't':
+            dof = n_a + n_b - 2
+            pooled_var = ((n_a - 1) * var_a + (n_b - 1) * var_b) / dof
+            se = np.sqrt(pooled_var * (1 / n_a + 1 / n_b))
+        elif test in ('z', 'welch'):
+            se_a, se_b = var_a / n_a, var_b / n_b
+            se = np.sqrt(se_a + se_b)
+            dof = (se_a + se_b) ** 2 / (se_a ** 2 / (n_a - 1) + se_b ** 2 / (n_b - 1))
+        else:
+            raise ValueError(f"Unknown test: {test}. Expected 'z', 't' or 'welch'.")
+
+        statistic = (mean_a - mean_b) / se
+        statistic = np.where(np.isfinite(statistic), statistic, np.nan)
+
+    if test == 'z':
+        p_value = 2 * stats.norm.sf(np.abs(statistic))
+    else:
+        p_value = 2 * stats.t.sf(np.abs(statistic), dof)
+    return statistic, p_value
+
+
+def adjust_p_values(p_values, method: Optional[str] = 'holm') -> np.ndarray:
+    """
+    Adjusts p-values for multiple comparisons. Missing p-values are ignored and stay missing.
+
+    Args:
+        p_values (array-like): The raw p-values.
+        method (str): 'bonferroni', 'holm' (step-down family-wise error control),
+            'fdr_bh' (Benjamini-Hochberg false discovery rate) or None for no adjustment.
+
+    Returns:
+        np.ndarray: The adjusted p-values.
+    """
+    p_values = np.asarray(p_values, dtype=np.float64)
+    adjusted = np.full(p_values.shape, np.nan)
+    valid = ~np.isnan(p_values)
+    p = p_values[valid]
+    m = len(p)
+    if method is None or m == 0:
+        adjusted[valid] = p
+        return adjusted
+
+    if method == 'bonferroni':
+        adjusted[valid] = np.minimum(p * m, 1.0)
+        return adjusted
+
+    order = np.argsort(p, kind='stable')
+    ranked = p[order]
+    if method == 'holm':
+        stepped = np.maximum.accumulate((m - np.arange(m)) * ranked)
+    elif method == 'fdr_bh':
+        stepped = np.minimum.accumulate((ranked * m / np.arange(1, m + 1))[::-1])[::-1]
+    else:
+        raise ValueError(f"Unknown correction: {method}. Expected 'bonferroni', 'holm', 'fdr_bh' or None.")
+
+    result = np.empty(m)
+    result[order] = np.minimum(stepped, 1.0)
+    adjusted[valid] = result
+    return adjusted
+
+
+def compare_groups(moments: GroupMoments, mode: str = 'pairwise', test: str = 'z',
+                   correction: Optional[str] = 'holm', alpha: float = 0.05, min_count: int = 2) -> pd.DataFrame:
+    """
+    Tests every pair of groups, or every group against the rest, from precomputed moments.
+
+    Args:
+        moments (GroupMoments): Per-group sufficient statistics.
+        mode (str): 'pairwise' for all pairs of groups or 'one_vs_rest' for each group against all others.
+        test (str): 'z', 't' or 'welch'; see two_sample_statistics.
+        correction (str): Multiple-comparison correction; see adjust_p_values.
+        alpha (float): Significance level applied to the adjusted p-values.
+        min_count (int): Groups with fewer non-missing values are not tested. In 'one_vs_rest'
+            mode their rows still count towards the rest.
+
+    Returns:
+        pd.DataFrame: One row per comparison with group labels, counts, means, statistic,
+            p-value, adjusted p-value and whether the null hypothesis is rejected.
+    """
+    # Groups below min_count are not tested, but their rows stay in every other group's rest
+    overall = moments.total()
+    table = moments.moments[moments.moments['count'] >= min_count]
+    labels = table.index.to_numpy()
+    count, total, sumsq = (table[col].to_numpy(dtype=np.float64) for col in MOMENT_COLUMNS)
+
+    if mode == 'pairwise':
+        i, j = np.triu_indices(len(table), k=1)
+        group_a, group_b = labels[i], labels[j]
+        n_a, sum_a, sumsq_a = count[i], total[i], sumsq[i]
+        n_b, sum_b, sumsq_b = count[j], total[j], sumsq[j]
+    elif mode == 'one_vs_rest':
+        # The rest of the data is the moments of all groups minus the group's own
+        group_a, group_b = labels, np.full(len(labels), 'Rest', dtype=object)
+        n_a, sum_a, sumsq_a = count, total, sumsq
+        n_b = float(overall['count']) - count
+        sum_b = float(overall['sum']) - total
+        sumsq_b = float(overall['sumsq']) - sumsq
+    else:
+        raise ValueError(f"Unknown mode: {mode}. Expected 'pairwise' or 'one_vs_rest'.")
+
+    statistic, p_value = two_sample_statistics(n_a, sum_a, sumsq_a, n_b, sum_b, sumsq_b, test=test)
+    p_adjusted = adjust_p_values(p_value, correction)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_a, mean_b = sum_a / n_a, sum_b / n_b
+
+    return pd.DataFrame({
+        'group_a': group_a,
+        'group_b': group_b,
+        'n_a': n_a.astype(np.int64),
+        'n_b': n_b.astype(np.int64),
+        'mean_a': mean_a,
+        'mean_b': mean_b,
+        'statistic': statistic,
+        'p_value': p_value,
+        'p_adjusted': p_adjusted,
+        'reject': p_adjusted < alpha,
+    })
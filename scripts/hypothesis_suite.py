@@ -0,0 +1,238 @@
+# scripts/hypothesis_suite.py
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Optional, Union
+import numpy as np
+import pandas as pd
+
+try:
+    from scripts.hypothesis_testing import ABHypothesisTesting, RESAMPLING_TESTS
+except ImportError:
+    # Notebooks import the scripts directly with the scripts/ directory on sys.path
+    from hypothesis_testing import ABHypothesisTesting, RESAMPLING_TESTS
+
+# Tests comparing a metric between two groups of a feature
+TWO_GROUP_TESTS = ('t', 'welch', 'z', 'margin') + tuple(RESAMPLING_TESTS)
+
+# Tester shared by the specs evaluated in the current worker process, set once by _init_worker
+_worker_tester = None
+
+
+@dataclass
+class HypothesisSpec:
+    """
+    Declarative description of one hypothesis test.
+
+    Attributes:
+        feature (str): Column defining the groups (e.g. 'Province', 'Gender').
+        metric (str): Column being compared (e.g. 'TotalPremium').
+        test (str): 'chi2' for independence of feature and metric, or a two-group test:
+            't', 'welch', 'z', 'permutation', 'bootstrap' or 'margin' (z-test when both groups
+            have more than 30 rows, t-test otherwise, as ABHypothesisTesting.run_all_tests).
+        groups (tuple): The two feature values compared by two-group tests. 'margin' defaults to
+            the feature's first two values in order of appearance.
+        filters (dict): Segment filters applied first, column -> value or list of values to keep.
+        bins (int or str): For 'chi2', bin the metric (int quantile bins or 'indicator');
+            None cross-tabulates every distinct value.
+        name (str): Label of the test in the results. Defaults to a description of the spec.
+        alpha (float): Significance level.
+        options (dict): Extra options for resampling tests (n_resamples, random_state).
+    """
+    feature: str
+    metric: str
+    test: str
+    groups: Optional[tuple] = None
+    filters: dict = field(default_factory=dict)
+    bins: Optional[Union[int, str]] = None
+    name: Optional[str] = None
+    alpha: float = 0.05
+    options: dict = field(default_factory=dict)
+
+    def label(self) -> str:
+        if self.name is not None:
+            return self.name
+        groups = f" {self.groups[0]} vs {self.groups[1]}" if self.groups else ''
+        filters = ''.join(f" [{col}={value}]" for col, value in self.filters.items())
+        return f"{self.test}: {self.metric} by {self.feature}{groups}{filters}"
+
+
+@dataclass
+class HypothesisResult:
+    """
+    Structured outcome of one hypothesis test.
+    """
+    name: str
+    feature: str
+    metric: str
+    test: str
+    statistic: Optional[float]
+    p_value: Optional[float]
+    n: int
+    reject: Optional[bool]
+    runtime_s: float
+    n_a: Optional[int] = None
+    n_b: Optional[int] = None
+    error: Optional[str] = None
+
+
+def default_suite() -> list:
+    """
+    Return the specs of the tests run by ABHypothesisTesting.run_all_tests.
+    """
+    return [
+        HypothesisSpec('Province', 'TotalPremium', 'chi2', name='Risk Differences Across Provinces'),
+        HypothesisSpec('PostalCode', 'TotalPremium', 'chi2', name='Risk Differences Between Postal Codes'),
+        HypothesisSpec('PostalCode', 'TotalPremium', 'margin', name='Margin Differences Between Postal Codes'),
+        HypothesisSpec('Gender', 'TotalPremium', 't', groups=('Male', 'Female'),
+                       name='Risk Differences Between Women and Men'),
+    ]
+
+
+def _filter_positions(tester: ABHypothesisTesting, filters: dict) -> Optional[np.ndarray]:
+    """
+    Return the row positions matching every filter, or None when there is no filter.
+    """
+    positions = None
+    for column, values in filters.items():
+        values = values if isinstance(values, (list, tuple, set)) else [values]
+        index = tester._group_index(column)
+        matched = [index[value] for value in values if value in index]
+        column_positions = np.sort(np.concatenate(matched)) if matched else np.array([], dtype=np.intp)
+        positions = column_positions if positions is None else np.intersect1d(positions, column_positions, assume_unique=True)
+    return positions
+
+
+def _two_group_test(tester: ABHypothesisTesting, spec: HypothesisSpec, positions: Optional[np.ndarray]) -> tuple:
+    """
+    Run a two-group test with the tester's own test methods, returning (statistic, p_value, n_a, n_b).
+    """
+    groups = spec.groups
+    if groups is None and spec.test == 'margin':
+        groups = tuple(tester._first_values(spec.feature))
+    if not groups or len(groups) != 2:
+        raise ValueError(f"Test '{spec.test}' needs exactly two groups.")
+
+    column = tester.data[[spec.metric]]
+    samples = []
+    for value in groups:
+        group_positions = tester.segment_positions(spec.feature, value=value)
+        if positions is not None:
+            group_positions = np.intersect1d(group_positions, positions, assume_unique=True)
+        samples.append(column.iloc[group_positions])
+    a, b = samples
+    n_a, n_b = int(a[spec.metric].count()), int(b[spec.metric].count())
+    if n_a < 2 or n_b < 2:
+        raise ValueError("Each group needs at least two non-missing values.")
+
+    test = spec.test
+    if test == 'margin':
+        # The same choice as ABHypothesisTesting._margin_between_postalcodes
+        test = 'z' if len(a) > 30 and len(b) > 30 else 't'
+    if test == 'z':
+        statistic, p_value = tester._z_test(a, b, spec.metric)
+    elif test in ('t', 'welch'):
+        statistic, p_value = tester._t_test(a, b, spec.metric, equal_var=test == 't')
+    else:
+        statistic, p_value = tester._resampling_test(a, b, spec.metric, test, **spec.options)
+    return _to_float(statistic), _to_float(p_value), n_a, n_b
+
+
+def _to_float(value) -> Optional[float]:
+    """
+    Converts a test output to a float, keeping None for skipped tests.
+    """
+    return None if value is None else float(value)
+
+
+def evaluate_spec(tester: ABHypothesisTesting, spec: HypothesisSpec) -> HypothesisResult:
+    """
+    Run one spec against the tester's data. Errors are recorded on the result instead of raised.
+
+    Args:
+        tester (ABHypothesisTesting): Holds the (read-only) data and its cached group indexes.
+        spec (HypothesisSpec): The test to run.
+
+    Returns:
+        HypothesisResult: The structured result.
+    """
+    start = time.perf_counter()
+    statistic = p_value = n_a = n_b = error = None
+    n = 0
+    try:
+        positions = _filter_positions(tester, spec.filters)
+        n = len(tester.data) if positions is None else len(positions)
+
+        if spec.test == 'chi2':
+            segment_tester = tester
+            if positions is not None:
+                segment_tester = ABHypothesisTesting(tester.data[[spec.feature, spec.metric]].iloc[positions])
+            statistic, p_value = segment_tester._chi_squared_test(spec.feature, spec.metric, bins=spec.bins)
+            statistic, p_value = _to_float(statistic), _to_float(p_value)
+        elif spec.test in TWO_GROUP_TESTS:
+            statistic, p_value, n_a, n_b = _two_group_test(tester, spec, positions)
+            n = n_a + n_b
+        else:
+            raise ValueError(f"Unknown test: {spec.test}. Expected 'chi2' or one of {TWO_GROUP_TESTS}.")
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+
+    reject = None if p_value is None or np.isnan(p_value) else bool(p_value < spec.alpha)
+    return HypothesisResult(name=spec.label(), feature=spec.feature, metric=spec.metric, test=spec.test,
+                            statistic=statistic, p_value=p_value, n=n, reject=reject,
+                            runtime_s=time.perf_counter() - start, n_a=n_a, n_b=n_b, error=error)
+
+
+def _init_worker(data: pd.DataFrame) -> None:
+    """
+    Builds the tester of a worker process once, so the data is sent once per process.
+    """
+    global _worker_tester
+    _worker_tester = ABHypothesisTesting(data)
+
+
+def _evaluate_in_worker(spec: HypothesisSpec) -> HypothesisResult:
+    return evaluate_spec(_worker_tester, spec)
+
+
+def run_suite(data: Union[pd.DataFrame, ABHypothesisTesting], specs: list, executor: Optional[str] = 'thread',
+              max_workers: Optional[int] = None) -> list:
+    """
+    Run a list of hypothesis test specs, concurrently, over the same read-only data.
+
+    Args:
+        data (pd.DataFrame or ABHypothesisTesting): The data, or a tester whose cached group indexes are reused.
+        specs (list): HypothesisSpec objects.
+        executor (str): 'thread' (shared data and group indexes), 'process' (data sent once per worker)
+            or None to run sequentially.
+        max_workers (int): Number of workers. Defaults to the number of CPUs.
+
+    Returns:
+        list: HypothesisResult objects, in the order of `specs`.
+    """
+    tester = data if isinstance(data, ABHypothesisTesting) else ABHypothesisTesting(data)
+    max_workers = max_workers or os.cpu_count() or 1
+
+    if executor is None or max_workers == 1 or len(specs) <= 1:
+        return [evaluate_spec(tester, spec) for spec in specs]
+
+    if executor == 'thread':
+        # Build the group indexes up front so threads only read shared state
+        for feature in {spec.feature for spec in specs} | {col for spec in specs for col in spec.filters}:
+            tester._group_index(feature)
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            return list(pool.map(lambda spec: evaluate_spec(tester, spec), specs))
+
+    if executor == 'process':
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(tester.data,)) as pool:
+            return list(pool.map(_evaluate_in_worker, specs))
+
+    raise ValueError(f"Unknown executor: {executor}. Expected 'thread', 'process' or None.")
+
+
+def results_to_frame(results: list) -> pd.DataFrame:
+    """
+    Convert HypothesisResult objects to a DataFrame, one row per test.
+    """
+    return pd.DataFrame([asdict(result) for result in results])
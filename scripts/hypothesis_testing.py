@@ -2,53 +2,169 @@ import pandas as pd
 import numpy as np
 from scipy import stats
 
+try:
+    from scripts.contingency import ContingencyBuilder
+    from scripts.execution_backend import PartitionedBackend, is_partitioned
+    from scripts.group_statistics import GroupMoments, compare_groups
+    from scripts.instrumentation import instrument
+    from scripts.resampling import bootstrap_test, permutation_test
+    from scripts.windowed_testing import WindowedGroupTester
+except ImportError:
+    # Notebooks import the scripts directly with the scripts/ directory on sys.path
+    from contingency import ContingencyBuilder
+    from execution_backend import PartitionedBackend, is_partitioned
+    from group_statistics import GroupMoments, compare_groups
+    from instrumentation import instrument
+    from resampling import bootstrap_test, permutation_test
+    from windowed_testing import WindowedGroupTester
+
+# Resampling tests available to run_all_tests, keyed by name
+RESAMPLING_TESTS = {
+    'permutation': permutation_test,
+    'bootstrap': bootstrap_test,
+}
+
+def _two_group_rows(args, result):
+    """
+    Rows compared by a two-group test called as test(self, group_a, group_b, ...).
+    """
+    return len(args[1]) + len(args[2])
+
 class ABHypothesisTesting:
-    def __init__(self, data):
+    def __init__(self, data, metric_bins=None, max_workers=None):
         """
         Initialize the class with the dataset.
+
+        Args:
+            data (pd.DataFrame or PartitionedDataset): The dataset to test. On a partitioned dataset
+                the contingency counts, group moments and segments are computed partition by
+                partition on a process pool and merged; quantile bin edges are then approximate.
+            metric_bins (int or str): How the chi-squared risk tests treat the continuous metric.
+                None cross-tabulates every distinct value (the original behaviour), an int uses that
+                many quantile bins and 'indicator' splits the metric into <= 0 and > 0.
+            max_workers (int): Worker processes for a partitioned dataset. Defaults to the number of CPUs.
         """
+        self.max_workers = max_workers
         self.data = data
+        self.metric_bins = metric_bins
+
+    @property
+    def data(self):
+        return self._data
 
-    def _segment_data(self, feature, value=None, exclude_values=None):
+    @data.setter
+    def data(self, data):
+        # Cached group indexes and checks only hold for the data they were built on
+        self._data = data
+        self._group_indexes = {}
+        self._identical_values = {}
+        self.backend = PartitionedBackend(data, self.max_workers) if is_partitioned(data) else None
+
+    def _group_index(self, feature):
         """
-        Segment the data based on a feature. Optionally filter by value or exclude certain values.
+        Return the row positions of every value of a feature, built once per feature and cached.
         """
-        if exclude_values is not None:
-            data_segment = self.data[~self.data[feature].isin(exclude_values)]
-        else:
-            data_segment = self.data.copy()
+        if feature not in self._group_indexes:
+            self._group_indexes[feature] = self.data.groupby(feature, observed=True, sort=False).indices
+        return self._group_indexes[feature]
+
+    def segment_positions(self, feature, value=None, exclude_values=None):
+        """
+        Return the sorted row positions of a segment, or None when the segment is the whole dataset.
+
+        Args:
+            feature (str): The column to segment on.
+            value: Keep only rows with this value.
+            exclude_values (list): Drop rows with any of these values (missing values are kept).
+
+        Returns:
+            np.ndarray or None: Row positions into `self.data`.
+        """
+        if self.backend is not None:
+            if value is None and exclude_values is None:
+                return None
+            return self.backend.filter_rows(feature, value, exclude_values, columns=[]).index.to_numpy()
+
+        index = self._group_index(feature)
+        empty = np.array([], dtype=np.intp)
 
         if value is not None:
-            data_segment = data_segment[data_segment[feature] == value]
-        
-        return data_segment
+            if exclude_values is not None and value in exclude_values:
+                return empty
+            return index.get(value, empty)
+
+        if exclude_values is not None:
+            excluded = [index[v] for v in exclude_values if v in index]
+            if excluded:
+                return np.setdiff1d(np.arange(len(self.data)), np.concatenate(excluded), assume_unique=True)
+        return None
+
+    def _segment_data(self, feature, value=None, exclude_values=None, columns=None):
+        """
+        Segment the data based on a feature. Optionally filter by value or exclude certain values.
+
+        Rows are taken by position from a cached group index instead of masking (and copying)
+        the full frame. Without a filter the shared data itself is returned, so segments must
+        be treated as read-only. `columns` limits the segment to the columns a test needs.
+        On a partitioned dataset the segment is collected from the partitions instead.
+        """
+        if self.backend is not None:
+            return self.backend.filter_rows(feature, value, exclude_values, columns)
+
+        positions = self.segment_positions(feature, value=value, exclude_values=exclude_values)
+        data = self.data if columns is None else self.data[columns]
+        if positions is None:
+            return data
+        return data.iloc[positions]
 
     def _check_identical_values(self, metric):
         """
         Check if all values for a metric are identical.
         """
-        unique_values = self.data[metric].dropna().unique()
-        return len(unique_values) == 1
+        if metric not in self._identical_values and self.backend is not None:
+            sketch = self.backend.sketches([metric])[metric]
+            self._identical_values[metric] = sketch.count > 0 and sketch.min == sketch.max
+        if metric not in self._identical_values:
+            unique_values = self.data[metric].dropna().unique()
+            self._identical_values[metric] = len(unique_values) == 1
+        return self._identical_values[metric]
 
-    def _chi_squared_test(self, feature, metric):
+    @instrument
+    def _chi_squared_test(self, feature, metric, bins=None):
         """
         Perform chi-squared test for categorical data.
+
+        With `bins` (an int for quantile bins, or 'indicator') the metric is binned into a
+        compact table built with integer codes instead of one column per distinct value.
         """
-        contingency_table = pd.crosstab(self.data[feature], self.data[metric])
+        if bins is not None:
+            if self.backend is not None:
+                return self.backend.contingency(feature, metric, bins=bins).chi2()
+            return ContingencyBuilder(feature, metric, bins=bins).update(self.data).chi2()
+
+        if self.backend is not None:
+            contingency_table = self.backend.crosstab(feature, metric)
+        else:
+            contingency_table = pd.crosstab(self.data[feature], self.data[metric])
         chi2, p_value, _, _ = stats.chi2_contingency(contingency_table)
         return chi2, p_value
 
-    def _t_test(self, group_a, group_b, metric):
+    @instrument(rows=_two_group_rows)
+    def _t_test(self, group_a, group_b, metric, equal_var=True):
         """
         Perform a t-test between two groups on a given metric.
+
+        With `equal_var=False` Welch's unequal-variance t-test is used instead.
         """
         if self._check_identical_values(metric):
             print(f"Warning: All values for {metric} are identical. Skipping t-test.")
             return None, None
 
-        t_stat, p_value = stats.ttest_ind(group_a[metric].dropna(), group_b[metric].dropna(), nan_policy='omit')
+        t_stat, p_value = stats.ttest_ind(group_a[metric].dropna(), group_b[metric].dropna(), equal_var=equal_var,
+                                          nan_policy='omit')
         return t_stat, p_value
 
+    @instrument(rows=_two_group_rows)
     def _z_test(self, group_a, group_b, metric):
         """
         Perform a z-test between two groups if sample size is large (>30).
@@ -61,6 +177,24 @@ class ABHypothesisTesting:
         p_value = 2 * (1 - stats.norm.cdf(abs(z_stat)))
         return z_stat, p_value
 
+    @instrument(rows=_two_group_rows)
+    def _resampling_test(self, group_a, group_b, metric, method, n_resamples=10000, random_state=None, n_jobs=1,
+                         **options):
+        """
+        Perform a permutation or bootstrap test for a difference in means between two groups.
+
+        Extra `options` (e.g. statistic) are passed to the resampling function.
+        """
+        if method not in RESAMPLING_TESTS:
+            raise ValueError(f"Unknown resampling method: {method}. Expected one of {sorted(RESAMPLING_TESTS)}.")
+        if self._check_identical_values(metric):
+            print(f"Warning: All values for {metric} are identical. Skipping {method} test.")
+            return None, None
+
+        result = RESAMPLING_TESTS[method](group_a[metric], group_b[metric], n_resamples=n_resamples,
+                                          random_state=random_state, n_jobs=n_jobs, **options)
+        return result.statistic, result.p_value
+
     def _interpret_p_value(self, p_value, alpha=0.05):
         """
         Interpret the null hypothesis based on the p-value.
@@ -69,31 +203,60 @@ class ABHypothesisTesting:
             return "Test skipped due to identical values."
         return "Reject the null hypothesis." if p_value < alpha else "Fail to reject the null hypothesis."
 
+    @instrument
     def _risk_across_provinces(self):
         """
         Test for risk differences across provinces using Chi-Squared test on TotalPremium.
         """
-        chi2, p_value = self._chi_squared_test('Province', 'TotalPremium')
+        chi2, p_value = self._chi_squared_test('Province', 'TotalPremium', bins=self.metric_bins)
         return f"Chi-squared test on Province and TotalPremium: chi2 = {chi2}, p-value = {p_value}\n" + self._interpret_p_value(p_value)
 
+    @instrument
     def _risk_between_postalcodes(self):
         """
         Test for risk differences between postal codes using Chi-Squared test.
         """
-        chi2, p_value = self._chi_squared_test('PostalCode', 'TotalPremium')
+        chi2, p_value = self._chi_squared_test('PostalCode', 'TotalPremium', bins=self.metric_bins)
         return f"Chi-squared test on PostalCode and TotalPremium: chi2 = {chi2}, p-value = {p_value}\n" + self._interpret_p_value(p_value)
 
+    def _first_values(self, feature, n=2):
+        """
+        Return the first `n` values of a feature in order of appearance.
+        """
+        if self.backend is not None:
+            # Already in order of appearance
+            return list(self.backend.first_rows(feature).index[:n])
+        index = self._group_index(feature)
+        return sorted(index, key=lambda value: index[value][0])[:n]
+
+    def _postalcode_groups(self):
+        """
+        Select the two postal code groups compared by the margin tests, or None if there are fewer than two.
+        """
+        postal_codes = self._first_values('PostalCode')
+        if len(postal_codes) < 2:
+            return None
+
+        return tuple(self._segment_data('PostalCode', value=code, columns=['TotalPremium']) for code in postal_codes)
+
+    def _gender_groups(self):
+        """
+        Select the Male and Female groups compared by the gender tests.
+        """
+        group_a = self._segment_data('Gender', value='Male', columns=['TotalPremium'])
+        group_b = self._segment_data('Gender', value='Female', columns=['TotalPremium'])
+        return group_a, group_b
+
+    @instrument
     def _margin_between_postalcodes(self):
         """
         Test for margin differences between postal codes using t-test or z-test on TotalPremium.
         """
-        postal_codes = self.data['PostalCode'].unique()
-        if len(postal_codes) < 2:
+        groups = self._postalcode_groups()
+        if groups is None:
             return "Not enough unique postal codes for testing."
 
-        group_a = self._segment_data('PostalCode', value=postal_codes[0])
-        group_b = self._segment_data('PostalCode', value=postal_codes[1])
-        
+        group_a, group_b = groups
         if len(group_a) > 30 and len(group_b) > 30:
             z_stat, p_value = self._z_test(group_a, group_b, 'TotalPremium')
             return f"Z-test on TotalPremium: Z-statistic = {z_stat}, p-value = {p_value}\n" + self._interpret_p_value(p_value)
@@ -101,14 +264,67 @@ class ABHypothesisTesting:
             t_stat, p_value = self._t_test(group_a, group_b, 'TotalPremium')
             return f"T-test on TotalPremium: T-statistic = {t_stat}, p-value = {p_value}\n" + self._interpret_p_value(p_value)
 
+    @instrument
+    def pairwise_margin_tests(self, feature='PostalCode', metric='TotalPremium', mode='pairwise', test='z',
+                              correction='holm', alpha=0.05, min_count=2):
+        """
+        Test margin differences between every pair of groups (or each group against the rest).
+
+        Per-group count, sum and sum of squares are computed once with a single groupby;
+        all z/t statistics are then derived from them in vectorized form and the
+        p-values are corrected for multiple comparisons.
+
+        Args:
+            feature (str): Grouping column, e.g. 'PostalCode' or 'Province'.
+            metric (str): Numerical column to compare, e.g. 'TotalPremium'.
+            mode (str): 'pairwise' or 'one_vs_rest'.
+            test (str): 'z', 't' or 'welch'.
+            correction (str): 'holm', 'bonferroni', 'fdr_bh' or None.
+            alpha (float): Significance level applied to the adjusted p-values.
+            min_count (int): Groups with fewer non-missing values are left out.
+
+        Returns:
+            pd.DataFrame: One row per comparison; see group_statistics.compare_groups.
+        """
+        if self.backend is not None:
+            moments = self.backend.group_moments(feature, metric)
+        else:
+            moments = GroupMoments.from_frame(self.data, feature, metric)
+        return compare_groups(moments, mode=mode, test=test, correction=correction, alpha=alpha, min_count=min_count)
+
+    @instrument
+    def rolling_margin_tests(self, feature='Province', metric='TotalPremium', window=3, mode='pairwise', test='z',
+                             correction='holm', alpha=0.05, min_count=2, time_column='TransactionMonth'):
+        """
+        Test group differences within rolling windows of TransactionMonth, to monitor drift over time.
+
+        Per-month group moments are computed once; each window adds the new month and
+        subtracts the oldest instead of rescanning the history.
+
+        Args:
+            feature (str): Grouping column, e.g. 'Province', 'Gender' or 'PostalCode'.
+            metric (str): Numerical column to compare, e.g. 'TotalPremium'.
+            window (int): Number of months per window.
+            mode, test, correction, alpha, min_count: See pairwise_margin_tests.
+            time_column (str): Date column, truncated to monthly periods.
+
+        Returns:
+            pd.DataFrame: One row per window and comparison, with the window's first and last month.
+        """
+        tester = WindowedGroupTester(feature, metric, window=window, mode=mode, test=test, correction=correction,
+                                     alpha=alpha, min_count=min_count, time_column=time_column)
+        if self.backend is not None:
+            for month, moments in self.backend.monthly_moments(feature, metric, time_column):
+                tester.add_month(month, moments)
+            return tester.results()
+        return tester.update(self.data)
+
+    @instrument
     def _risk_between_genders(self):
         """
         Test for risk differences between Men and Women using t-test on TotalPremium.
         """
-        self.data = self._segment_data('Gender', exclude_values=['Not Specified'])
-
-        group_a = self._segment_data('Gender', value='Male')
-        group_b = self._segment_data('Gender', value='Female')
+        group_a, group_b = self._gender_groups()
 
         if group_a.empty or group_b.empty:
             return "One of the gender groups is empty. Test cannot be performed."
@@ -116,9 +332,40 @@ class ABHypothesisTesting:
         t_stat, p_value = self._t_test(group_a, group_b, 'TotalPremium')
         return f"T-test on TotalPremium: T-statistic = {t_stat}, p-value = {p_value}\n" + self._interpret_p_value(p_value)
 
-    def run_all_tests(self):
+    @instrument
+    def _resampling_comparisons(self, method, n_resamples=10000, random_state=None, n_jobs=1):
+        """
+        Repeat the two-group comparisons on TotalPremium with a permutation or bootstrap test.
+        """
+        comparisons = {
+            'Margin Differences Between Postal Codes': self._postalcode_groups(),
+            'Risk Differences Between Women and Men': self._gender_groups(),
+        }
+
+        results = {}
+        for name, groups in comparisons.items():
+            key = f"{name} ({method.capitalize()})"
+            if groups is None or groups[0].empty or groups[1].empty:
+                results[key] = "Not enough data in the compared groups. Test cannot be performed."
+                continue
+
+            diff, p_value = self._resampling_test(groups[0], groups[1], 'TotalPremium', method,
+                                                  n_resamples=n_resamples, random_state=random_state, n_jobs=n_jobs)
+            results[key] = (f"{method.capitalize()} test on TotalPremium ({n_resamples} resamples): "
+                            f"mean difference = {diff}, p-value = {p_value}\n" + self._interpret_p_value(p_value))
+        return results
+
+    @instrument
+    def run_all_tests(self, resampling=None, n_resamples=10000, random_state=None, n_jobs=1):
         """
         Run all hypothesis tests and return the results.
+
+        Args:
+            resampling (str): Optionally also run the two-group comparisons as a 'permutation'
+                or 'bootstrap' test, which suits heavy-tailed premiums better than closed-form tests.
+            n_resamples (int): Number of permutations or bootstrap resamples.
+            random_state (int): Seed for reproducible resampling results.
+            n_jobs (int): Number of worker processes for resampling; -1 uses all CPUs.
         """
         results = {
             'Risk Differences Across Provinces': self._risk_across_provinces(),
@@ -126,4 +373,7 @@ class ABHypothesisTesting:
             'Margin Differences Between Postal Codes': self._margin_between_postalcodes(),
             'Risk Differences Between Women and Men': self._risk_between_genders(),
         }
+        if resampling is not None:
+            results.update(self._resampling_comparisons(resampling, n_resamples=n_resamples,
+                                                        random_state=random_state, n_jobs=n_jobs))
         return results
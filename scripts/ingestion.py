@@ -0,0 +1,249 @@
+# scripts/ingestion.py
+import glob
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Optional, Union
+import pandas as pd
+
+try:
+    from scripts.dtype_optimization import DtypeSchema
+    from scripts.instrumentation import instrument
+    from scripts.load_data import DEFAULT_CHUNKSIZE, _cached_file_digest, load_data, open_zip_member, write_columnar
+except ImportError:
+    # Notebooks import the scripts directly with the scripts/ directory on sys.path
+    from dtype_optimization import DtypeSchema
+    from instrumentation import instrument
+    from load_data import DEFAULT_CHUNKSIZE, _cached_file_digest, load_data, open_zip_member, write_columnar
+
+# Directory of the month-partitioned Parquet store
+DEFAULT_STORE_DIR = "../data/store/"
+
+# Record of the archives and months already in a store
+MANIFEST_NAME = 'manifest.json'
+
+# Parts are written here by the workers and moved into the store once their archive is committed
+STAGING_DIR = '_staging'
+
+# Column whose month partitions the store
+DEFAULT_TIME_COLUMN = 'TransactionMonth'
+
+
+class SchemaError(ValueError):
+    pass
+
+
+def resolve_archives(sources: Union[str, Iterable[str]]) -> list:
+    """
+    Expands archive paths and glob patterns into a sorted list of distinct archives.
+
+    Args:
+        sources (str or Iterable[str]): A path or glob pattern (e.g. 'drops/2015-*.zip'), or several.
+
+    Returns:
+        list: Absolute archive paths, in name order.
+    """
+    if isinstance(sources, str):
+        sources = [sources]
+    archives = set()
+    for source in sources:
+        matches = glob.glob(source)
+        if not matches and not glob.has_magic(source):
+            raise FileNotFoundError(f"Archive not found: {source}")
+        archives.update(os.path.abspath(match) for match in matches)
+    return sorted(archives)
+
+
+def read_manifest(store_dir: str) -> dict:
+    """
+    Loads a store's manifest, or an empty one for a new store.
+
+    Returns:
+        dict: 'columns' of the stored rows, 'archives' by content hash and the 'months' in the store,
+            each with the hash of the archive it came from.
+    """
+    try:
+        with open(os.path.join(store_dir, MANIFEST_NAME)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'columns': None, 'archives': {}, 'months': {}}
+
+
+def _write_manifest(store_dir: str, manifest: dict) -> None:
+    path = os.path.join(store_dir, MANIFEST_NAME)
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def _header(archive: str, filename: str) -> list:
+    """
+    Reads the column names of an archive's policy file without parsing any rows.
+    """
+    with open_zip_member(archive, filename) as member:
+        return member.readline().decode().rstrip('\r\n').split('|')
+
+
+def validate_chunk(chunk: pd.DataFrame, columns: list, time_column: str = DEFAULT_TIME_COLUMN) -> pd.DataFrame:
+    """
+    Checks that a parsed chunk matches the store's schema.
+
+    Args:
+        chunk (pd.DataFrame): Parsed rows of one archive.
+        columns (list): The store's columns.
+        time_column (str): Column holding the transaction date of every row.
+
+    Returns:
+        pd.DataFrame: The chunk with its columns in the store's order.
+
+    Raises:
+        SchemaError: If columns are missing or unexpected, or rows have no valid date.
+    """
+    missing = [col for col in columns if col not in chunk.columns]
+    unexpected = [col for col in chunk.columns if col not in columns]
+    if missing or unexpected:
+        raise SchemaError(f"Columns differ from the store: missing {missing}, unexpected {unexpected}")
+
+    dates = pd.to_datetime(chunk[time_column], errors='coerce')
+    invalid = int(dates.isna().sum())
+    if invalid:
+        raise SchemaError(f"{invalid} rows have no valid {time_column}")
+    return chunk[columns]
+
+
+def _ingest_archive(task: tuple) -> dict:
+    """
+    Streams one archive into per-month Parquet parts in its staging directory.
+
+    Only one chunk of the archive is in memory at a time. Errors are returned rather
+    than raised, so one bad archive does not stop the others.
+    """
+    archive, filename, digest, staging_dir, columns, time_column, chunksize, read_options = task
+    months, rows = {}, 0
+    try:
+        # Parts left by an interrupted run (possibly with another chunksize) would be committed too
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        os.makedirs(staging_dir)
+        for index, chunk in enumerate(load_data(archive, filename, chunksize=chunksize, **read_options)):
+            chunk = validate_chunk(chunk, columns, time_column)
+            periods = pd.to_datetime(chunk[time_column]).dt.to_period('M').astype(str)
+            for month, part in chunk.groupby(periods.to_numpy(), sort=True):
+                month_dir = os.path.join(staging_dir, f'month={month}')
+                os.makedirs(month_dir, exist_ok=True)
+                write_columnar(part.reset_index(drop=True),
+                               os.path.join(month_dir, f'part-{digest[:16]}-{index:05d}.parquet'))
+                months[month] = months.get(month, 0) + len(part)
+            rows += len(chunk)
+    except Exception as e:
+        return {'rows': rows, 'months': months, 'error': f'{type(e).__name__}: {e}'}
+    return {'rows': rows, 'months': months, 'error': None}
+
+
+def _commit(store_dir: str, manifest: dict, task: tuple, result: dict, record: dict) -> None:
+    """
+    Moves an archive's new months from staging into the store and records the archive in the manifest.
+    """
+    archive, _, digest, staging_dir = task[:4]
+    record['rows'] = result['rows']
+    if result['error'] is not None:
+        record.update(status='failed', error=result['error'])
+        return
+
+    for month in sorted(result['months']):
+        if month in manifest['months']:
+            record['months_skipped'].append(month)
+            continue
+        month_dir = os.path.join(store_dir, f'month={month}')
+        # The manifest is the source of truth: parts of a month it does not list are left over
+        # from an interrupted commit
+        shutil.rmtree(month_dir, ignore_errors=True)
+        os.makedirs(month_dir)
+        staged = os.path.join(staging_dir, f'month={month}')
+        for name in sorted(os.listdir(staged)):
+            os.replace(os.path.join(staged, name), os.path.join(month_dir, name))
+        manifest['months'][month] = digest
+        record['months_added'].append(month)
+
+    manifest['archives'][digest] = {'path': archive, 'rows': result['rows'], 'months': record['months_added'],
+                                    'ingested_at': time.strftime('%Y-%m-%dT%H:%M:%S')}
+    _write_manifest(store_dir, manifest)
+    record['status'] = 'ingested'
+
+
+@instrument
+def ingest_archives(sources: Union[str, Iterable[str]], filename: str, store_dir: str = DEFAULT_STORE_DIR,
+                    max_workers: Optional[int] = None, chunksize: int = DEFAULT_CHUNKSIZE,
+                    dtype: Optional[dict] = None, schema: Optional[DtypeSchema] = None,
+                    time_column: str = DEFAULT_TIME_COLUMN, columns: Optional[list] = None) -> pd.DataFrame:
+    """
+    Ingests monthly data drops into a month-partitioned Parquet store, skipping what is already there.
+
+    Archives already ingested are recognised by their content hash (reused while the
+    file's size and modification time are unchanged) and are not opened again. New
+    archives are decompressed and parsed concurrently, each streamed chunk by chunk, so
+    memory stays around max_workers chunks. Every chunk is validated against the store's
+    columns. Archives are then committed one by one in name order: only months not
+    already in the store are added, and the manifest is updated atomically after each
+    archive, so an interrupted run can simply be repeated.
+
+    The store is read back with execution_backend.PartitionedDataset(store_dir).
+
+    Args:
+        sources (str or Iterable[str]): Archive paths or glob patterns.
+        filename (str): The name of the TXT file inside each (nested) archive.
+        store_dir (str): Directory of the store, with one 'month=YYYY-MM' subdirectory per month.
+        max_workers (int): Archives parsed at the same time. Defaults to the number of CPUs;
+            1 parses them in the current process.
+        chunksize (int): Rows per parsed chunk and at most per stored part.
+        dtype (dict): Per-column dtypes. Defaults to POLICY_DTYPES.
+        schema (DtypeSchema): A dtype_optimization schema applied while parsing, instead of `dtype`.
+            Its float columns are stored as float64, so every part of a month has the same dtypes.
+        time_column (str): Date column whose month partitions the store.
+        columns (list): Columns of a new store. Defaults to the header of the first new archive;
+            an existing store keeps the columns in its manifest.
+
+    Returns:
+        pd.DataFrame: One row per archive with its content hash, status ('ingested', 'skipped'
+            or 'failed'), rows parsed, months added, months skipped as already stored and any error.
+    """
+    os.makedirs(store_dir, exist_ok=True)
+    manifest = read_manifest(store_dir)
+    if manifest['columns'] is None and columns is not None:
+        manifest['columns'] = list(columns)
+    read_options = schema.read_options() if schema is not None else {'dtype': dtype}
+
+    records, tasks = {}, []
+    for archive in resolve_archives(sources):
+        digest = _cached_file_digest(archive, store_dir)
+        record = records[archive] = {'archive': archive, 'digest': digest, 'status': 'skipped', 'rows': 0,
+                                     'months_added': [], 'months_skipped': [], 'error': None}
+        # The same content under two names is ingested once
+        if digest in manifest['archives'] or any(task[2] == digest for task in tasks):
+            continue
+        if manifest['columns'] is None:
+            try:
+                manifest['columns'] = _header(archive, filename)
+            except Exception as e:
+                record.update(status='failed', error=f'{type(e).__name__}: {e}')
+                continue
+        staging_dir = os.path.join(store_dir, STAGING_DIR, digest[:16])
+        tasks.append((archive, filename, digest, staging_dir, manifest['columns'], time_column, chunksize,
+                      read_options))
+
+    n_workers = min(max_workers or os.cpu_count() or 1, len(tasks))
+    executor = ProcessPoolExecutor(max_workers=n_workers) if n_workers > 1 else None
+    try:
+        results = executor.map(_ingest_archive, tasks) if executor is not None else map(_ingest_archive, tasks)
+        # Results arrive in archive order while later archives are still being parsed
+        for task, result in zip(tasks, results):
+            _commit(store_dir, manifest, task, result, records[task[0]])
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+        shutil.rmtree(os.path.join(store_dir, STAGING_DIR), ignore_errors=True)
+
+    return pd.DataFrame(list(records.values()), columns=['archive', 'digest', 'status', 'rows', 'months_added',
+                                                         'months_skipped', 'error'])
@@ -0,0 +1,370 @@
+# scripts/instrumentation.py
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from types import GeneratorType
+from typing import Callable, Iterator, Optional
+import numpy as np
+import pandas as pd
+
+# Setting this variable to a file path turns instrumentation on at import, logging to that file
+# (JSON lines); 1/true/yes/on keep the records in memory only
+ENVIRONMENT_VARIABLE = 'INSURANCE_INSTRUMENTATION'
+
+# Values of the variable that leave instrumentation off, and that enable it without a log file
+DISABLED_VALUES = ('', '0', 'false', 'no', 'off')
+IN_MEMORY_VALUES = ('1', 'true', 'yes', 'on')
+
+# Maximum number of records kept by the in-memory registry
+DEFAULT_MAX_RECORDS = 100_000
+
+
+@dataclass
+class CallRecord:
+    name: str
+    wall_time_s: float
+    cpu_time_s: float
+    memory_peak_mb: Optional[float]
+    rows: Optional[int]
+    depth: int
+    parent: Optional[str]
+    thread: str
+    started_at: float
+    error: Optional[str] = None
+
+
+class JsonLinesSink:
+
+    def __init__(self, path: str):
+        """
+        Initialize a sink appending every record to a file as one JSON object per line.
+
+        Args:
+            path (str): The log file. Lines are appended, so several runs can share a file.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+
+    def write(self, record: CallRecord) -> None:
+        line = json.dumps(asdict(record)) + '\n'
+        with self._lock, open(self.path, 'a') as f:
+            f.write(line)
+
+
+class Registry:
+
+    def __init__(self, max_records: int = DEFAULT_MAX_RECORDS):
+        """
+        Initialize an in-memory registry of call records, optionally forwarding them to sinks.
+
+        Args:
+            max_records (int): Records kept in memory; the oldest are dropped first.
+        """
+        self.records = deque(maxlen=max_records)
+        self.sinks = []
+        self._lock = threading.Lock()
+
+    def add(self, record: CallRecord) -> None:
+        with self._lock:
+            self.records.append(record)
+        for sink in self.sinks:
+            sink.write(record)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.records.clear()
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Returns every record as a row, in completion order.
+        """
+        with self._lock:
+            records = [asdict(record) for record in self.records]
+        return pd.DataFrame(records, columns=list(CallRecord.__dataclass_fields__))
+
+    def summary(self) -> pd.DataFrame:
+        """
+        Aggregates the records per instrumented function.
+
+        Returns:
+            pd.DataFrame: Calls, total and mean wall time, total CPU time, largest memory peak,
+                rows and rows per second per name, slowest first.
+        """
+        records = self.to_frame()
+        grouped = records.groupby('name', sort=False)
+        table = pd.DataFrame({
+            'calls': grouped.size(),
+            'wall_time_s': grouped['wall_time_s'].sum(),
+            'mean_wall_time_s': grouped['wall_time_s'].mean(),
+            'cpu_time_s': grouped['cpu_time_s'].sum(),
+            'memory_peak_mb': grouped['memory_peak_mb'].max(),
+            'rows': grouped['rows'].sum(min_count=1),
+        })
+        with np.errstate(divide='ignore', invalid='ignore'):
+            table['rows_per_s'] = table['rows'] / table['wall_time_s']
+        return table.sort_values('wall_time_s', ascending=False)
+
+
+class _State(threading.local):
+    # Per-thread stack of the instrumented calls in progress
+    def __init__(self):
+        self.stack = []
+
+
+registry = Registry()
+_enabled = False
+_track_memory = True
+# Whether enable() started tracemalloc, so disable() only stops tracing it owns
+_started_tracing = False
+_local = _State()
+_profile_requests = {}
+_profile_lock = threading.Lock()
+# Text reports of profiled calls, by instrumented name
+last_profiles = {}
+
+
+def enable(path: Optional[str] = None, memory: bool = True) -> Registry:
+    """
+    Turns instrumentation on for every function decorated with @instrument.
+
+    Args:
+        path (str): Also append the records to this JSON lines file.
+        memory (bool): Track the peak Python heap growth of each call with tracemalloc. This
+            slows allocation-heavy code; memory allocated outside the Python allocators
+            (e.g. pyarrow buffers) is not seen.
+
+    Returns:
+        Registry: The registry collecting the records.
+    """
+    global _enabled, _track_memory, _started_tracing
+    if path is not None and not any(getattr(sink, 'path', None) == path for sink in registry.sinks):
+        registry.sinks.append(JsonLinesSink(path))
+    _track_memory = memory
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _started_tracing = True
+    _enabled = True
+    return registry
+
+
+def disable() -> None:
+    """
+    Turns instrumentation off and detaches the sinks. Records already collected are kept.
+    """
+    global _enabled, _started_tracing
+    _enabled = False
+    registry.sinks.clear()
+    if _started_tracing and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _started_tracing = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+@contextmanager
+def instrumented(path: Optional[str] = None, memory: bool = True) -> Iterator[Registry]:
+    """
+    Enables instrumentation for the duration of a with block.
+
+    Yields:
+        Registry: The registry collecting the records.
+    """
+    was_enabled = _enabled
+    enable(path, memory)
+    try:
+        yield registry
+    finally:
+        if not was_enabled:
+            disable()
+
+
+def profile_next_call(name: str, path: Optional[str] = None, sort: str = 'cumulative', limit: int = 30) -> None:
+    """
+    Runs the next call of an instrumented function under cProfile (instrumentation must be enabled).
+
+    Args:
+        name (str): Instrumented name, e.g. 'ABHypothesisTesting.run_all_tests'.
+        path (str): Write the raw profile here (for snakeviz or pstats). If None, the top
+            `limit` functions are kept in `last_profiles[name]` as text.
+        sort (str): pstats sort key of the text report.
+        limit (int): Number of functions in the text report.
+    """
+    with _profile_lock:
+        _profile_requests[name] = (path, sort, limit)
+
+
+def _take_profile_request(name: str) -> Optional[tuple]:
+    if not _profile_requests:
+        return None
+    with _profile_lock:
+        return _profile_requests.pop(name, None)
+
+
+def _finish_profile(name: str, profiler: cProfile.Profile, request: tuple) -> None:
+    path, sort, limit = request
+    if path is not None:
+        profiler.dump_stats(path)
+        return
+    report = io.StringIO()
+    pstats.Stats(profiler, stream=report).sort_stats(sort).print_stats(limit)
+    last_profiles[name] = report.getvalue()
+
+
+def _count_rows(args: tuple, result) -> Optional[int]:
+    """
+    Rows processed by a call: the rows of the DataFrame it returns, else of the data it was given.
+    """
+    if isinstance(result, (pd.DataFrame, pd.Series)):
+        return len(result)
+    for arg in args:
+        data = getattr(arg, 'data', arg)
+        if isinstance(data, (pd.DataFrame, pd.Series)):
+            return len(data)
+    return None
+
+
+def _record_consumption(chunks: GeneratorType, record: CallRecord) -> Iterator:
+    """
+    Yields the items of a generator returned by an instrumented call, then records the call.
+
+    The time spent producing the items is added to the record and the rows of the DataFrames
+    yielded are counted. The record is added once the generator is exhausted, fails or is closed.
+    """
+    n_rows = None
+    try:
+        while True:
+            start_wall, start_cpu = time.perf_counter(), time.thread_time()
+            try:
+                item = next(chunks)
+            except StopIteration:
+                return
+            finally:
+                record.wall_time_s += time.perf_counter() - start_wall
+                record.cpu_time_s += time.thread_time() - start_cpu
+            if isinstance(item, (pd.DataFrame, pd.Series)):
+                n_rows = (n_rows or 0) + len(item)
+            yield item
+    except BaseException as e:
+        if not isinstance(e, GeneratorExit):
+            record.error = f'{type(e).__name__}: {e}'
+        raise
+    finally:
+        chunks.close()
+        record.rows = None if record.error else n_rows
+        registry.add(record)
+
+
+def instrument(func: Optional[Callable] = None, *, name: Optional[str] = None,
+               rows: Optional[Callable] = None) -> Callable:
+    """
+    Decorator recording the wall time, CPU time, peak memory growth and rows of every call.
+
+    Nothing is recorded unless instrumentation is enabled (see enable), so a disabled
+    decorator only costs one flag check per call. Nested instrumented calls record
+    their depth and parent, so a slow stage can be traced down to its steps. CPU time is
+    that of the calling thread; work handed to worker processes is not included.
+
+    A call returning a generator (e.g. a load with `chunksize`) does its work when the
+    generator is consumed, so it is recorded once the generator is exhausted or closed, with
+    the time spent producing the chunks and their total rows. Its memory is not tracked.
+
+    Args:
+        func (Callable): The function to instrument.
+        name (str): Record name. Defaults to the function's qualified name.
+        rows (Callable): Called as rows(args, result) to count the rows processed. Defaults to
+            the length of a returned DataFrame/Series, else of the first DataFrame argument
+            (or argument with a DataFrame `data` attribute, such as the analysis classes).
+
+    Returns:
+        Callable: The wrapped function.
+    """
+    if func is None:
+        return functools.partial(instrument, name=name, rows=rows)
+    record_name = name or func.__qualname__
+    count_rows = rows or _count_rows
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _enabled:
+            return func(*args, **kwargs)
+
+        stack = _local.stack
+        parent = stack[-1] if stack else None
+        track_memory = _track_memory and tracemalloc.is_tracing()
+        frame = {'name': record_name, 'peak': 0}
+        if track_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if parent is not None:
+                # Resetting the peak below would lose the parent's peak so far
+                parent['peak'] = max(parent['peak'], peak)
+            tracemalloc.reset_peak()
+            frame['start'] = frame['peak'] = current
+        stack.append(frame)
+
+        profile_request = _take_profile_request(record_name)
+        profiler = cProfile.Profile() if profile_request else None
+        error, result = None, None
+        started_at = time.time()
+        start_wall, start_cpu = time.perf_counter(), time.thread_time()
+        try:
+            if profiler is not None:
+                result = profiler.runcall(func, *args, **kwargs)
+            else:
+                result = func(*args, **kwargs)
+        except BaseException as e:
+            error = f'{type(e).__name__}: {e}'
+            raise
+        finally:
+            wall_time, cpu_time = time.perf_counter() - start_wall, time.thread_time() - start_cpu
+            stack.pop()
+            memory_mb = None
+            if track_memory and tracemalloc.is_tracing():
+                frame['peak'] = max(frame['peak'], tracemalloc.get_traced_memory()[1])
+                memory_mb = (frame['peak'] - frame['start']) / 2**20
+                if parent is not None and 'peak' in parent:
+                    parent['peak'] = max(parent['peak'], frame['peak'])
+            if profiler is not None:
+                _finish_profile(record_name, profiler, profile_request)
+            record = CallRecord(
+                name=record_name, wall_time_s=wall_time, cpu_time_s=cpu_time, memory_peak_mb=memory_mb,
+                rows=None, depth=len(stack), parent=parent['name'] if parent else None,
+                thread=threading.current_thread().name, started_at=started_at, error=error)
+            if error is None and isinstance(result, GeneratorType):
+                # Only building the generator happened so far; the call is recorded as it is consumed
+                record.memory_peak_mb = None
+                result = _record_consumption(result, record)
+            else:
+                record.rows = None if error else count_rows(args, result)
+                registry.add(record)
+        return result
+
+    return wrapper
+
+
+def configure_from_environment(setting: Optional[str] = None) -> None:
+    """
+    Enables instrumentation as requested by the ENVIRONMENT_VARIABLE setting (read if not given).
+
+    DISABLED_VALUES leave it off, IN_MEMORY_VALUES keep the records in memory only and any
+    other value is the path of a JSON lines log file.
+    """
+    if setting is None:
+        setting = os.environ.get(ENVIRONMENT_VARIABLE, '')
+    value = setting.strip().lower()
+    if value in DISABLED_VALUES:
+        return
+    enable(path=None if value in IN_MEMORY_VALUES else setting)
+
+
+configure_from_environment()
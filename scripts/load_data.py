@@ -1,8 +1,70 @@
 import os
+import hashlib
+import json
 import zipfile
 import pandas as pd
-import io
+from contextlib import ExitStack, contextmanager
+from typing import IO, Callable, Iterable, Iterator, Optional, Union
 
+try:
+    from scripts.instrumentation import instrument
+except ImportError:
+    # Notebooks import the scripts directly with the scripts/ directory on sys.path
+    from instrumentation import instrument
+
+# Default number of rows per chunk when streaming the policy file
+DEFAULT_CHUNKSIZE = 100_000
+
+# Directory where parsed frames are cached in columnar form
+DEFAULT_CACHE_DIR = "../data/cache/"
+
+# Explicit dtypes for the MachineLearningRating policy file. Low-cardinality
+# text columns are parsed straight into categoricals and money columns into
+# float32 so streamed chunks never materialise as object columns. PostalCode is
+# left to the parser, so it is int64 whether the file is streamed or loaded whole
+# and filters such as `== 2000` behave the same on both paths.
+POLICY_DTYPES = {
+    'Citizenship': 'category',
+    'LegalType': 'category',
+    'Title': 'category',
+    'Language': 'category',
+    'Bank': 'category',
+    'AccountType': 'category',
+    'MaritalStatus': 'category',
+    'Gender': 'category',
+    'Country': 'category',
+    'Province': 'category',
+    'MainCrestaZone': 'category',
+    'SubCrestaZone': 'category',
+    'ItemType': 'category',
+    'VehicleType': 'category',
+    'make': 'category',
+    'Model': 'category',
+    'bodytype': 'category',
+    'AlarmImmobiliser': 'category',
+    'TrackingDevice': 'category',
+    'NewVehicle': 'category',
+    'WrittenOff': 'category',
+    'Rebuilt': 'category',
+    'Converted': 'category',
+    'CrossBorder': 'category',
+    'TermFrequency': 'category',
+    'ExcessSelected': 'category',
+    'CoverCategory': 'category',
+    'CoverType': 'category',
+    'CoverGroup': 'category',
+    'Section': 'category',
+    'Product': 'category',
+    'StatutoryClass': 'category',
+    'StatutoryRiskType': 'category',
+    'CustomValueEstimate': 'float32',
+    'SumInsured': 'float32',
+    'CalculatedPremiumPerTerm': 'float32',
+    'TotalPremium': 'float32',
+    'TotalClaims': 'float32',
+}
+
+@instrument
 def extract_zip(zip_file_path: str, extract_to: str) -> None:
     """
     Extracts a zip file to the specified directory.
@@ -14,6 +76,7 @@ def extract_zip(zip_file_path: str, extract_to: str) -> None:
     with zipfile.ZipFile(zip_file_path, 'r') as zip_ref:
         zip_ref.extractall(extract_to)
 
+@instrument
 def extract_nested_zip(outer_zip_path: str, extract_to: str) -> None:
     """
     Extracts a zip file and any nested zip files within it.
@@ -25,55 +88,420 @@ def extract_nested_zip(outer_zip_path: str, extract_to: str) -> None:
     with zipfile.ZipFile(outer_zip_path, 'r') as outer_zip:
         for file_info in outer_zip.infolist():
             if file_info.filename.endswith(".zip"):
-                # Handle the nested zip
+                # Handle the nested zip straight from the (seekable) member stream
                 with outer_zip.open(file_info.filename) as nested_zip_file:
-                    nested_zip_data = io.BytesIO(nested_zip_file.read())
-                    with zipfile.ZipFile(nested_zip_data, 'r') as nested_zip:
+                    with zipfile.ZipFile(nested_zip_file, 'r') as nested_zip:
                         nested_zip.extractall(extract_to)
             else:
                 # Extract regular files
                 outer_zip.extract(file_info, extract_to)
 
-def load_txt_from_zip(extracted_dir: str, filename: str) -> pd.DataFrame:
+def _open_member(archive: zipfile.ZipFile, filename: str, stack: ExitStack) -> Optional[IO[bytes]]:
+    """
+    Searches an archive, then the zips nested inside it, for `filename` and opens it.
+
+    Every handle needed to keep the member readable is registered on `stack`.
+    Handles of nested zips that do not contain the member are closed right away.
+
+    Returns:
+        IO[bytes]: The open member stream, or None if the archive does not contain it.
+    """
+    for info in archive.infolist():
+        if not info.is_dir() and (info.filename == filename or os.path.basename(info.filename) == filename):
+            return stack.enter_context(archive.open(info))
+
+    for info in archive.infolist():
+        if info.filename.endswith(".zip"):
+            with ExitStack() as nested_stack:
+                # ZipExtFile is seekable, so the inner zip is read in place, never buffered
+                nested_file = nested_stack.enter_context(archive.open(info))
+                nested_zip = nested_stack.enter_context(zipfile.ZipFile(nested_file, 'r'))
+                member = _open_member(nested_zip, filename, nested_stack)
+                if member is not None:
+                    stack.push(nested_stack.pop_all())
+                    return member
+    return None
+
+@contextmanager
+def open_zip_member(outer_zip_path: str, filename: str) -> Iterator[IO[bytes]]:
+    """
+    Opens a file stored in a zip, or in a zip nested inside it, as a binary stream
+    without extracting anything to disk or buffering whole archives in memory.
+
+    Args:
+        outer_zip_path (str): Path to the outer zip file.
+        filename (str): The name of the file to open (matched on full or base name).
+
+    Yields:
+        IO[bytes]: A readable stream over the decompressed member.
+    """
+    with ExitStack() as stack:
+        outer_zip = stack.enter_context(zipfile.ZipFile(outer_zip_path, 'r'))
+        member = _open_member(outer_zip, filename, stack)
+        if member is None:
+            raise FileNotFoundError(f"'{filename}' not found in {outer_zip_path}")
+        yield member
+
+def _dtype_for_columns(dtype: Optional[dict], usecols: Optional[list]) -> Optional[dict]:
+    """
+    Restricts a dtype mapping to the requested columns.
+
+    Args:
+        dtype (dict): Mapping of column name to dtype.
+        usecols (list): Columns that will be parsed. If None, all columns are kept.
+
+    Returns:
+        dict: The dtype mapping limited to the parsed columns.
+    """
+    if dtype is None or usecols is None:
+        return dtype
+    return {col: col_dtype for col, col_dtype in dtype.items() if col in usecols}
+
+def _read_txt(source: Union[str, IO[bytes]], chunksize: Optional[int], dtype: Optional[dict],
+              usecols: Optional[list], true_values: Optional[list] = None,
+              false_values: Optional[list] = None) -> Union[pd.DataFrame, Iterator[pd.DataFrame]]:
+    """
+    Parses a pipe-separated source, whole or as a stream of typed chunks.
+    """
+    if chunksize is None:
+        # Load the .txt file as pipe-separated (|)
+        return pd.read_csv(source, delimiter='|', low_memory=False,
+                           dtype=_dtype_for_columns(dtype, usecols), usecols=usecols,
+                           true_values=true_values, false_values=false_values)
+
+    if dtype is None:
+        dtype = POLICY_DTYPES
+    return _iter_chunks(source, chunksize, _dtype_for_columns(dtype, usecols), usecols, true_values, false_values)
+
+@instrument
+def load_txt_from_zip(extracted_dir: str, filename: str, chunksize: Optional[int] = None,
+                      dtype: Optional[dict] = None, usecols: Optional[list] = None,
+                      true_values: Optional[list] = None,
+                      false_values: Optional[list] = None) -> Union[pd.DataFrame, Iterator[pd.DataFrame]]:
     """
     Loads a pipe-separated TXT file from the extracted directory into a pandas DataFrame.
 
+    When `chunksize` is given the file is streamed instead: an iterator of DataFrame
+    chunks is returned and only one chunk is held in memory at a time. Streaming
+    defaults to the explicit POLICY_DTYPES so chunks are categorical/float32 typed.
+
     Args:
         extracted_dir (str): The directory where the zip contents were extracted.
         filename (str): The name of the TXT file to load.
+        chunksize (int): Number of rows per chunk. If None, the whole file is loaded.
+        dtype (dict): Per-column dtypes. Defaults to POLICY_DTYPES when streaming.
+        usecols (list): Subset of columns to parse. If None, all columns are parsed.
+        true_values (list): Text parsed as True in boolean columns (e.g. ['Yes']).
+        false_values (list): Text parsed as False in boolean columns (e.g. ['No']).
 
     Returns:
-        pd.DataFrame: The loaded data as a pandas DataFrame.
+        pd.DataFrame or Iterator[pd.DataFrame]: The loaded data, or an iterator of chunks when streaming.
     """
     file_path = os.path.join(extracted_dir, filename)
-    
-    # Load the .txt file as pipe-separated (|)
-    df = pd.read_csv(file_path, delimiter='|', low_memory=False)
-    return df
+    return _read_txt(file_path, chunksize, dtype, usecols, true_values, false_values)
+
+@instrument
+def load_txt_from_archive(outer_zip_path: str, filename: str, chunksize: Optional[int] = None,
+                          dtype: Optional[dict] = None, usecols: Optional[list] = None,
+                          true_values: Optional[list] = None,
+                          false_values: Optional[list] = None) -> Union[pd.DataFrame, Iterator[pd.DataFrame]]:
+    """
+    Loads a pipe-separated TXT file by streaming it straight out of the (nested) zip.
+
+    Args:
+        outer_zip_path (str): Path to the outer zip file.
+        filename (str): The name of the TXT file to load.
+        chunksize (int): Number of rows per chunk. If None, the whole file is loaded.
+        dtype (dict): Per-column dtypes. Defaults to POLICY_DTYPES when streaming.
+        usecols (list): Subset of columns to parse. If None, all columns are parsed.
+        true_values (list): Text parsed as True in boolean columns (e.g. ['Yes']).
+        false_values (list): Text parsed as False in boolean columns (e.g. ['No']).
+
+    Returns:
+        pd.DataFrame or Iterator[pd.DataFrame]: The loaded data, or an iterator of chunks when streaming.
+    """
+    if chunksize is None:
+        with open_zip_member(outer_zip_path, filename) as member:
+            return _read_txt(member, None, dtype, usecols, true_values, false_values)
+    return _iter_archive_chunks(outer_zip_path, filename, chunksize, dtype, usecols, true_values, false_values)
+
+def _iter_archive_chunks(outer_zip_path: str, filename: str, chunksize: int, dtype: Optional[dict],
+                         usecols: Optional[list], true_values: Optional[list] = None,
+                         false_values: Optional[list] = None) -> Iterator[pd.DataFrame]:
+    """
+    Yields typed chunks of an archive member, keeping the archives open while streaming.
+    """
+    with open_zip_member(outer_zip_path, filename) as member:
+        yield from _read_txt(member, chunksize, dtype, usecols, true_values, false_values)
+
+def _iter_chunks(source: Union[str, IO[bytes]], chunksize: int, dtype: Optional[dict],
+                 usecols: Optional[list], true_values: Optional[list] = None,
+                 false_values: Optional[list] = None) -> Iterator[pd.DataFrame]:
+    """
+    Yields typed chunks of a pipe-separated file, closing the reader when done.
+    """
+    with pd.read_csv(source, delimiter='|', dtype=dtype, usecols=usecols, chunksize=chunksize,
+                     true_values=true_values, false_values=false_values) as reader:
+        for chunk in reader:
+            yield chunk
+
+def _wrap_errors(chunks: Iterator[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+    """
+    Re-raises errors hit while streaming chunks the same way load_data reports them.
+    """
+    try:
+        yield from chunks
+    except Exception as e:
+        raise RuntimeError(f'Error loading data: {str(e)}')
 
-def load_data(outer_zip_path: str, filename: str) -> pd.DataFrame:
+@instrument
+def load_data(outer_zip_path: str, filename: str, chunksize: Optional[int] = None,
+              dtype: Optional[dict] = None, usecols: Optional[list] = None,
+              extract_to: Optional[str] = None, true_values: Optional[list] = None,
+              false_values: Optional[list] = None) -> Union[pd.DataFrame, Iterator[pd.DataFrame]]:
     """
-    Orchestrates the extraction and loading of data from a nested zip file.
+    Orchestrates the loading of data from a nested zip file.
+
+    By default the TXT file is streamed directly out of the outer/inner archives
+    into the parser, with no temporary files. Passing `extract_to` restores the
+    previous behaviour of extracting everything to disk and reading it back.
+
+    A schema inferred by dtype_optimization.infer_schema is applied while parsing with
+    load_data(outer_zip_path, filename, **schema.read_options()); its float columns are
+    parsed as float64 and narrowed by dtype_optimization.apply_schema where the values allow it.
 
     Args:
         outer_zip_path (str): Path to the outer zip file.
         filename (str): The name of the TXT file to load.
+        chunksize (int): Number of rows per chunk. If given, an iterator of typed chunks is returned.
+        dtype (dict): Per-column dtypes. Defaults to POLICY_DTYPES when streaming.
+        usecols (list): Subset of columns to parse. If None, all columns are parsed.
+        extract_to (str): Directory to extract the archives to before loading. If None, nothing is extracted.
+        true_values (list): Text parsed as True in boolean columns (e.g. ['Yes']).
+        false_values (list): Text parsed as False in boolean columns (e.g. ['No']).
 
     Returns:
-        pd.DataFrame: The processed data as a pandas DataFrame.
+        pd.DataFrame or Iterator[pd.DataFrame]: The processed data, or an iterator of chunks when streaming.
     """
     try:
-        # Create a directory for extracted files
-        extract_to = "../data/"
-        os.makedirs(extract_to, exist_ok=True)
-        
-        # Extract the nested zip file and any files within
-        extract_nested_zip(outer_zip_path, extract_to)
-        
-        # Load the TXT file from the extracted directory
-        df = load_txt_from_zip(extract_to, filename)
+        if extract_to is None:
+            df = load_txt_from_archive(outer_zip_path, filename, chunksize=chunksize, dtype=dtype, usecols=usecols,
+                                       true_values=true_values, false_values=false_values)
+        else:
+            # Create a directory for extracted files
+            os.makedirs(extract_to, exist_ok=True)
+
+            # Extract the nested zip file and any files within
+            extract_nested_zip(outer_zip_path, extract_to)
 
+            # Load the TXT file from the extracted directory
+            df = load_txt_from_zip(extract_to, filename, chunksize=chunksize, dtype=dtype, usecols=usecols,
+                                   true_values=true_values, false_values=false_values)
+
+        if chunksize is not None:
+            return _wrap_errors(df)
         return df
     
     except Exception as e:
-        raise RuntimeError(f'Error loading data: {str(e)}')
\ No newline at end of file
+        raise RuntimeError(f'Error loading data: {str(e)}')
+
+def reduce_chunks(chunks: Iterable[pd.DataFrame], func: Callable, initial=None):
+    """
+    Folds `func` over a stream of chunks so statistics can be computed over the
+    full file while holding only one chunk (plus the accumulator) in memory.
+
+    Args:
+        chunks (Iterable[pd.DataFrame]): Chunks, e.g. from load_data(..., chunksize=...).
+        func (Callable): Called as func(accumulator, chunk) and returns the new accumulator.
+        initial: Starting accumulator. If None, the first chunk is used as the accumulator.
+
+    Returns:
+        The final accumulator.
+    """
+    accumulator = initial
+    for chunk in chunks:
+        if accumulator is None:
+            accumulator = chunk
+        else:
+            accumulator = func(accumulator, chunk)
+    return accumulator
+
+@instrument
+def concat_chunks(chunks: Iterable[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Concatenates streamed chunks into one DataFrame, keeping categorical columns
+    categorical by unioning the categories seen in each chunk.
+
+    Args:
+        chunks (Iterable[pd.DataFrame]): Chunks, e.g. from load_data(..., chunksize=...).
+
+    Returns:
+        pd.DataFrame: The concatenated data with a fresh RangeIndex.
+    """
+    chunks = list(chunks)
+    if not chunks:
+        return pd.DataFrame()
+
+    categorical_cols = [col for col in chunks[0].columns
+                        if isinstance(chunks[0][col].dtype, pd.CategoricalDtype)]
+    unioned = {col: pd.api.types.union_categoricals([chunk[col] for chunk in chunks])
+               for col in categorical_cols}
+
+    df = pd.concat(chunks, ignore_index=True)
+    for col, values in unioned.items():
+        df[col] = values
+    return df
+
+def _require_pyarrow():
+    """
+    Imports pyarrow, which the columnar cache needs, with a helpful error if it is missing.
+    """
+    try:
+        import pyarrow
+        import pyarrow.feather
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("The columnar cache requires pyarrow: pip install pyarrow") from e
+    return pyarrow
+
+@instrument
+def write_columnar(df: pd.DataFrame, path: str) -> None:
+    """
+    Writes a DataFrame to a typed columnar file, replacing it atomically.
+
+    The format follows the extension: '.parquet' for Parquet, anything else for
+    uncompressed Feather (Arrow IPC), which can be memory-mapped on reload.
+
+    Args:
+        df (pd.DataFrame): The data to write.
+        path (str): Destination file path.
+    """
+    pa = _require_pyarrow()
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    if path.endswith('.parquet'):
+        pa.parquet.write_table(pa.Table.from_pandas(df, preserve_index=False), tmp_path)
+    else:
+        pa.feather.write_feather(df.reset_index(drop=True), tmp_path, compression='uncompressed')
+    os.replace(tmp_path, path)
+
+@instrument
+def read_columnar(path: str, columns: Optional[list] = None, memory_map: bool = True) -> pd.DataFrame:
+    """
+    Reads a file written by write_columnar, optionally loading only some columns.
+
+    Args:
+        path (str): The columnar file to read.
+        columns (list): Columns to load. If None, all columns are loaded.
+        memory_map (bool): Memory-map the file instead of reading it into a buffer.
+
+    Returns:
+        pd.DataFrame: The loaded data.
+    """
+    pa = _require_pyarrow()
+    if path.endswith('.parquet'):
+        table = pa.parquet.read_table(path, columns=columns, memory_map=memory_map)
+    else:
+        table = pa.feather.read_table(path, columns=columns, memory_map=memory_map)
+    return table.to_pandas()
+
+@instrument
+def file_digest(path: str, block_size: int = 1 << 20) -> str:
+    """
+    Computes the SHA-256 hash of a file's contents, reading it block by block.
+
+    Args:
+        path (str): The file to hash.
+        block_size (int): Number of bytes read at a time.
+
+    Returns:
+        str: The hex digest.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _cached_file_digest(path: str, cache_dir: str) -> str:
+    """
+    Returns the content hash of `path`, reusing the stored hash while the file's
+    size and modification time are unchanged.
+    """
+    index_path = os.path.join(cache_dir, 'digests.json')
+    try:
+        with open(index_path) as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        index = {}
+
+    stat = os.stat(path)
+    key = os.path.abspath(path)
+    entry = index.get(key)
+    if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+        return entry['digest']
+
+    digest = file_digest(path)
+    index[key] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'digest': digest}
+    tmp_path = f"{index_path}.tmp-{os.getpid()}"
+    with open(tmp_path, 'w') as f:
+        json.dump(index, f)
+    os.replace(tmp_path, index_path)
+    return digest
+
+@instrument
+def load_data_cached(outer_zip_path: str, filename: str, columns: Optional[list] = None,
+                     cache_dir: str = DEFAULT_CACHE_DIR, fmt: str = 'feather', memory_map: bool = True,
+                     dtype: Optional[dict] = None, usecols: Optional[list] = None,
+                     refresh: bool = False) -> pd.DataFrame:
+    """
+    Loads data like load_data, but keeps the parsed frame in a columnar cache.
+
+    Entries are keyed by the content hash of the source archive and the loader
+    options, so a changed zip (or different options) is re-parsed automatically
+    and stale entries for the same source path and options are removed.
+
+    Args:
+        outer_zip_path (str): Path to the outer zip file.
+        filename (str): The name of the TXT file to load.
+        columns (list): Columns to load from the cache. If None, all cached columns are loaded.
+        cache_dir (str): Directory holding the cache entries.
+        fmt (str): 'feather' (memory-mappable) or 'parquet'.
+        memory_map (bool): Memory-map the cache entry on reload.
+        dtype (dict): Per-column dtypes used when parsing the source.
+        usecols (list): Subset of columns to parse and cache. If None, all columns are cached.
+        refresh (bool): Re-parse the source even if a valid entry exists.
+
+    Returns:
+        pd.DataFrame: The loaded data.
+    """
+    if fmt not in ('feather', 'parquet'):
+        raise ValueError(f"Unsupported cache format: {fmt}")
+    os.makedirs(cache_dir, exist_ok=True)
+
+    options = json.dumps({
+        'filename': filename,
+        'dtype': {col: str(col_dtype) for col, col_dtype in (dtype or {}).items()},
+        'usecols': sorted(usecols) if usecols is not None else None,
+    }, sort_keys=True)
+    options_key = hashlib.sha256(options.encode()).hexdigest()[:12]
+    source_key = _cached_file_digest(outer_zip_path, cache_dir)[:12]
+
+    # Same-named archives in different directories must not evict each other's entries
+    stem = os.path.splitext(os.path.basename(outer_zip_path))[0]
+    path_key = hashlib.sha256(os.path.abspath(outer_zip_path).encode()).hexdigest()[:8]
+    prefix = f"{stem}-{path_key}-{options_key}-"
+    cache_path = os.path.join(cache_dir, f"{prefix}{source_key}.{fmt}")
+
+    if refresh or not os.path.exists(cache_path):
+        df = load_data(outer_zip_path, filename, dtype=dtype, usecols=usecols)
+        write_columnar(df, cache_path)
+
+        # Drop entries built from earlier versions of the same source
+        for entry in os.listdir(cache_dir):
+            if entry.startswith(prefix) and entry.endswith(f".{fmt}") and entry != os.path.basename(cache_path):
+                os.remove(os.path.join(cache_dir, entry))
+
+        if columns is None:
+            return df
+
+    return read_columnar(cache_path, columns=columns, memory_map=memory_map)
@@ -0,0 +1,218 @@
+# scripts/model_training.py
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Union
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import LinearRegression
+from sklearn.metrics import mean_squared_error, r2_score
+from sklearn.model_selection import KFold
+from sklearn.tree import DecisionTreeRegressor
+from threadpoolctl import threadpool_limits
+
+try:
+    from scripts.feature_matrix import FeatureMatrix
+except ImportError:
+    # Notebooks import the scripts directly with the scripts/ directory on sys.path
+    from feature_matrix import FeatureMatrix
+
+# Model families of model_training.ipynb, most expensive first so long fits start early
+MODEL_FAMILIES = ['Random Forest', 'XGBoost', 'Decision Tree', 'Linear Regression']
+
+# Feature matrix used by the current worker process, memory-mapped once by _init_worker
+_worker_matrix = None
+
+
+def make_model(name: str, n_jobs: int = 1, random_state: int = 42, n_estimators: int = 1000,
+               early_stopping_rounds: Optional[int] = 20):
+    """
+    Creates an unfitted model of one of the notebook's families.
+
+    Args:
+        name (str): One of MODEL_FAMILIES.
+        n_jobs (int): Threads used inside the model (Random Forest and XGBoost).
+        random_state (int): Seed of the randomized models.
+        n_estimators (int): Maximum number of XGBoost boosting rounds; early stopping picks the best one.
+        early_stopping_rounds (int): Rounds without improvement on the validation split before
+            XGBoost stops. None trains all rounds.
+
+    Returns:
+        A scikit-learn compatible regressor.
+    """
+    if name == 'Linear Regression':
+        return LinearRegression()
+    if name == 'Decision Tree':
+        return DecisionTreeRegressor(random_state=random_state)
+    if name == 'Random Forest':
+        return RandomForestRegressor(n_estimators=100, random_state=random_state, n_jobs=n_jobs)
+    if name == 'XGBoost':
+        return xgb.XGBRegressor(objective='reg:squarederror', tree_method='hist', n_estimators=n_estimators,
+                                early_stopping_rounds=early_stopping_rounds, random_state=random_state, n_jobs=n_jobs)
+    raise ValueError(f"Unknown model: {name}. Expected one of {MODEL_FAMILIES}.")
+
+
+def split_cores(n_tasks: int, max_workers: Optional[int] = None, n_cores: Optional[int] = None) -> tuple:
+    """
+    Splits the CPU cores between parallel fits and the threads inside each fit.
+
+    Running folds in parallel scales better than threading inside one model, so as many
+    workers as tasks are used (up to the number of cores, or `max_workers`), and the
+    leftover cores go to the threads of each fit.
+
+    Args:
+        n_tasks (int): Number of (model, fold) fits.
+        max_workers (int): Upper bound on worker processes. Defaults to the number of cores.
+        n_cores (int): Number of cores available. Defaults to os.cpu_count().
+
+    Returns:
+        tuple: (number of worker processes, threads per fit).
+    """
+    n_cores = n_cores or os.cpu_count() or 1
+    n_workers = max(1, min(max_workers or n_cores, n_tasks))
+    return n_workers, max(1, n_cores // n_workers)
+
+
+def _init_worker(matrix: Union[FeatureMatrix, str]) -> None:
+    """
+    Memory-maps the feature matrix once per worker process.
+    """
+    global _worker_matrix
+    _worker_matrix = FeatureMatrix.load(matrix) if isinstance(matrix, str) else matrix
+
+
+def _fit_fold(task: tuple) -> dict:
+    """
+    Fits and evaluates one model on one cross-validation fold of the worker's matrix.
+    """
+    name, fold, n_splits, n_threads, random_state, options, validation_fraction = task
+    matrix = _worker_matrix
+    splits = KFold(n_splits=n_splits, shuffle=True, random_state=random_state).split(np.arange(matrix.shape[0]))
+    train_rows, test_rows = next(split for i, split in enumerate(splits) if i == fold)
+    X_train, y_train = matrix.take(train_rows)
+    X_test, y_test = matrix.take(test_rows)
+
+    start_wall, start_cpu = time.perf_counter(), time.process_time()
+    # Caps BLAS/OpenMP threads so parallel fits do not oversubscribe the cores
+    with threadpool_limits(limits=n_threads):
+        model = make_model(name, n_jobs=n_threads, random_state=random_state, **options)
+        fit_params = {}
+        best_iteration = None
+        if name == 'XGBoost' and model.get_params()['early_stopping_rounds']:
+            # Early stopping monitors a validation split of the training fold, never the test fold
+            rng = np.random.default_rng([random_state, fold])
+            shuffled = rng.permutation(len(train_rows))
+            n_valid = max(1, int(len(shuffled) * validation_fraction))
+            valid, fit = np.sort(shuffled[:n_valid]), np.sort(shuffled[n_valid:])
+            fit_params['eval_set'] = [(X_train[valid], y_train[valid])]
+            fit_params['verbose'] = False
+            X_train, y_train = X_train[fit], y_train[fit]
+        model.fit(X_train, y_train, **fit_params)
+        if name == 'XGBoost' and fit_params:
+            best_iteration = model.best_iteration
+        y_pred = model.predict(X_test)
+
+    return {
+        'model': name,
+        'fold': fold,
+        'MSE': mean_squared_error(y_test, y_pred),
+        'R2': r2_score(y_test, y_pred),
+        'n_train': len(y_train),
+        'n_test': len(y_test),
+        'best_iteration': best_iteration,
+        'threads': n_threads,
+        'fit_time_s': time.perf_counter() - start_wall,
+        'cpu_time_s': time.process_time() - start_cpu,
+        'pid': os.getpid(),
+    }
+
+
+def cross_validate_models(matrix: Union[FeatureMatrix, str], models: Optional[list] = None, n_splits: int = 5,
+                          max_workers: Optional[int] = None, random_state: int = 42, n_estimators: int = 1000,
+                          early_stopping_rounds: Optional[int] = 20, validation_fraction: float = 0.1) -> pd.DataFrame:
+    """
+    Runs k-fold cross-validation of several model families, all (model, fold) fits in parallel.
+
+    Every worker process memory-maps the same on-disk feature matrix, so the training data
+    is shared through the page cache instead of being copied per worker. XGBoost uses the
+    histogram method with early stopping on a validation split of each training fold.
+
+    Args:
+        matrix (FeatureMatrix or str): The training matrix, or the directory it was saved to.
+            An in-memory matrix is saved to a temporary directory for the workers.
+        models (list): Model families to compare. Defaults to MODEL_FAMILIES.
+        n_splits (int): Number of folds.
+        max_workers (int): Number of worker processes. If 1, fits run in the current process.
+            Defaults to the number of CPUs; see split_cores.
+        random_state (int): Seed of the folds and models.
+        n_estimators (int): Maximum number of XGBoost boosting rounds.
+        early_stopping_rounds (int): XGBoost early stopping patience; None disables early stopping.
+        validation_fraction (float): Share of each training fold held out for early stopping.
+
+    Returns:
+        pd.DataFrame: One row per (model, fold) with MSE, R2, sizes, best iteration and timings.
+    """
+    models = models or MODEL_FAMILIES
+    for name in models:
+        if name not in MODEL_FAMILIES:
+            raise ValueError(f"Unknown model: {name}. Expected one of {MODEL_FAMILIES}.")
+
+    # Expensive families first so the pool is not left waiting on one long fit at the end
+    order = sorted(models, key=MODEL_FAMILIES.index)
+    n_workers, n_threads = split_cores(len(order) * n_splits, max_workers)
+    options = {'n_estimators': n_estimators, 'early_stopping_rounds': early_stopping_rounds}
+    tasks = [(name, fold, n_splits, n_threads, random_state, options, validation_fraction)
+             for name in order for fold in range(n_splits)]
+
+    if n_workers == 1:
+        _init_worker(matrix)
+        records = [_fit_fold(task) for task in tasks]
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            if isinstance(matrix, FeatureMatrix):
+                path = os.path.join(tmp, 'matrix')
+                matrix.save(path)
+                matrix = path
+            with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker, initargs=(matrix,)) as executor:
+                records = list(executor.map(_fit_fold, tasks))
+
+    results = pd.DataFrame(records)
+    # Report in the order the models were requested
+    results['model'] = pd.Categorical(results['model'], categories=models, ordered=True)
+    return results.sort_values(['model', 'fold'], ignore_index=True)
+
+
+def metrics_table(results: pd.DataFrame) -> pd.DataFrame:
+    """
+    Summarises cross-validation results as the notebook's MSE/R2 table.
+
+    Args:
+        results (pd.DataFrame): Output of cross_validate_models.
+
+    Returns:
+        pd.DataFrame: Mean MSE and R2 per model, with their standard deviations across folds.
+    """
+    grouped = results.groupby('model', observed=True, sort=True)[['MSE', 'R2']]
+    table = grouped.mean()
+    table[['MSE_std', 'R2_std']] = grouped.std().to_numpy()
+    table.index = table.index.astype(str)
+    table.index.name = None
+    return table
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Cross-validate the premium models on a saved feature matrix.')
+    parser.add_argument('matrix', help='Directory written by FeatureMatrix.save')
+    parser.add_argument('--models', nargs='+', default=MODEL_FAMILIES, help='Model families to compare')
+    parser.add_argument('--folds', type=int, default=5, help='Number of cross-validation folds')
+    parser.add_argument('--max-workers', type=int, default=None, help='Number of worker processes')
+    parser.add_argument('--early-stopping-rounds', type=int, default=20, help='XGBoost early stopping patience')
+    args = parser.parse_args()
+
+    fold_results = cross_validate_models(args.matrix, models=args.models, n_splits=args.folds,
+                                         max_workers=args.max_workers, early_stopping_rounds=args.early_stopping_rounds)
+    print(metrics_table(fold_results).to_string())
@@ -0,0 +1,225 @@
+# scripts/outlier_capping.py
+import numpy as np
+import pandas as pd
+from typing import Optional
+
+
+class KLLSketch:
+
+    def __init__(self, k: int = 200, seed: Optional[int] = None):
+        """
+        Initialize an empty KLL quantile sketch.
+
+        The sketch keeps a stack of compactors; level h holds items of weight 2**h.
+        When a level overflows it is sorted and every other item is promoted to the
+        next level, so memory stays around 3k items regardless of the stream length.
+
+        Args:
+            k (int): Accuracy parameter; the rank error is roughly 1.7 / k.
+            seed (int): Seed for the random compaction offsets.
+        """
+        self.k = k
+        self.rng = np.random.default_rng(seed)
+        self.compactors = [np.empty(0, dtype=np.float64)]
+        self.count = 0
+        self.min = np.nan
+        self.max = np.nan
+
+    def _capacity(self, level: int) -> int:
+        """
+        Returns the capacity of a level; lower levels get geometrically smaller buffers.
+        """
+        depth = len(self.compactors) - level - 1
+        return max(2, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compress(self) -> None:
+        """
+        Compacts every level that exceeds its capacity, bottom-up.
+        """
+        level = 0
+        while level < len(self.compactors):
+            items = self.compactors[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self.compactors):
+                    self.compactors.append(np.empty(0, dtype=np.float64))
+                items = np.sort(items)
+                # An odd item out stays behind so the promoted weight is exact
+                leftover = items[-1:] if len(items) % 2 else items[:0]
+                paired = items[:len(items) - len(leftover)]
+                promoted = paired[self.rng.integers(2)::2]
+                self.compactors[level + 1] = np.concatenate([self.compactors[level + 1], promoted])
+                self.compactors[level] = leftover
+            level += 1
+
+    def update(self, values) -> 'KLLSketch':
+        """
+        Adds the non-null values to the sketch.
+
+        Args:
+            values (array-like): The values to add.
+
+        Returns:
+            KLLSketch: The updated sketch.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return self
+
+        self.count += len(values)
+        self.min = np.nanmin([self.min, values.min()])
+        self.max = np.nanmax([self.max, values.max()])
+        self.compactors[0] = np.concatenate([self.compactors[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other: 'KLLSketch') -> 'KLLSketch':
+        """
+        Merges another sketch into this one.
+
+        Returns:
+            KLLSketch: The merged sketch.
+        """
+        while len(self.compactors) < len(other.compactors):
+            self.compactors.append(np.empty(0, dtype=np.float64))
+        for level, items in enumerate(other.compactors):
+            self.compactors[level] = np.concatenate([self.compactors[level], items])
+        self.count += other.count
+        self.min = np.nanmin([self.min, other.min])
+        self.max = np.nanmax([self.max, other.max])
+        self._compress()
+        return self
+
+    def quantile(self, q):
+        """
+        Returns approximate quantiles of the values seen so far.
+
+        Args:
+            q (float or array-like): Quantile(s) in [0, 1].
+
+        Returns:
+            float or np.ndarray: The approximate quantile(s); NaN if the sketch is empty.
+        """
+        q_array = np.atleast_1d(np.asarray(q, dtype=np.float64))
+        if self.count == 0:
+            result = np.full(len(q_array), np.nan)
+        else:
+            items = np.concatenate(self.compactors)
+            weights = np.concatenate([np.full(len(c), 2.0 ** level) for level, c in enumerate(self.compactors)])
+            order = np.argsort(items, kind='stable')
+            items, cumulative = items[order], np.cumsum(weights[order])
+            positions = np.searchsorted(cumulative, q_array * cumulative[-1], side='left')
+            result = items[np.minimum(positions, len(items) - 1)]
+            # The exact extremes are tracked, so the end points are never approximated
+            result = np.where(q_array <= 0, self.min, np.where(q_array >= 1, self.max, result))
+        return result if np.ndim(q) else float(result[0])
+
+
+class IQRCapper:
+
+    def __init__(self, factor: float = 1.5, k: int = 200, seed: Optional[int] = None):
+        """
+        Initialize an IQR outlier capper.
+
+        Values below Q1 - factor * IQR or above Q3 + factor * IQR are capped to those bounds.
+
+        Args:
+            factor (float): IQR multiplier used to compute the bounds.
+            k (int): Accuracy parameter of the quantile sketches used by partial_fit.
+            seed (int): Seed for the quantile sketches used by partial_fit.
+        """
+        self.factor = factor
+        self.k = k
+        self.seed = seed
+        self.bounds = None
+        self.sketches = {}
+
+    def _set_bounds(self, quartiles: pd.DataFrame) -> None:
+        """
+        Derives the capping bounds from a frame with rows 0.25 and 0.75.
+        """
+        q1, q3 = quartiles.loc[0.25], quartiles.loc[0.75]
+        iqr = q3 - q1
+        self.bounds = pd.DataFrame({'lower': q1 - self.factor * iqr, 'upper': q3 + self.factor * iqr})
+
+    def fit(self, data: pd.DataFrame, columns: list) -> 'IQRCapper':
+        """
+        Computes the quartiles of all columns with one batched quantile call.
+
+        Args:
+            data (pd.DataFrame): The data to compute the bounds on.
+            columns (list): Numerical columns to cap.
+
+        Returns:
+            IQRCapper: The fitted capper.
+        """
+        self._set_bounds(data[columns].quantile([0.25, 0.75]))
+        return self
+
+    def partial_fit(self, chunk: pd.DataFrame, columns: list) -> 'IQRCapper':
+        """
+        Updates approximate quartiles from a chunk, for data that does not fit in memory.
+
+        Args:
+            chunk (pd.DataFrame): A chunk of the data.
+            columns (list): Numerical columns to cap.
+
+        Returns:
+            IQRCapper: The capper, fitted on every chunk seen so far.
+        """
+        for column in columns:
+            if column not in self.sketches:
+                self.sketches[column] = KLLSketch(self.k, self.seed)
+            self.sketches[column].update(chunk[column].to_numpy(dtype=np.float64, na_value=np.nan))
+        return self.fit_sketches(self.sketches)
+
+    def fit_sketches(self, sketches: dict) -> 'IQRCapper':
+        """
+        Fits approximate quartiles from quantile sketches built elsewhere, e.g. merged across partitions.
+
+        Args:
+            sketches (dict): A KLLSketch per numerical column to cap.
+
+        Returns:
+            IQRCapper: The fitted capper.
+        """
+        self.sketches = sketches
+        quartiles = pd.DataFrame({column: sketch.quantile([0.25, 0.75]) for column, sketch in sketches.items()},
+                                 index=[0.25, 0.75])
+        self._set_bounds(quartiles)
+        return self
+
+    def transform(self, data: pd.DataFrame, inplace: bool = False) -> pd.DataFrame:
+        """
+        Caps the fitted columns to their bounds with a single vectorized clip.
+
+        Args:
+            data (pd.DataFrame): The data to cap.
+            inplace (bool): Overwrite the columns of `data` instead of returning a new frame.
+
+        Returns:
+            pd.DataFrame: The capped data.
+        """
+        if self.bounds is None:
+            raise RuntimeError("IQRCapper must be fitted before calling transform.")
+
+        columns = self.bounds.index.tolist()
+        capped = data[columns].clip(lower=self.bounds['lower'], upper=self.bounds['upper'], axis=1)
+        if not inplace:
+            data = data.copy()
+        data[columns] = capped
+        return data
+
+    def fit_transform(self, data: pd.DataFrame, columns: list, inplace: bool = False) -> pd.DataFrame:
+        """
+        Fits the bounds on `data` and caps it.
+
+        Args:
+            data (pd.DataFrame): The data to cap.
+            columns (list): Numerical columns to cap.
+            inplace (bool): Overwrite the columns of `data` instead of returning a new frame.
+
+        Returns:
+            pd.DataFrame: The capped data.
+        """
+        return self.fit(data, columns).transform(data, inplace=inplace)
@@ -0,0 +1,143 @@
+# scripts/plot_aggregation.py
+import numpy as np
+import pandas as pd
+from scipy import stats
+from typing import Optional
+
+# Default number of rows per group kept for sample-based plots (KDE, violins, scatter)
+DEFAULT_SAMPLE_SIZE = 5000
+
+
+def count_table(data: pd.DataFrame, x: str, hue: Optional[str] = None, order: Optional[list] = None):
+    """
+    Counts rows per category (and per hue category) with one groupby.
+
+    Args:
+        data (pd.DataFrame): The data to aggregate.
+        x (str): Column whose categories form the bars.
+        hue (str): Optional column splitting each bar into groups.
+        order (list): Optional order of the x categories. Defaults to descending count.
+
+    Returns:
+        pd.Series or pd.DataFrame: Counts indexed by x (with one column per hue value if hue is given).
+    """
+    keys = [x] if hue is None else [x, hue]
+    counts = data.groupby(keys, observed=True).size()
+    if hue is not None:
+        counts = counts.unstack(hue, fill_value=0)
+
+    if order is None:
+        totals = counts if hue is None else counts.sum(axis=1)
+        order = totals.sort_values(ascending=False, kind='stable').index
+    return counts.reindex(order, fill_value=0)
+
+
+def histogram(values: pd.Series, bins: int = 30):
+    """
+    Bins the non-null values of a Series.
+
+    Args:
+        values (pd.Series): The values to bin.
+        bins (int): Number of equal-width bins.
+
+    Returns:
+        tuple: (counts, edges) as returned by np.histogram.
+    """
+    values = values.dropna().to_numpy(dtype=np.float64)
+    return np.histogram(values, bins=bins)
+
+
+def sample_rows(data: pd.DataFrame, n: int = DEFAULT_SAMPLE_SIZE, by: Optional[str] = None,
+                seed: int = 42) -> pd.DataFrame:
+    """
+    Draws a bounded random sample of rows, optionally at most `n` per group.
+
+    Args:
+        data (pd.DataFrame): The data to sample.
+        n (int): Maximum number of rows (per group when `by` is given).
+        by (str): Optional column to sample within.
+        seed (int): Random seed for reproducible figures.
+
+    Returns:
+        pd.DataFrame: The sampled rows.
+    """
+    if by is None:
+        return data if len(data) <= n else data.sample(n=n, random_state=seed)
+
+    rng = np.random.default_rng(seed)
+    # Random ranks within each group select up to n rows per group in one pass
+    keys = pd.Series(rng.random(len(data)), index=data.index)
+    ranks = keys.groupby(data[by], observed=True).rank(method='first')
+    return data[ranks <= n]
+
+
+def kde_curve(values: pd.Series, edges: np.ndarray, n: int = DEFAULT_SAMPLE_SIZE, seed: int = 42):
+    """
+    Estimates a KDE on a sample of the values, scaled to match histogram counts.
+
+    Args:
+        values (pd.Series): The values to estimate the density of.
+        edges (np.ndarray): Histogram bin edges the curve is drawn over.
+        n (int): Maximum number of values used to fit the KDE.
+        seed (int): Random seed for the sample.
+
+    Returns:
+        tuple: (x, y) arrays of the curve, or None if the density cannot be estimated.
+    """
+    values = values.dropna()
+    total = len(values)
+    sample = sample_rows(values.to_frame(), n=n, seed=seed).iloc[:, 0].to_numpy(dtype=np.float64)
+    if len(sample) < 2 or np.ptp(sample) == 0:
+        return None
+
+    x = np.linspace(edges[0], edges[-1], 200)
+    y = stats.gaussian_kde(sample)(x) * total * (edges[1] - edges[0])
+    return x, y
+
+
+def box_summary(data: pd.DataFrame, y: str, x: Optional[str] = None, whis: float = 1.5) -> list:
+    """
+    Computes boxplot five-number summaries (plus mean) per group with vectorized groupbys.
+
+    Whiskers follow the Tukey convention used by seaborn: the most extreme data
+    points within `whis` times the IQR of the quartiles. Fliers are not kept.
+
+    Args:
+        data (pd.DataFrame): The data to summarise.
+        y (str): Numerical column to summarise.
+        x (str): Optional grouping column. If None, the whole column is one box.
+        whis (float): Whisker length as a multiple of the IQR.
+
+    Returns:
+        list: One dict per box in the format expected by matplotlib's Axes.bxp.
+    """
+    values = data[y]
+    groups = data[x] if x is not None else pd.Series('', index=data.index)
+    grouped = values.groupby(groups, observed=True)
+
+    # Groups without any non-null value have no box
+    quartiles = grouped.quantile([0.25, 0.5, 0.75]).unstack().dropna()
+    means = grouped.mean()
+    iqr = quartiles[0.75] - quartiles[0.25]
+    lower_fence = quartiles[0.25] - whis * iqr
+    upper_fence = quartiles[0.75] + whis * iqr
+
+    # Whiskers: extreme values inside the fences, found with one more grouped pass
+    group_labels = groups.to_numpy()
+    inside = values.between(lower_fence.reindex(group_labels).to_numpy(),
+                            upper_fence.reindex(group_labels).to_numpy())
+    whiskers = values[inside].groupby(groups[inside], observed=True).agg(['min', 'max'])
+
+    summaries = []
+    for label in quartiles.index:
+        summaries.append({
+            'label': label,
+            'q1': quartiles.loc[label, 0.25],
+            'med': quartiles.loc[label, 0.5],
+            'q3': quartiles.loc[label, 0.75],
+            'whislo': whiskers.loc[label, 'min'],
+            'whishi': whiskers.loc[label, 'max'],
+            'mean': means.loc[label],
+            'fliers': [],
+        })
+    return summaries
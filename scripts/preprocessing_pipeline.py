@@ -0,0 +1,365 @@
+# scripts/preprocessing_pipeline.py
+import pickle
+from typing import Callable, Optional
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.feature_selection import SelectKBest, f_classif
+from sklearn.preprocessing import StandardScaler
+
+# Columns dropped by data_preprocessing.ipynb: near-constant, identifiers, or replaced by other features
+DROP_COLUMNS = ['Language', 'Country', 'ItemType', 'StatutoryClass', 'StatutoryRiskType', 'MaritalStatus',
+                'Unnamed: 0', 'UnderwrittenCoverID', 'PolicyID']
+
+# Gender implied by the policy holder's title; 'Dr' could be either and clears the gender
+TITLE_TO_GENDER = {
+    'Mr': 'Male',
+    'Mrs': 'Female',
+    'Ms': 'Female',
+    'Miss': 'Female',
+    'Dr': None,
+}
+
+# Target columns removed from the features
+TARGET_COLUMNS = ['TotalPremium', 'TotalClaims']
+
+# Features derived by prepare(), mapped to the raw column they come from
+DERIVED_FEATURES = {
+    'TransactionYear': 'TransactionMonth',
+    'TransactionMonthOnly': 'TransactionMonth',
+    'TransactionQuarter': 'TransactionMonth',
+}
+
+
+def _code_dtype(n_categories: int) -> np.dtype:
+    """
+    Returns the smallest signed integer dtype holding the codes of `n_categories` (plus -1 for unseen).
+    """
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_categories <= np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+class PreprocessingPipeline:
+
+    def __init__(self, target: str = 'TotalPremium', low_cardinality: int = 10, high_cardinality: int = 20,
+                 k: int = 20, score_func: Callable = f_classif, missing_threshold: int = 1, sparse: bool = False):
+        """
+        Initialize the preprocessing steps of data_preprocessing.ipynb as a reusable, fitted pipeline.
+
+        Fitting learns the dropped columns, the category encodings, the scaler and the selected
+        features once. New batches (e.g. a new month of policies) are then transformed with
+        vectorized operations only, without refitting on the full dataset. Unlike the notebook,
+        no feature is derived from the target columns.
+
+        Args:
+            target (str): Column predicted by the model.
+            low_cardinality (int): Categorical columns with at most this many values are label encoded.
+            high_cardinality (int): Columns with more values than `low_cardinality` and at most this many
+                are one-hot encoded (first category dropped); above it they are frequency encoded.
+            k (int): Number of features kept by SelectKBest.
+            score_func (Callable): Scoring function of SelectKBest.
+            missing_threshold (int): Columns with more missing values than this in the fitting data are dropped.
+            sparse (bool): Produce CSR matrices (see transform) instead of dense DataFrames.
+        """
+        self.target = target
+        self.low_cardinality = low_cardinality
+        self.high_cardinality = high_cardinality
+        self.k = k
+        self.score_func = score_func
+        self.missing_threshold = missing_threshold
+        self.sparse = sparse
+        self.dropped_columns = None
+        self.label_categories = {}
+        self.onehot_categories = {}
+        self.frequencies = {}
+        self.numeric_columns = []
+        self.feature_names = []
+        self.scaler = None
+        self.selector = None
+        self.selected_features = []
+
+    def prepare(self, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Applies the cleaning steps: drops unused columns, fixes dtypes, splits TransactionMonth
+        and fills Gender from Title.
+
+        Args:
+            data (pd.DataFrame): Raw policy rows.
+
+        Returns:
+            pd.DataFrame: The cleaned rows (a new frame; `data` is not modified).
+        """
+        drop = DROP_COLUMNS if self.dropped_columns is None else self.dropped_columns
+        df = data.drop(columns=[col for col in drop if col in data.columns])
+
+        if 'CapitalOutstanding' in df.columns:
+            df['CapitalOutstanding'] = pd.to_numeric(df['CapitalOutstanding'], errors='coerce').fillna(0).astype(float)
+        if 'IsVATRegistered' in df.columns:
+            df['IsVATRegistered'] = df['IsVATRegistered'].astype(int)
+        if 'TransactionMonth' in df.columns:
+            months = pd.to_datetime(df.pop('TransactionMonth'))
+            df['TransactionYear'] = months.dt.year
+            df['TransactionMonthOnly'] = months.dt.month
+            df['TransactionQuarter'] = months.dt.quarter
+        if 'Title' in df.columns and 'Gender' in df.columns:
+            # Vectorized form of the notebook's row-wise title_to_gender_map.get(Title, Gender)
+            title = df['Title'].astype(object)
+            mapped = title.map(TITLE_TO_GENDER)
+            df['Gender'] = mapped.where(title.isin(list(TITLE_TO_GENDER)), df['Gender'].astype(object))
+        return df
+
+    def fit(self, data: pd.DataFrame) -> 'PreprocessingPipeline':
+        """
+        Learns the dropped columns, encodings, scaler and selected features.
+
+        Args:
+            data (pd.DataFrame): Raw policy rows, including the target columns.
+
+        Returns:
+            PreprocessingPipeline: The fitted pipeline.
+        """
+        # As in the notebook, columns with missing values are dropped before any other step
+        missing = data.isnull().sum()
+        self.dropped_columns = DROP_COLUMNS + [col for col in missing[missing > self.missing_threshold].index
+                                               if col not in DROP_COLUMNS + TARGET_COLUMNS]
+        self.feature_names = []
+        df = self.prepare(data)
+
+        categorical = df.select_dtypes(include=['object', 'string', 'category']).columns
+        self.label_categories, self.onehot_categories, self.frequencies = {}, {}, {}
+        for col in categorical:
+            counts = df[col].value_counts()
+            if len(counts) <= self.low_cardinality:
+                self.label_categories[col] = pd.Index(sorted(counts.index))
+            elif len(counts) <= self.high_cardinality:
+                self.onehot_categories[col] = pd.Index(sorted(counts.index))
+            else:
+                self.frequencies[col] = counts
+        self.numeric_columns = [col for col in df.columns if col not in categorical and col not in TARGET_COLUMNS]
+
+        dense, onehot = self._encode_parts(data)
+        self.feature_names = list(dense.columns) + self.onehot_features
+        self.selector = SelectKBest(score_func=self.score_func, k=min(self.k, len(self.feature_names)))
+        if self.sparse:
+            # Without centering the one-hot indicators stay sparse; the f-tests do not depend on the shift
+            encoded = self._sparse_matrix(dense, onehot)
+            self.scaler = StandardScaler(with_mean=False).fit(encoded)
+            self.selector.fit(encoded @ sparse.diags(1 / self.scaler.scale_), data[self.target])
+        else:
+            encoded = self._dense_matrix(dense, onehot)
+            self.scaler = StandardScaler().fit(encoded)
+            self.selector.fit(self.scaler.transform(encoded), data[self.target])
+        self.selected_features = [name for name, keep in zip(self.feature_names, self.selector.get_support()) if keep]
+        return self
+
+    def _encode_parts(self, data: pd.DataFrame, features: Optional[list] = None) -> tuple:
+        """
+        Cleans the rows and encodes every categorical column except the one-hot ones.
+
+        Args:
+            data (pd.DataFrame): Raw policy rows.
+            features (list): Only encode these feature names (e.g. the selected ones). Defaults to all.
+
+        Returns:
+            tuple: (DataFrame of the non-one-hot features, dict of one-hot column -> category codes).
+        """
+        if self.dropped_columns is None:
+            raise RuntimeError("The pipeline is not fitted. Call fit() first.")
+        wanted = None if features is None else set(features)
+
+        def needed(name):
+            return wanted is None or name in wanted
+
+        df = self.prepare(data)
+        columns = {col: df[col] for col in self.numeric_columns if col in df.columns and needed(col)}
+        for col, categories in self.label_categories.items():
+            if needed(col):
+                codes = categories.get_indexer(df[col].astype(object))
+                columns[col] = pd.Series(codes.astype(_code_dtype(len(categories))), index=df.index)
+        for col, counts in self.frequencies.items():
+            if needed(f'{col}_freq'):
+                positions = counts.index.get_indexer(df[col].astype(object))
+                freq = np.where(positions >= 0, counts.to_numpy()[positions], 0)
+                columns[f'{col}_freq'] = pd.Series(freq, index=df.index)
+        # The notebook's Premium_to_Claims_Ratio is not built: it is derived from the target columns,
+        # so it leaks the target into the features and is unknown when a new policy is scored
+
+        dense = pd.DataFrame(columns, index=df.index)
+        if self.feature_names:
+            dense = dense.reindex(columns=[name for name in self.dense_features if needed(name)], fill_value=0)
+        onehot = {col: categories.get_indexer(df[col].astype(object))
+                  for col, categories in self.onehot_categories.items()
+                  if any(needed(f'{col}_{category}') for category in categories[1:])}
+        return dense, onehot
+
+    @property
+    def onehot_features(self) -> list:
+        """
+        Names of the one-hot indicator columns, which come last in `feature_names`.
+        """
+        return [f'{col}_{category}' for col, categories in self.onehot_categories.items()
+                for category in categories[1:]]
+
+    @property
+    def dense_features(self) -> list:
+        """
+        Names of the features that are not one-hot indicators.
+        """
+        onehot = set(self.onehot_features)
+        return [name for name in self.feature_names if name not in onehot]
+
+    def required_columns(self, features: Optional[list] = None) -> list:
+        """
+        Lists the raw input columns the features are computed from.
+
+        Missing input columns are encoded as 0 by transform(), so callers scoring new rows
+        should check for these columns first.
+
+        Args:
+            features (list): Feature names. Defaults to the selected features.
+
+        Returns:
+            list: Raw column names, in order of first use.
+        """
+        if self.selector is None:
+            raise RuntimeError("The pipeline is not fitted. Call fit() first.")
+        encoded = {**{col: col for col in self.label_categories},
+                   **{f'{col}_freq': col for col in self.frequencies},
+                   **{f'{col}_{category}': col for col, categories in self.onehot_categories.items()
+                      for category in categories[1:]}}
+        columns = {}
+        for name in self.selected_features if features is None else features:
+            column = encoded.get(name, DERIVED_FEATURES.get(name, name))
+            columns[column] = None
+        return list(columns)
+
+    def encode(self, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Cleans the rows and encodes the categorical columns with the fitted encodings.
+
+        Label encoded columns become compact integer codes (int8/int16, -1 for unseen or missing
+        values), one-hot columns become uint8 indicators and frequency encoded columns the count
+        of each value in the fitting data (0 for unseen values).
+
+        Args:
+            data (pd.DataFrame): Raw policy rows.
+
+        Returns:
+            pd.DataFrame: The unscaled feature matrix, one column per feature name.
+        """
+        return self._dense_matrix(*self._encode_parts(data))
+
+    def _dense_matrix(self, dense: pd.DataFrame, onehot: dict) -> pd.DataFrame:
+        """
+        Appends the one-hot codes to the other features as uint8 indicator columns.
+        """
+        columns = {}
+        for col, codes in onehot.items():
+            categories = self.onehot_categories[col]
+            indicators = (codes[:, None] == np.arange(1, len(categories))).astype(np.uint8)
+            for position, category in enumerate(categories[1:]):
+                columns[f'{col}_{category}'] = indicators[:, position]
+        return pd.concat([dense, pd.DataFrame(columns, index=dense.index)], axis=1)
+
+    def encode_sparse(self, data: pd.DataFrame) -> sparse.csr_matrix:
+        """
+        Encodes the rows like encode(), as a CSR matrix built directly from the one-hot codes.
+
+        Args:
+            data (pd.DataFrame): Raw policy rows.
+
+        Returns:
+            sparse.csr_matrix: The unscaled float32 feature matrix, columns in `feature_names` order.
+        """
+        return self._sparse_matrix(*self._encode_parts(data))
+
+    def _sparse_matrix(self, dense: pd.DataFrame, onehot: dict) -> sparse.csr_matrix:
+        """
+        Stacks the other features and the one-hot indicators into one CSR matrix.
+        """
+        blocks = [sparse.csr_matrix(dense.to_numpy(dtype=np.float32))]
+        blocks.extend(self._onehot_block(col, codes) for col, codes in onehot.items())
+        return sparse.hstack(blocks, format='csr')
+
+    def _onehot_block(self, col: str, codes: np.ndarray) -> sparse.csr_matrix:
+        """
+        Builds the CSR indicators of a one-hot column; the first category, unseen and missing values are all zeros.
+        """
+        rows = np.flatnonzero(codes >= 1)
+        values = np.ones(len(rows), dtype=np.float32)
+        shape = (len(codes), len(self.onehot_categories[col]) - 1)
+        return sparse.csr_matrix((values, (rows, codes[rows] - 1)), shape=shape)
+
+    def transform(self, data: pd.DataFrame):
+        """
+        Encodes, scales and selects the features of a new batch.
+
+        Only the selected columns are scaled, using the fitted scaler's means and scales.
+        A sparse pipeline returns a CSR matrix instead: the selected non-one-hot columns are
+        standardized and the selected one-hot indicators are kept as 0/1 so they stay sparse.
+
+        Args:
+            data (pd.DataFrame): Raw policy rows.
+
+        Returns:
+            pd.DataFrame or sparse.csr_matrix: The scaled, selected features, in `selected_features` order.
+        """
+        if self.selector is None:
+            raise RuntimeError("The pipeline is not fitted. Call fit() first.")
+        # Columns that were not selected are never encoded
+        selected = set(self.selected_features)
+        dense, onehot = self._encode_parts(data, features=self.selected_features)
+        support = self.selector.get_support()
+        mean, scale = self.scaler.mean_[support], self.scaler.scale_[support]
+
+        # Selected features list the non-one-hot columns first, like feature_names
+        n_dense = dense.shape[1]
+        scaled = (dense.to_numpy(dtype=np.float64) - mean[:n_dense]) / scale[:n_dense]
+        indicators = []
+        for col, codes in onehot.items():
+            positions = [position for position, category in enumerate(self.onehot_categories[col][1:])
+                         if f'{col}_{category}' in selected]
+            indicators.append(self._onehot_block(col, codes)[:, positions])
+
+        if self.sparse:
+            return sparse.hstack([sparse.csr_matrix(scaled.astype(np.float32))] + indicators, format='csr')
+
+        if indicators:
+            values = sparse.hstack(indicators, format='csr').toarray()
+            scaled = np.hstack([scaled, (values - mean[n_dense:]) / scale[n_dense:]])
+        return pd.DataFrame(scaled, columns=self.selected_features, index=dense.index)
+
+    def fit_transform(self, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Fits the pipeline and transforms the same rows.
+        """
+        return self.fit(data).transform(data)
+
+    def save(self, path: str) -> None:
+        """
+        Serializes the fitted pipeline with pickle.
+
+        Args:
+            path (str): File to write.
+        """
+        with open(path, 'wb') as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, path: str) -> 'PreprocessingPipeline':
+        """
+        Loads a pipeline written by save(). Only load files from trusted sources.
+
+        Args:
+            path (str): File written by save().
+
+        Returns:
+            PreprocessingPipeline: The fitted pipeline.
+        """
+        with open(path, 'rb') as f:
+            pipeline = pickle.load(f)
+        if not isinstance(pipeline, cls):
+            raise TypeError(f"{path} does not contain a {cls.__name__}.")
+        return pipeline
@@ -0,0 +1,177 @@
+# scripts/report_export.py
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Union
+import matplotlib
+import pandas as pd
+
+try:
+    from scripts.data_visualization import DataVisualizer
+    from scripts.load_data import _require_pyarrow, read_columnar
+except ImportError:
+    # Notebooks import the scripts directly with the scripts/ directory on sys.path
+    from data_visualization import DataVisualizer
+    from load_data import _require_pyarrow, read_columnar
+
+# Plot kinds supported by the batch export, mapped to the DataVisualizer method that draws them
+PLOT_METHODS = {
+    'univariate': 'univariate_analysis',
+    'scatter': 'scatter_plot',
+    'correlation': 'correlation_matrix',
+    'correlation_heatmap': 'plot_correlation_heatmap',
+    'geographical_trends': 'plot_geographical_trends',
+    'outliers_boxplot': 'plot_outliers_boxplot',
+    'violin': 'plot_violin_premium_by_cover',
+    'pairplot': 'plot_pairplot',
+}
+
+# Visualizer used by the current worker process, created once by _init_worker
+_worker_visualizer = None
+
+
+def _empty_frame(data: Union[pd.DataFrame, str]) -> pd.DataFrame:
+    """
+    Returns the data with no rows, reading only the schema of a columnar file.
+    """
+    if not isinstance(data, str):
+        return data.iloc[:0]
+    pa = _require_pyarrow()
+    if data.endswith('.parquet'):
+        schema = pa.parquet.read_schema(data)
+    else:
+        with pa.memory_map(data) as source:
+            schema = pa.ipc.open_file(source).schema
+    return schema.empty_table().to_pandas()
+
+
+def _split_specs(specs: list, data: Union[pd.DataFrame, str]) -> list:
+    """
+    Splits plot specs into independent figure tasks; univariate plots become one task per column.
+
+    Univariate specs without 'num_cols' or 'cat_cols' plot the columns univariate_analysis
+    detects by default.
+
+    Args:
+        specs (list): Plot specs, each a dict with a 'kind' key plus the method's keyword arguments.
+        data (pd.DataFrame or str): The data to plot, or the path of a columnar file.
+
+    Returns:
+        list: (kind, kwargs) tuples, one per figure.
+    """
+    tasks = []
+    detected = None
+    for spec in specs:
+        spec = dict(spec)
+        kind = spec.pop('kind')
+        if kind not in PLOT_METHODS:
+            raise ValueError(f"Unknown plot kind: {kind}. Expected one of {sorted(PLOT_METHODS)}.")
+
+        if kind == 'univariate':
+            num_cols, cat_cols = spec.get('num_cols'), spec.get('cat_cols')
+            if num_cols is None or cat_cols is None:
+                if detected is None:
+                    detected = DataVisualizer.univariate_columns(_empty_frame(data))
+                num_cols = detected[0] if num_cols is None else num_cols
+                cat_cols = detected[1] if cat_cols is None else cat_cols
+            for col in num_cols:
+                tasks.append((kind, {'num_cols': [col], 'cat_cols': []}))
+            for col in cat_cols:
+                tasks.append((kind, {'num_cols': [], 'cat_cols': [col]}))
+        else:
+            tasks.append((kind, spec))
+    return tasks
+
+
+def _init_worker(data: Union[pd.DataFrame, str], output_dir: str, formats: tuple, aggregate: bool,
+                 headless: bool = True) -> None:
+    """
+    Switches the worker to the Agg backend and builds its DataVisualizer once.
+    """
+    global _worker_visualizer
+    if headless:
+        matplotlib.use('Agg', force=True)
+    if isinstance(data, str):
+        data = read_columnar(data)
+    _worker_visualizer = DataVisualizer(data, aggregate=aggregate, output_dir=output_dir, formats=formats)
+
+
+def _render(task: tuple) -> dict:
+    """
+    Renders one figure task with the worker's visualizer and times it.
+    """
+    kind, kwargs = task
+    vis = _worker_visualizer
+    n_saved = len(vis.saved_figures)
+
+    start_wall, start_cpu = time.perf_counter(), time.process_time()
+    getattr(vis, PLOT_METHODS[kind])(**kwargs)
+    return {
+        'kind': kind,
+        'arguments': json.dumps(kwargs, default=str),
+        'files': vis.saved_figures[n_saved:],
+        'wall_time_s': time.perf_counter() - start_wall,
+        'cpu_time_s': time.process_time() - start_cpu,
+        'pid': os.getpid(),
+    }
+
+
+def export_report(data: Union[pd.DataFrame, str], specs: list, output_dir: str, formats=('png',),
+                  max_workers: Optional[int] = None, aggregate: bool = True) -> pd.DataFrame:
+    """
+    Renders a batch of plots to image files, in parallel.
+
+    Independent figures are rendered in a process pool of headless (Agg) workers;
+    every worker builds its own DataVisualizer once. Each figure records its wall
+    and CPU time.
+
+    Args:
+        data (pd.DataFrame or str): The data to plot, or the path of a columnar file
+            written by write_columnar (each worker then memory-maps it instead of receiving a copy).
+        specs (list): Plot specs, e.g. {'kind': 'univariate', 'num_cols': [...], 'cat_cols': [...]}
+            (columns left out are detected like univariate_analysis does),
+            {'kind': 'correlation', 'cols': [...]}, {'kind': 'geographical_trends', 'cover_types': [...]}
+            or {'kind': 'outliers_boxplot', 'cols': [...]}. See PLOT_METHODS for all kinds.
+        output_dir (str): Directory to write the figures to.
+        formats (tuple): File formats to save each figure in, e.g. ('png', 'svg').
+        max_workers (int): Number of worker processes. If 1, figures render in the current process.
+            Defaults to the number of CPUs.
+        aggregate (bool): Render from pre-aggregated summaries (see DataVisualizer).
+
+    Returns:
+        pd.DataFrame: One row per figure with its files and timings.
+    """
+    tasks = _split_specs(specs, data)
+    max_workers = max_workers or os.cpu_count() or 1
+    init_args = (data, output_dir, tuple(formats), aggregate)
+
+    if max_workers == 1 or len(tasks) <= 1:
+        # Figures are saved and closed, so the caller's backend (and open figures) can stay as they are
+        _init_worker(*init_args, headless=False)
+        records = [_render(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(tasks)),
+                                 initializer=_init_worker, initargs=init_args) as executor:
+            records = list(executor.map(_render, tasks))
+
+    return pd.DataFrame(records, columns=['kind', 'arguments', 'files', 'wall_time_s', 'cpu_time_s', 'pid'])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Render a batch of EDA plots to image files.')
+    parser.add_argument('data', help='Columnar data file written by write_columnar (.feather or .parquet)')
+    parser.add_argument('specs', help='JSON file with a list of plot specs')
+    parser.add_argument('output_dir', help='Directory to write the figures to')
+    parser.add_argument('--formats', nargs='+', default=['png'], help='File formats, e.g. png svg')
+    parser.add_argument('--max-workers', type=int, default=None, help='Number of worker processes')
+    parser.add_argument('--raw', action='store_true', help='Render from raw rows instead of pre-aggregated summaries')
+    args = parser.parse_args()
+
+    with open(args.specs) as f:
+        plot_specs = json.load(f)
+    timings = export_report(args.data, plot_specs, args.output_dir, formats=args.formats,
+                            max_workers=args.max_workers, aggregate=not args.raw)
+    timings.to_csv(os.path.join(args.output_dir, 'timings.csv'), index=False)
+    print(timings[['kind', 'arguments', 'wall_time_s']].to_string(index=False))
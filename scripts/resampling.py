@@ -0,0 +1,195 @@
+# scripts/resampling.py
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, NamedTuple, Optional, Union
+import numpy as np
+
+# Memory budget for one block of resampling indices and gathered values
+DEFAULT_BLOCK_BYTES = 64 * 2**20
+
+# Arrays shared by the blocks of the current worker process, set once by _init_worker
+_worker_arrays = None
+
+
+class ResamplingResult(NamedTuple):
+    statistic: float
+    p_value: float
+    n_resamples: int
+    confidence_interval: Optional[tuple] = None
+
+
+def _as_statistic(statistic: Union[str, Callable]) -> Callable:
+    """
+    Resolves a statistic name to a function reducing along the last axis.
+    """
+    if callable(statistic):
+        return statistic
+    if statistic == 'mean':
+        return np.mean
+    if statistic == 'median':
+        return np.median
+    raise ValueError(f"Unknown statistic: {statistic}. Use 'mean', 'median' or a callable(x, axis).")
+
+
+def _block_sizes(n_resamples: int, n_values: int, block_bytes: int) -> list:
+    """
+    Splits the resamples into blocks whose index matrices fit the memory budget.
+
+    The split only depends on the problem size, so results are identical for any n_jobs.
+    """
+    # Index matrix (int64) plus the gathered values (float64) for every resample row
+    rows = max(1, block_bytes // (16 * max(n_values, 1)))
+    sizes = [rows] * (n_resamples // rows)
+    if n_resamples % rows:
+        sizes.append(n_resamples % rows)
+    return sizes
+
+
+def _init_worker(arrays: tuple) -> None:
+    """
+    Stores the arrays the worker resamples from, so they are sent once per process.
+    """
+    global _worker_arrays
+    _worker_arrays = arrays
+
+
+def _permutation_block(task: tuple) -> np.ndarray:
+    """
+    Computes the permuted statistic differences for one block of permutations.
+    """
+    size, seed, statistic = task
+    pooled, n_a = _worker_arrays
+    rng = np.random.default_rng(seed)
+    n = len(pooled)
+
+    # One permutation of the pooled positions per row
+    index = rng.permuted(np.broadcast_to(np.arange(n), (size, n)), axis=1)
+    if statistic is None:
+        # Mean difference: only group A has to be gathered, group B follows from the total
+        sums_a = pooled[index[:, :n_a]].sum(axis=1)
+        return sums_a / n_a - (pooled.sum() - sums_a) / (n - n_a)
+
+    values = pooled[index]
+    return statistic(values[:, :n_a], axis=-1) - statistic(values[:, n_a:], axis=-1)
+
+
+def _bootstrap_block(task: tuple) -> tuple:
+    """
+    Computes the null-centred and plain bootstrap statistic differences for one block.
+    """
+    size, seed, statistic = task
+    a, b, observed = _worker_arrays
+    rng = np.random.default_rng(seed)
+
+    sample_a = a[rng.integers(0, len(a), (size, len(a)))]
+    sample_b = b[rng.integers(0, len(b), (size, len(b)))]
+    differences = statistic(sample_a, axis=-1) - statistic(sample_b, axis=-1)
+    # Centring on the observed difference gives the distribution under the null
+    return differences - observed, differences
+
+
+def _run_blocks(block_func: Callable, arrays: tuple, sizes: list, statistic: Optional[Callable],
+                random_state: Optional[int], n_jobs: Optional[int]) -> list:
+    """
+    Runs the resampling blocks, seeded per block, in-process or in a process pool.
+    """
+    seeds = np.random.SeedSequence(random_state).spawn(len(sizes))
+    tasks = [(size, seed, statistic) for size, seed in zip(sizes, seeds)]
+    n_jobs = os.cpu_count() if n_jobs == -1 else (n_jobs or 1)
+
+    if n_jobs == 1 or len(tasks) == 1:
+        _init_worker(arrays)
+        return [block_func(task) for task in tasks]
+
+    with ProcessPoolExecutor(max_workers=min(n_jobs, len(tasks)), initializer=_init_worker,
+                             initargs=(arrays,)) as executor:
+        return list(executor.map(block_func, tasks))
+
+
+def _clean(values) -> np.ndarray:
+    """
+    Converts values to a float64 array without missing values.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    return values[~np.isnan(values)]
+
+
+def permutation_test(a, b, statistic: Union[str, Callable] = 'mean', n_resamples: int = 10000,
+                     random_state: Optional[int] = None, n_jobs: Optional[int] = 1,
+                     block_bytes: int = DEFAULT_BLOCK_BYTES) -> ResamplingResult:
+    """
+    Two-sided permutation test for a difference in a statistic between two groups.
+
+    Permutations are drawn as batched index matrices, a memory-bounded block at a time.
+
+    Args:
+        a (array-like): Values of group A. Missing values are dropped.
+        b (array-like): Values of group B. Missing values are dropped.
+        statistic (str or Callable): 'mean', 'median' or a callable(x, axis) reducing along an axis.
+        n_resamples (int): Number of permutations.
+        random_state (int): Seed; results are reproducible for any n_jobs.
+        n_jobs (int): Number of worker processes; -1 uses all CPUs.
+        block_bytes (int): Memory budget of one block of permutations.
+
+    Returns:
+        ResamplingResult: The observed difference and its permutation p-value.
+    """
+    a, b = _clean(a), _clean(b)
+    if len(a) == 0 or len(b) == 0:
+        raise ValueError("Both groups need at least one non-missing value.")
+
+    stat = _as_statistic(statistic)
+    observed = float(stat(a) - stat(b))
+    pooled = np.concatenate([a, b])
+
+    sizes = _block_sizes(n_resamples, len(pooled), block_bytes)
+    blocks = _run_blocks(_permutation_block, (pooled, len(a)), sizes,
+                         None if statistic == 'mean' else stat, random_state, n_jobs)
+    null = np.concatenate(blocks)
+
+    # Small tolerance so ties with the observed value are not lost to rounding
+    extreme = np.count_nonzero(np.abs(null) >= abs(observed) * (1 - 1e-12))
+    p_value = float((extreme + 1) / (n_resamples + 1))
+    return ResamplingResult(observed, p_value, n_resamples)
+
+
+def bootstrap_test(a, b, statistic: Union[str, Callable] = 'mean', n_resamples: int = 10000,
+                   confidence_level: float = 0.95, random_state: Optional[int] = None,
+                   n_jobs: Optional[int] = 1, block_bytes: int = DEFAULT_BLOCK_BYTES) -> ResamplingResult:
+    """
+    Two-sided bootstrap test for a difference in a statistic between two groups.
+
+    Each group is resampled with replacement. The p-value uses the bootstrap
+    distribution centred on zero (the null of equal statistics); the percentile
+    confidence interval uses the uncentred distribution.
+
+    Args:
+        a (array-like): Values of group A. Missing values are dropped.
+        b (array-like): Values of group B. Missing values are dropped.
+        statistic (str or Callable): 'mean', 'median' or a callable(x, axis) reducing along an axis.
+        n_resamples (int): Number of bootstrap resamples.
+        confidence_level (float): Level of the percentile confidence interval.
+        random_state (int): Seed; results are reproducible for any n_jobs.
+        n_jobs (int): Number of worker processes; -1 uses all CPUs.
+        block_bytes (int): Memory budget of one block of resamples.
+
+    Returns:
+        ResamplingResult: The observed difference, its bootstrap p-value and confidence interval.
+    """
+    a, b = _clean(a), _clean(b)
+    if len(a) == 0 or len(b) == 0:
+        raise ValueError("Both groups need at least one non-missing value.")
+
+    stat = _as_statistic(statistic)
+    observed = float(stat(a) - stat(b))
+
+    sizes = _block_sizes(n_resamples, len(a) + len(b), block_bytes)
+    blocks = _run_blocks(_bootstrap_block, (a, b, observed), sizes, stat, random_state, n_jobs)
+    null = np.concatenate([block[0] for block in blocks])
+    differences = np.concatenate([block[1] for block in blocks])
+
+    extreme = np.count_nonzero(np.abs(null) >= abs(observed) * (1 - 1e-12))
+    p_value = float((extreme + 1) / (n_resamples + 1))
+    alpha = 1 - confidence_level
+    low, high = np.quantile(differences, [alpha / 2, 1 - alpha / 2])
+    return ResamplingResult(observed, p_value, n_resamples, (float(low), float(high)))
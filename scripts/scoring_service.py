@@ -0,0 +1,405 @@
+# scripts/scoring_service.py
+import argparse
+import json
+import pickle
+import queue
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+try:
+    from scripts.preprocessing_pipeline import PreprocessingPipeline
+except ImportError:
+    # Notebooks import the scripts directly with the scripts/ directory on sys.path
+    from preprocessing_pipeline import PreprocessingPipeline
+
+
+class PremiumScorer:
+
+    def __init__(self, pipeline: PreprocessingPipeline, model):
+        """
+        Initialize a scorer from a fitted preprocessing pipeline and a trained model.
+
+        Args:
+            pipeline (PreprocessingPipeline): Fitted pipeline turning raw policy records into features.
+            model: Trained regressor with a predict method (e.g. from model_training.make_model),
+                fitted on the pipeline's selected features.
+        """
+        self.pipeline = pipeline
+        self.model = model
+        self.required_columns = pipeline.required_columns()
+
+    @classmethod
+    def load(cls, pipeline_path: str, model_path: str) -> 'PremiumScorer':
+        """
+        Loads the pipeline written by PreprocessingPipeline.save and a pickled model, once.
+        Only load files from trusted sources.
+        """
+        pipeline = PreprocessingPipeline.load(pipeline_path)
+        with open(model_path, 'rb') as f:
+            model = pickle.load(f)
+        return cls(pipeline, model)
+
+    def save(self, pipeline_path: str, model_path: str) -> None:
+        """
+        Writes the pipeline and the pickled model, for load().
+        """
+        self.pipeline.save(pipeline_path)
+        with open(model_path, 'wb') as f:
+            pickle.dump(self.model, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def to_frame(records) -> pd.DataFrame:
+        """
+        Converts policy records to a DataFrame.
+
+        Args:
+            records: A dict (one policy), a list of dicts, a DataFrame, or a pyarrow RecordBatch or Table.
+
+        Returns:
+            pd.DataFrame: One row per policy.
+        """
+        if isinstance(records, pd.DataFrame):
+            return records
+        if isinstance(records, dict):
+            records = [records]
+        if isinstance(records, list):
+            return pd.DataFrame.from_records(records)
+        if hasattr(records, 'to_pandas'):
+            # pyarrow RecordBatch or Table; pyarrow is only needed when such batches are sent
+            return records.to_pandas()
+        raise TypeError(f"Unsupported records type: {type(records).__name__}.")
+
+    def check_columns(self, records) -> None:
+        """
+        Checks that the records have every column the selected features are computed from.
+
+        Each dict of a list is checked on its own, as a DataFrame built from several dicts has
+        the columns of any of them.
+
+        Args:
+            records: Policy records; see to_frame.
+
+        Raises:
+            ValueError: If a required column is missing, from any record of a list.
+        """
+        if isinstance(records, dict):
+            records = [records]
+        if isinstance(records, list):
+            present = set.intersection(*(set(record) for record in records)) if records else None
+        elif isinstance(records, pd.DataFrame):
+            present = set(records.columns)
+        else:
+            # pyarrow RecordBatch or Table
+            present = set(records.schema.names)
+        missing = [] if present is None else [col for col in self.required_columns if col not in present]
+        if missing:
+            # The pipeline would silently encode them as 0
+            raise ValueError(f"Records are missing required columns: {missing}")
+
+    def predict(self, records) -> np.ndarray:
+        """
+        Predicts the premium of every record.
+
+        Args:
+            records: Policy records; see to_frame.
+
+        Returns:
+            np.ndarray: One prediction per record.
+
+        Raises:
+            ValueError: If the records lack a column the selected features are computed from.
+        """
+        frame = self.to_frame(records)
+        if frame.empty:
+            return np.empty(0, dtype=np.float64)
+        self.check_columns(records)
+        X = self.pipeline.transform(frame)
+        if not sparse.issparse(X):
+            # Models are trained on FeatureMatrix arrays, without column names
+            X = X.to_numpy(dtype=np.float32)
+        return np.asarray(self.model.predict(X), dtype=np.float64)
+
+
+class MicroBatcher:
+
+    def __init__(self, scorer: PremiumScorer, max_batch_size: int = 256, max_wait_ms: float = 2.0):
+        """
+        Initialize a background thread that groups concurrent requests into one predict call.
+
+        A batch is sent to the model as soon as it holds `max_batch_size` records, or
+        `max_wait_ms` after its first request arrived, whichever comes first. One vectorized
+        call for many small requests is far cheaper than one call per request.
+
+        Args:
+            scorer (PremiumScorer): The scorer to batch requests for.
+            max_batch_size (int): Largest number of records per predict call.
+            max_wait_ms (float): Longest time a request waits for others to join its batch.
+        """
+        self.scorer = scorer
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.batch_sizes = deque(maxlen=10_000)
+        self._requests = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='premium-micro-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, records) -> Future:
+        """
+        Queues records for scoring.
+
+        Args:
+            records: Policy records; see PremiumScorer.to_frame.
+
+        Returns:
+            Future: Resolves to the array of predictions of these records.
+        """
+        if self._thread is None:
+            raise RuntimeError("The batcher is closed.")
+        future = Future()
+        if isinstance(records, dict):
+            records = [records]
+        if not isinstance(records, list):
+            records = self.scorer.to_frame(records)
+        try:
+            # Checked per request: once combined with a complete request the batch would pass
+            self.scorer.check_columns(records)
+        except ValueError as e:
+            future.set_exception(e)
+            return future
+        # Lists of dicts are only turned into a DataFrame once per batch, in the batching thread
+        self._requests.put((records, future))
+        return future
+
+    def predict(self, records, timeout: Optional[float] = None) -> np.ndarray:
+        """
+        Scores records through the batcher and waits for the predictions.
+        """
+        return self.submit(records).result(timeout=timeout)
+
+    def _next_batch(self) -> Optional[list]:
+        """
+        Waits for a request, then collects more until the batch is full or the wait is over.
+        """
+        first = self._requests.get()
+        if first is None:
+            return None
+        batch, size = [first], len(first[0])
+        deadline = time.perf_counter() + self.max_wait
+        while size < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                request = self._requests.get(timeout=remaining) if remaining > 0 else self._requests.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                # Put the stop signal back so the loop ends after this batch
+                self._requests.put(None)
+                break
+            batch.append(request)
+            size += len(request[0])
+        return batch
+
+    def _combine(self, requests: list):
+        """
+        Joins the records of a batch's requests into one list of dicts or one DataFrame.
+        """
+        if all(isinstance(records, list) for records in requests):
+            return [record for records in requests for record in records]
+        frames = [self.scorer.to_frame(records) for records in requests]
+        return pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            requests = [records for records, _ in batch]
+            try:
+                predictions = self.scorer.predict(self._combine(requests))
+            except Exception as e:
+                if len(batch) == 1:
+                    batch[0][1].set_exception(e)
+                else:
+                    # Score the requests one by one so a malformed request only fails itself
+                    for request in batch:
+                        self._score_alone(*request)
+                continue
+            self.batch_sizes.append(len(predictions))
+            offsets = np.cumsum([0] + [len(records) for records in requests])
+            for (_, future), start, end in zip(batch, offsets[:-1], offsets[1:]):
+                future.set_result(predictions[start:end])
+
+    def _score_alone(self, records, future: Future) -> None:
+        """
+        Scores one request on its own, resolving its future with the predictions or the error.
+        """
+        try:
+            predictions = self.scorer.predict(records)
+        except Exception as e:
+            future.set_exception(e)
+            return
+        self.batch_sizes.append(len(predictions))
+        future.set_result(predictions)
+
+    def close(self) -> None:
+        """
+        Scores the queued requests and stops the background thread.
+        """
+        if self._thread is not None:
+            self._requests.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> 'MicroBatcher':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _records_from_json(payload):
+    """
+    Accepts {"records": [...]}, a list of records or a single record.
+    """
+    if isinstance(payload, dict) and 'records' in payload:
+        return payload['records']
+    return payload
+
+
+class _ScoringHandler(BaseHTTPRequestHandler):
+    # Keep-alive connections avoid a TCP handshake per quote
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are written separately; without this Nagle's algorithm delays small responses
+    disable_nagle_algorithm = True
+    batcher = None
+    timeout_s = 10.0
+
+    def _send_json(self, status: int, body: dict) -> None:
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._send_json(200, {'status': 'ok'})
+        else:
+            self._send_json(404, {'error': 'Not found'})
+
+    def do_POST(self):
+        if self.path != '/predict':
+            self._send_json(404, {'error': 'Not found'})
+            return
+        try:
+            payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            predictions = self.batcher.predict(_records_from_json(payload), timeout=self.timeout_s)
+        except (ValueError, TypeError, KeyError) as e:
+            self._send_json(400, {'error': str(e)})
+            return
+        except Exception as e:
+            self._send_json(500, {'error': str(e)})
+            return
+        self._send_json(200, {'predictions': predictions.tolist()})
+
+    def log_message(self, format, *args):
+        # Per-request logging would dominate the latency of small quotes
+        pass
+
+
+def make_http_server(batcher: MicroBatcher, host: str = '127.0.0.1', port: int = 8080) -> ThreadingHTTPServer:
+    """
+    Creates an HTTP server scoring JSON records, as a local stand-in for the quoting system.
+
+    POST /predict takes {"records": [...]} (or a list of records, or one record) and returns
+    {"predictions": [...]}. GET /health returns {"status": "ok"}. Requests handled by the
+    server's threads are micro-batched together.
+
+    Args:
+        batcher (MicroBatcher): The batcher scoring the requests.
+        host (str): Interface to bind.
+        port (int): Port to bind; 0 picks a free port (see server.server_address).
+
+    Returns:
+        ThreadingHTTPServer: The server; call serve_forever() to start it.
+    """
+    handler = type('ScoringHandler', (_ScoringHandler,), {'batcher': batcher})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def serve_stdio(batcher: MicroBatcher, stdin=None, stdout=None) -> int:
+    """
+    Scores JSON lines from stdin and writes one JSON line of predictions per input line, in order.
+
+    Lines are submitted as they are read so consecutive lines can share a batch.
+
+    Args:
+        batcher (MicroBatcher): The batcher scoring the requests.
+        stdin: Input stream (defaults to sys.stdin).
+        stdout: Output stream (defaults to sys.stdout).
+
+    Returns:
+        int: Number of lines scored.
+    """
+    stdin = stdin or sys.stdin
+    stdout = stdout or sys.stdout
+    pending = deque()
+
+    def write(future):
+        try:
+            line = {'predictions': future.result().tolist()}
+        except Exception as e:
+            line = {'error': str(e)}
+        stdout.write(json.dumps(line) + '\n')
+
+    n_lines = 0
+    for line in stdin:
+        if not line.strip():
+            continue
+        try:
+            future = batcher.submit(_records_from_json(json.loads(line)))
+        except Exception as e:
+            future = Future()
+            future.set_exception(e)
+        pending.append(future)
+        n_lines += 1
+        while pending and pending[0].done():
+            write(pending.popleft())
+    while pending:
+        write(pending.popleft())
+    stdout.flush()
+    return n_lines
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Score policy records with a trained premium model.')
+    parser.add_argument('pipeline', help='Pipeline written by PreprocessingPipeline.save')
+    parser.add_argument('model', help='Pickled trained model')
+    parser.add_argument('--http', type=int, default=None, metavar='PORT', help='Serve HTTP on this port instead of stdin/stdout')
+    parser.add_argument('--host', default='127.0.0.1', help='Interface to bind the HTTP server to')
+    parser.add_argument('--max-batch-size', type=int, default=256, help='Largest number of records per predict call')
+    parser.add_argument('--max-wait-ms', type=float, default=2.0, help='Longest wait for a batch to fill')
+    args = parser.parse_args()
+
+    with MicroBatcher(PremiumScorer.load(args.pipeline, args.model), max_batch_size=args.max_batch_size,
+                      max_wait_ms=args.max_wait_ms) as premium_batcher:
+        if args.http is None:
+            serve_stdio(premium_batcher)
+        else:
+            http_server = make_http_server(premium_batcher, args.host, args.http)
+            print(f"Serving on http://{args.host}:{http_server.server_address[1]}", file=sys.stderr)
+            try:
+                http_server.serve_forever()
+            except KeyboardInterrupt:
+                http_server.server_close()
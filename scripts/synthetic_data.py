@@ -0,0 +1,374 @@
+# scripts/synthetic_data.py
+import io
+import os
+import zipfile
+from functools import lru_cache
+from typing import IO, Iterator, Union
+import numpy as np
+import pandas as pd
+
+# Name of the policy file inside the nested archive, as in the real data
+FILENAME = 'MachineLearningRating_v3.txt'
+
+# Default number of rows generated (and written) at a time
+DEFAULT_CHUNK_ROWS = 500_000
+
+# The 52 columns of MachineLearningRating_v3.txt, in file order
+POLICY_COLUMNS = [
+    'UnderwrittenCoverID', 'PolicyID', 'TransactionMonth', 'IsVATRegistered', 'Citizenship', 'LegalType',
+    'Title', 'Language', 'Bank', 'AccountType', 'MaritalStatus', 'Gender', 'Country', 'Province', 'PostalCode',
+    'MainCrestaZone', 'SubCrestaZone', 'ItemType', 'mmcode', 'VehicleType', 'RegistrationYear', 'make', 'Model',
+    'Cylinders', 'cubiccapacity', 'kilowatts', 'bodytype', 'NumberOfDoors', 'VehicleIntroDate',
+    'CustomValueEstimate', 'AlarmImmobiliser', 'TrackingDevice', 'CapitalOutstanding', 'NewVehicle', 'WrittenOff',
+    'Rebuilt', 'Converted', 'CrossBorder', 'NumberOfVehiclesInFleet', 'SumInsured', 'TermFrequency',
+    'CalculatedPremiumPerTerm', 'ExcessSelected', 'CoverCategory', 'CoverType', 'CoverGroup', 'Section', 'Product',
+    'StatutoryClass', 'StatutoryRiskType', 'TotalPremium', 'TotalClaims',
+]
+
+# Share of missing values per column in the real data (eda_notebook.ipynb). Columns of the
+# same group are missing together: the vehicle columns, and WrittenOff/Rebuilt/Converted.
+MISSING_RATES = {
+    'NumberOfVehiclesInFleet': 1.0,
+    'CrossBorder': 0.9993,
+    'CustomValueEstimate': 0.7796,
+    'WrittenOff': 0.6418,
+    'NewVehicle': 0.1533,
+    'Bank': 0.1459,
+    'AccountType': 0.0402,
+    'Gender': 0.0095,
+    'MaritalStatus': 0.0083,
+    'make': 0.00055,
+    'CapitalOutstanding': 0.000002,
+}
+VEHICLE_COLUMNS = ['mmcode', 'VehicleType', 'make', 'Model', 'Cylinders', 'cubiccapacity', 'kilowatts',
+                   'bodytype', 'NumberOfDoors', 'VehicleIntroDate']
+CONDITION_COLUMNS = ['WrittenOff', 'Rebuilt', 'Converted']
+
+# Number of distinct postal codes in the real data
+N_POSTAL_CODES = 888
+
+PROVINCES = {
+    'Gauteng': (0.393, ['Rand East', 'Johannesburg', 'Pretoria', 'Rand West']),
+    'Western Cape': (0.170, ['Cape Peninsula', 'Karoo', 'Western Cape Coast']),
+    'KwaZulu-Natal': (0.170, ['Natal (Durban)', 'Natal Coast', 'Natal Midlands']),
+    'North West': (0.143, ['North West', 'Rustenburg']),
+    'Mpumalanga': (0.052, ['Mpumalanga', 'Highveld']),
+    'Eastern Cape': (0.031, ['Port Elizabeth', 'East London', 'Transkei']),
+    'Limpopo': (0.025, ['Northern Province', 'Polokwane']),
+    'Free State': (0.008, ['Free State', 'Bloemfontein']),
+    'Northern Cape': (0.008, ['Northern Cape', 'Kimberley']),
+}
+
+# make, Model, Cylinders, cubiccapacity, kilowatts, bodytype, NumberOfDoors, mmcode, VehicleIntroDate, weight
+VEHICLES = [
+    ('TOYOTA', 'QUANTUM 2.7 SESFIKILE 16s', 4, 2694, 111, 'B/S', 4, 60058418, '1/2012', 0.38),
+    ('TOYOTA', 'QUANTUM 2.7 SESFIKILE 15s', 4, 2694, 111, 'B/S', 4, 60058417, '1/2012', 0.18),
+    ('TOYOTA', 'QUANTUM 2.5 D-4D SESFIKILE 16s', 4, 2494, 75, 'B/S', 4, 60056161, '7/2007', 0.10),
+    ('HYUNDAI', 'H-1 2.5 VGTi MULTICAB', 4, 2497, 125, 'MPV', 4, 39015441, '9/2008', 0.06),
+    ('VOLKSWAGEN', 'POLO VIVO 1.4 TRENDLINE 5Dr', 4, 1390, 55, 'H/B', 5, 64060910, '3/2010', 0.06),
+    ('NISSAN', 'NP200 1.6', 4, 1598, 64, 'P/U', 2, 44070201, '8/2008', 0.05),
+    ('TOYOTA', 'HILUX 2.7 VVTi RB SRX', 4, 2694, 111, 'P/U', 2, 60027200, '4/2005', 0.05),
+    ('FORD', 'RANGER 2.2TDCi XL P/U SUP/CAB', 4, 2198, 88, 'P/U', 2, 22029140, '1/2012', 0.04),
+    ('MERCEDES-BENZ', 'E 240', 6, 2597, 130, 'S/D', 4, 44069150, '6/2002', 0.03),
+    ('MAZDA', 'DRIFTER 2500 TD', 4, 2499, 80, 'P/U', 2, 41011250, '1/2001', 0.03),
+    ('IVECO', 'DAILY 50C15 P/V', 4, 2998, 107, 'P/V', 2, 35050220, '5/2007', 0.02),
+]
+
+# CoverType, CoverCategory, CoverGroup, ExcessSelected, weight, premium per term, sum insured, claim probability.
+# A sum insured of None is rated on the vehicle value.
+COVERS = [
+    ('Own Damage', 'Own damage', 'Comprehensive - Taxi', 'Mobility - Metered Taxis - R2000', 0.104, None, None, 0.012),
+    ('Passenger Liability', 'Passenger Liability', 'Comprehensive - Taxi', 'No excess', 0.104, 12.0, 500_000.0, 0.003),
+    ('Windscreen', 'Windscreen', 'Comprehensive - Taxi', 'Mobility - Windscreen', 0.104, 25.0, 5_000.0, 0.004),
+    ('Third Party', 'Third Party', 'Comprehensive - Taxi', 'No excess', 0.104, 30.0, 500_000.0, 0.002),
+    ('Keys and Alarms', 'Keys and Alarms', 'Comprehensive - Taxi', 'No excess', 0.104, 3.2, 5_000.0, 0.0005),
+    ('Emergency Charges', 'Emergency Charges', 'Comprehensive - Taxi', 'No excess', 0.104, 3.2, 5_000.0, 0.0005),
+    ('Cleaning and Removal of Accident Debris', 'Cleaning and Removal of Accident Debris', 'Comprehensive - Taxi',
+     'No excess', 0.104, 3.2, 5_000.0, 0.0005),
+    ('Signage and Vehicle Wraps', 'Signage and Vehicle Wraps', 'Comprehensive - Taxi', 'No excess', 0.104, 4.5,
+     7_500.0, 0.0003),
+    ('Foreign Vehicle', 'Foreign Vehicle', 'Comprehensive - Taxi', 'No excess', 0.103, 8.4, 7_500.0, 0.0003),
+    ('Income Protector', 'Income Protector', 'Income Protector', 'No excess', 0.010, 90.0, 3_000.0, 0.001),
+    ('Accidental Death', 'Accidental Death', 'Comprehensive - Taxi', 'No excess', 0.045, 8.0, 50_000.0, 0.0002),
+    ('Baggage/Luggage', 'Baggage/Luggage', 'Baggage/Luggage', 'No excess', 0.005, 2.0, 5_000.0, 0.0002),
+    ('Cash Takings', 'Cash Takings', 'Cash Takings', 'No excess', 0.004, 5.0, 5_000.0, 0.0002),
+    ('Trailer', 'Trailer', 'Trailer', 'Mobility - Trailers', 0.001, 15.0, 25_000.0, 0.001),
+]
+
+# Other categorical columns: values and their shares in the real data
+CATEGORIES = {
+    'Citizenship': (['  ', 'ZA', 'AF', 'ZW'], [0.895, 0.104, 0.0007, 0.0003]),
+    'LegalType': (['Individual', 'Private company', 'Public company', 'Close Corporation', 'Partnership',
+                   'Sole proprietor'], [0.911, 0.039, 0.004, 0.044, 0.001, 0.001]),
+    'Title': (['Mr', 'Mrs', 'Ms', 'Miss', 'Dr'], [0.9335, 0.0458, 0.0133, 0.0066, 0.0008]),
+    'Language': (['English'], [1.0]),
+    'Bank': (['First National Bank', 'Standard Bank', 'ABSA Bank', 'Nedbank', 'Capitec Bank', 'FirstRand Bank',
+              'Investec Bank', 'Mercantile Lisbon Bank'], [0.305, 0.235, 0.230, 0.185, 0.025, 0.015, 0.004, 0.001]),
+    'AccountType': (['Current account', 'Savings account', 'Transmission account'], [0.62, 0.37, 0.01]),
+    'MaritalStatus': (['Not specified', 'Single', 'Married'], [0.9944, 0.0043, 0.0013]),
+    'Gender': (['Not specified', 'Male', 'Female'], [0.9505, 0.0428, 0.0067]),
+    'VehicleType': (['Passenger Vehicle', 'Medium Commercial', 'Heavy Commercial', 'Light Commercial', 'Bus'],
+                    [0.942, 0.053, 0.0075, 0.0034, 0.0006]),
+    'AlarmImmobiliser': (['Yes', 'No'], [0.9992, 0.0008]),
+    'TrackingDevice': (['No', 'Yes'], [0.745, 0.255]),
+    'CapitalOutstanding': (['0', '119300', '52000', '250000', '95000'], [0.55, 0.15, 0.15, 0.1, 0.05]),
+    'NewVehicle': (['More than 6 months', 'Less than 6 months'], [0.999, 0.001]),
+    'WrittenOff': (['No', 'Yes'], [0.9999, 0.0001]),
+    'Rebuilt': (['No', 'Yes'], [0.9999, 0.0001]),
+    'Converted': (['No', 'Yes'], [0.9999, 0.0001]),
+    'CrossBorder': (['No'], [1.0]),
+    'TermFrequency': (['Monthly', 'Annual'], [0.996, 0.004]),
+    'Product': (['Mobility Metered Taxis: Monthly', 'Mobility Commercial Cover: Monthly',
+                 'Mobility Commercial Cover: Annual'], [0.63, 0.366, 0.004]),
+}
+
+# Months covered by the real data, with the book growing over time
+MONTHS = pd.date_range('2013-10-01', '2015-08-01', freq='MS')
+
+
+@lru_cache(maxsize=None)
+def _postal_codes() -> tuple:
+    """
+    Builds the fixed postal code catalogue: codes, their province and Zipf-like popularity.
+    """
+    rng = np.random.default_rng(888)
+    codes = np.sort(rng.choice(np.arange(1, 10_000), N_POSTAL_CODES, replace=False))
+    provinces = rng.choice(len(PROVINCES), N_POSTAL_CODES, p=_shares([share for share, _ in PROVINCES.values()]))
+    weights = 1.0 / rng.permutation(np.arange(1, N_POSTAL_CODES + 1)) ** 1.1
+    # Province shares follow the real data even though codes are drawn by popularity
+    province_totals = np.bincount(provinces, weights=weights, minlength=len(PROVINCES))
+    shares = _shares([share for share, _ in PROVINCES.values()])
+    weights = weights * (shares / np.where(province_totals > 0, province_totals, 1))[provinces]
+    return codes, provinces, _shares(weights)
+
+
+def _shares(weights) -> np.ndarray:
+    weights = np.asarray(weights, dtype=np.float64)
+    return weights / weights.sum()
+
+
+def _lookup(table: list, position: int) -> tuple:
+    """
+    Returns the code of every table row's value at `position` and the distinct values.
+    """
+    values = list(dict.fromkeys(row[position] for row in table))
+    return np.array([values.index(row[position]) for row in table]), values
+
+
+def _categorical(codes: np.ndarray, categories: list) -> pd.Categorical:
+    return pd.Categorical.from_codes(codes, categories=pd.Index(categories, dtype=object))
+
+
+def _with_missing(codes: np.ndarray, missing: np.ndarray) -> np.ndarray:
+    return np.where(missing, -1, codes)
+
+
+def generate_policies(n_rows: int, seed: int = 42, start: int = 0, categorical: bool = False) -> pd.DataFrame:
+    """
+    Generates synthetic policy rows with the schema of MachineLearningRating_v3.txt.
+
+    Categorical columns follow the real shares (mostly 'Not specified' genders, ~888 postal
+    codes with a Zipf-like popularity consistent with their province, ~14 cover types),
+    premiums and claims are heavy tailed (most claims are zero, a few are very large, a few
+    premiums are negative refunds) and missing values follow the real rates, including
+    columns that are missing together. Everything is vectorized: a million rows take about
+    a second as categoricals (converting the text columns to strings takes a few more).
+
+    Args:
+        n_rows (int): Number of rows.
+        seed (int): Seed of the generator. The same seed and start give the same rows.
+        start (int): Position of the first row, used to generate a large file chunk by chunk.
+        categorical (bool): Return text columns as categoricals instead of strings.
+
+    Returns:
+        pd.DataFrame: The rows, with the POLICY_COLUMNS columns in order.
+    """
+    rng = np.random.default_rng([seed, start])
+    n = n_rows
+    columns = {}
+
+    columns['UnderwrittenCoverID'] = np.arange(start, start + n, dtype=np.int64) + 1
+    # Several covers and months per policy, as in the real data
+    columns['PolicyID'] = (start + np.arange(n, dtype=np.int64)) // 140 + 1
+    month_weights = _shares(np.linspace(0.2, 1.0, len(MONTHS)) ** 2)
+    months = rng.choice(len(MONTHS), n, p=month_weights)
+    columns['TransactionMonth'] = _categorical(months, list(MONTHS.strftime('%Y-%m-%d %H:%M:%S')))
+    columns['IsVATRegistered'] = rng.random(n) < 0.0064
+
+    codes, code_provinces, code_weights = _postal_codes()
+    postal = rng.choice(N_POSTAL_CODES, n, p=code_weights)
+    provinces = code_provinces[postal]
+    zones = [zone for _, province_zones in PROVINCES.values() for zone in province_zones]
+    zone_offsets = np.cumsum([0] + [len(province_zones) for _, province_zones in PROVINCES.values()])
+    zone_counts = np.diff(zone_offsets)
+    # Each postal code lies in one cresta zone of its province
+    code_zones = zone_offsets[code_provinces] + codes % zone_counts[code_provinces]
+
+    vehicle = rng.choice(len(VEHICLES), n, p=_shares([v[-1] for v in VEHICLES]))
+    vehicle_missing = rng.random(n) < MISSING_RATES['make']
+    cover = rng.choice(len(COVERS), n, p=_shares([c[4] for c in COVERS]))
+    condition_missing = rng.random(n) < MISSING_RATES['WrittenOff']
+
+    def draw(column: str) -> np.ndarray:
+        values, shares = CATEGORIES[column]
+        drawn = rng.choice(len(values), n, p=_shares(shares))
+        if column in MISSING_RATES:
+            drawn = _with_missing(drawn, rng.random(n) < MISSING_RATES[column])
+        return drawn
+
+    for column in ['Citizenship', 'LegalType', 'Title', 'Language', 'Bank', 'AccountType', 'MaritalStatus', 'Gender']:
+        columns[column] = _categorical(draw(column), CATEGORIES[column][0])
+    columns['Country'] = _categorical(np.zeros(n, dtype=np.int64), ['South Africa'])
+    columns['Province'] = _categorical(provinces, list(PROVINCES))
+    columns['PostalCode'] = codes[postal]
+    columns['MainCrestaZone'] = _categorical(code_zones[postal], zones)
+    columns['SubCrestaZone'] = columns['MainCrestaZone']
+    columns['ItemType'] = _categorical(np.zeros(n, dtype=np.int64), ['Mobility - Motor'])
+
+    def vehicle_values(position: int) -> np.ndarray:
+        return np.where(vehicle_missing, np.nan, np.array([v[position] for v in VEHICLES], dtype=np.float64)[vehicle])
+
+    def vehicle_text(position: int) -> pd.Categorical:
+        lookup, values = _lookup(VEHICLES, position)
+        return _categorical(_with_missing(lookup[vehicle], vehicle_missing), values)
+
+    columns['mmcode'] = vehicle_values(7)
+    columns['VehicleType'] = _categorical(_with_missing(draw('VehicleType'), vehicle_missing),
+                                          CATEGORIES['VehicleType'][0])
+    columns['RegistrationYear'] = 2015 - np.minimum(rng.geometric(0.12, n) - 1, 28)
+    columns['make'] = vehicle_text(0)
+    columns['Model'] = vehicle_text(1)
+    columns['Cylinders'] = vehicle_values(2)
+    columns['cubiccapacity'] = vehicle_values(3)
+    columns['kilowatts'] = vehicle_values(4)
+    columns['bodytype'] = vehicle_text(5)
+    columns['NumberOfDoors'] = vehicle_values(6)
+    columns['VehicleIntroDate'] = vehicle_text(8)
+
+    vehicle_value = rng.lognormal(11.9, 0.5, n).round(-2)
+    columns['CustomValueEstimate'] = np.where(rng.random(n) < MISSING_RATES['CustomValueEstimate'],
+                                              np.nan, vehicle_value)
+    for column in ['AlarmImmobiliser', 'TrackingDevice', 'CapitalOutstanding', 'NewVehicle']:
+        columns[column] = _categorical(draw(column), CATEGORIES[column][0])
+    for column in CONDITION_COLUMNS:
+        values, shares = CATEGORIES[column]
+        columns[column] = _categorical(_with_missing(rng.choice(len(values), n, p=_shares(shares)),
+                                                     condition_missing), values)
+    columns['CrossBorder'] = _categorical(draw('CrossBorder'), CATEGORIES['CrossBorder'][0])
+    columns['NumberOfVehiclesInFleet'] = np.full(n, np.nan)
+
+    rated_on_value = np.array([c[6] is None for c in COVERS])[cover]
+    fixed_sum = np.array([c[6] or 0.0 for c in COVERS])[cover]
+    columns['SumInsured'] = np.where(rated_on_value, vehicle_value, fixed_sum * rng.choice([1.0, 1.5], n))
+    columns['TermFrequency'] = _categorical(draw('TermFrequency'), CATEGORIES['TermFrequency'][0])
+    fixed_premium = np.array([c[5] or 0.0 for c in COVERS])[cover]
+    premium_per_term = np.where(rated_on_value, vehicle_value * 0.0018, fixed_premium)
+    premium_per_term = (premium_per_term * rng.lognormal(0, 0.35, n)).round(4)
+    columns['CalculatedPremiumPerTerm'] = premium_per_term
+    for column, position in [('ExcessSelected', 3), ('CoverCategory', 1), ('CoverType', 0), ('CoverGroup', 2)]:
+        lookup, values = _lookup(COVERS, position)
+        columns[column] = _categorical(lookup[cover], values)
+    columns['Section'] = _categorical(np.zeros(n, dtype=np.int64), ['Motor Comprehensive'])
+    columns['Product'] = _categorical(draw('Product'), CATEGORIES['Product'][0])
+    columns['StatutoryClass'] = _categorical(np.zeros(n, dtype=np.int64), ['Commercial'])
+    columns['StatutoryRiskType'] = _categorical(np.zeros(n, dtype=np.int64), ['IFRS Constant'])
+
+    # Premium excludes 14% VAT; about half the months carry no premium and a few rows are refunds
+    premium = premium_per_term / 1.14 * (rng.random(n) < 0.55)
+    refunds = rng.random(n) < 0.001
+    premium = np.where(refunds, -premium_per_term * rng.uniform(0.5, 3.0, n), premium)
+    columns['TotalPremium'] = premium
+    claim_probability = np.array([c[7] for c in COVERS])[cover]
+    claimed = rng.random(n) < claim_probability
+    claims = np.where(claimed, rng.lognormal(9.0, 1.5, n), 0.0)
+    # Recoveries show up as a few negative claims
+    claims = np.where(claimed & (rng.random(n) < 0.01), -claims * 0.2, claims)
+    columns['TotalClaims'] = claims
+
+    data = pd.DataFrame(columns, index=pd.RangeIndex(start, start + n))[POLICY_COLUMNS]
+    if not categorical:
+        for column in data.columns:
+            if isinstance(data[column].dtype, pd.CategoricalDtype):
+                data[column] = data[column].astype('str')
+    return data
+
+
+def iter_policies(n_rows: int, chunk_size: int = DEFAULT_CHUNK_ROWS, seed: int = 42,
+                  categorical: bool = False) -> Iterator[pd.DataFrame]:
+    """
+    Yields synthetic policy rows chunk by chunk, so 50M rows never sit in memory at once.
+
+    Args:
+        n_rows (int): Total number of rows.
+        chunk_size (int): Rows per chunk. The same seed and chunk size give the same rows.
+        seed (int): Seed of the generator.
+        categorical (bool): Return text columns as categoricals instead of strings.
+
+    Yields:
+        pd.DataFrame: Consecutive chunks of generate_policies rows.
+    """
+    for start in range(0, n_rows, chunk_size):
+        yield generate_policies(min(chunk_size, n_rows - start), seed=seed, start=start, categorical=categorical)
+
+
+def write_policy_file(destination: Union[str, IO[bytes]], n_rows: int, chunk_size: int = DEFAULT_CHUNK_ROWS,
+                      seed: int = 42) -> int:
+    """
+    Writes synthetic rows as a pipe-separated file like MachineLearningRating_v3.txt, a chunk at a time.
+
+    Args:
+        destination (str or IO[bytes]): File path or writable binary stream (e.g. a zip member).
+        n_rows (int): Number of rows.
+        chunk_size (int): Rows generated and written at a time.
+        seed (int): Seed of the generator.
+
+    Returns:
+        int: Number of rows written.
+    """
+    if isinstance(destination, str):
+        with open(destination, 'wb') as f:
+            return write_policy_file(f, n_rows, chunk_size, seed)
+
+    text = io.TextIOWrapper(destination, encoding='utf-8', newline='')
+    try:
+        for i, chunk in enumerate(iter_policies(n_rows, chunk_size, seed, categorical=True)):
+            chunk.to_csv(text, sep='|', index=False, header=i == 0)
+        if n_rows == 0:
+            text.write('|'.join(POLICY_COLUMNS) + '\n')
+        text.flush()
+    finally:
+        # Leave the underlying stream open for the caller
+        text.detach()
+    return n_rows
+
+
+def write_policy_archive(path: str, n_rows: int, chunk_size: int = DEFAULT_CHUNK_ROWS, seed: int = 42,
+                         filename: str = FILENAME) -> str:
+    """
+    Writes synthetic rows as the real data is shipped: the policy file inside a zip inside a zip.
+
+    The file is streamed into the inner archive chunk by chunk, so no uncompressed copy
+    is written to disk. The result can be read with load_data(path, filename).
+
+    Args:
+        path (str): Path of the outer zip file.
+        n_rows (int): Number of rows.
+        chunk_size (int): Rows generated and written at a time.
+        seed (int): Seed of the generator.
+        filename (str): Name of the policy file inside the inner zip.
+
+    Returns:
+        str: Path of the outer zip file.
+    """
+    inner_name = os.path.splitext(filename)[0] + '.zip'
+    inner_path = f"{path}.{inner_name}.tmp-{os.getpid()}"
+    try:
+        with zipfile.ZipFile(inner_path, 'w', zipfile.ZIP_DEFLATED, compresslevel=1) as inner_zip:
+            with inner_zip.open(filename, 'w', force_zip64=True) as member:
+                write_policy_file(member, n_rows, chunk_size, seed)
+        with zipfile.ZipFile(path, 'w', zipfile.ZIP_STORED) as outer_zip:
+            outer_zip.write(inner_path, arcname=inner_name)
+    finally:
+        if os.path.exists(inner_path):
+            os.remove(inner_path)
+    return path
@@ -0,0 +1,158 @@
+# scripts/windowed_testing.py
+from collections import deque
+from typing import Optional
+import numpy as np
+import pandas as pd
+
+try:
+    from scripts.group_statistics import MOMENT_COLUMNS, GroupMoments, compare_groups
+except ImportError:
+    # Notebooks import the scripts directly with the scripts/ directory on sys.path
+    from group_statistics import MOMENT_COLUMNS, GroupMoments, compare_groups
+
+
+def monthly_moments(data: pd.DataFrame, feature: str, metric: str,
+                    time_column: str = 'TransactionMonth') -> list:
+    """
+    Computes the per-group moments of every month with a single groupby.
+
+    Args:
+        data (pd.DataFrame): Rows with the time, feature and metric columns.
+        feature (str): The grouping column.
+        metric (str): The numerical column to summarise. Missing values are ignored.
+        time_column (str): Date column, truncated to monthly periods.
+
+    Returns:
+        list: (month, GroupMoments) tuples in chronological order.
+    """
+    months = pd.to_datetime(data[time_column]).dt.to_period('M')
+    values = data[metric].astype(np.float64)
+    filled = values.fillna(0.0)
+    parts = pd.DataFrame({
+        'count': values.notna().astype(np.int64),
+        'sum': filled,
+        'sumsq': filled * filled,
+    })
+    table = parts.groupby([months.rename('month'), data[feature]], observed=True, sort=True).sum()
+    return [(month, GroupMoments(rows.droplevel('month')))
+            for month, rows in table.groupby(level='month', sort=True)]
+
+
+class WindowedGroupTester:
+
+    def __init__(self, feature: str, metric: str, window: int = 3, mode: str = 'pairwise', test: str = 'z',
+                 correction: Optional[str] = 'holm', alpha: float = 0.05, min_count: int = 2,
+                 time_column: str = 'TransactionMonth'):
+        """
+        Initialize a rolling tester of group differences over monthly windows.
+
+        The window keeps the per-group sufficient statistics of each month. When a
+        new month arrives its moments are added and those of the months leaving the
+        window are subtracted, so each step costs only the new month's rows. Windows
+        span calendar months: months missing from the data are not made up for by
+        keeping older ones.
+
+        Args:
+            feature (str): Grouping column, e.g. 'Province', 'Gender' or 'PostalCode'.
+            metric (str): Numerical column to compare, e.g. 'TotalPremium' or 'TotalClaims'.
+            window (int): Number of calendar months per window.
+            mode (str): 'pairwise' or 'one_vs_rest'; see group_statistics.compare_groups.
+            test (str): 'z', 't' or 'welch'.
+            correction (str): Multiple-comparison correction within each window.
+            alpha (float): Significance level applied to the adjusted p-values.
+            min_count (int): Groups with fewer non-missing values in a window are left out.
+            time_column (str): Date column, truncated to monthly periods.
+        """
+        if window < 1:
+            raise ValueError("window must be at least 1 month.")
+        self.feature = feature
+        self.metric = metric
+        self.window = window
+        self.mode = mode
+        self.test = test
+        self.correction = correction
+        self.alpha = alpha
+        self.min_count = min_count
+        self.time_column = time_column
+        self.months = deque()
+        self.current = GroupMoments(pd.DataFrame(columns=MOMENT_COLUMNS, dtype=np.float64))
+        self.history = []
+
+    def _compare(self) -> pd.DataFrame:
+        """
+        Tests the groups of the current window, tagging each comparison with the window bounds.
+        """
+        results = compare_groups(self.current, mode=self.mode, test=self.test, correction=self.correction,
+                                 alpha=self.alpha, min_count=self.min_count)
+        results.insert(0, 'window_start', self.months[0][0])
+        results.insert(1, 'window_end', self.months[-1][0])
+        return results
+
+    def add_month(self, month, moments: GroupMoments) -> pd.DataFrame:
+        """
+        Slides the window forward by one month.
+
+        Args:
+            month (pd.Period): The new month; must follow every month already added.
+            moments (GroupMoments): Per-group moments of the new month.
+
+        Returns:
+            pd.DataFrame: The comparisons of the window ending at `month`.
+        """
+        if self.months and month <= self.months[-1][0]:
+            raise ValueError(f"Month {month} is not after the last month added ({self.months[-1][0]}).")
+
+        self.months.append((month, moments))
+        self.current = self.current + moments
+        # Evict by calendar span, so a month without data does not widen the window
+        while (month - self.months[0][0]).n >= self.window:
+            _, oldest = self.months.popleft()
+            self.current = self.current - oldest
+
+        results = self._compare()
+        self.history.append(results)
+        return results
+
+    def update(self, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Adds the months of a chunk of new rows, one window step per month.
+
+        Args:
+            data (pd.DataFrame): Rows of months after those already added.
+
+        Returns:
+            pd.DataFrame: The comparisons of every window ending in one of the new months.
+        """
+        steps = [self.add_month(month, moments)
+                 for month, moments in monthly_moments(data, self.feature, self.metric, self.time_column)]
+        return pd.concat(steps, ignore_index=True) if steps else pd.DataFrame()
+
+    def results(self) -> pd.DataFrame:
+        """
+        Returns the time series of comparisons of every window so far.
+        """
+        return pd.concat(self.history, ignore_index=True) if self.history else pd.DataFrame()
+
+
+def rolling_group_tests(data: pd.DataFrame, features: list, metric: str = 'TotalPremium', window: int = 3,
+                        **kwargs) -> pd.DataFrame:
+    """
+    Runs rolling window tests for several grouping features over the whole history.
+
+    Args:
+        data (pd.DataFrame): The data, with a TransactionMonth column.
+        features (list): Grouping columns, e.g. ['Province', 'Gender', 'PostalCode'].
+        metric (str): Numerical column to compare.
+        window (int): Number of months per window.
+        **kwargs: Further WindowedGroupTester options (mode, test, correction, alpha, min_count, time_column).
+
+    Returns:
+        pd.DataFrame: One row per window and comparison, with a 'feature' column.
+    """
+    frames = []
+    for feature in features:
+        tester = WindowedGroupTester(feature, metric, window=window, **kwargs)
+        results = tester.update(data)
+        results.insert(0, 'feature', feature)
+        frames.append(results)
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,60 @@
+import unittest
+import numpy as np
+import pandas as pd
+from scipy import stats
+from scripts.contingency import ContingencyBuilder
+from scripts.hypothesis_testing import ABHypothesisTesting
+
+class TestContingencyBuilder(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        n = 5000
+        self.df = pd.DataFrame({
+            'Province': rng.choice(['Gauteng', 'Western Cape', 'Limpopo', 'Free State'], n),
+            'TotalPremium': np.where(rng.random(n) < 0.3, 0.0, rng.lognormal(3, 1, n)),
+            'TotalClaims': np.where(rng.random(n) < 0.05, rng.lognormal(8, 1, n), 0.0)
+        })
+
+    def test_quantile_bins_match_crosstab(self):
+        builder = ContingencyBuilder('Province', 'TotalPremium', bins=4).update(self.df)
+        table = builder.table()
+        binned = pd.cut(self.df['TotalPremium'], bins=builder.edges, right=False, include_lowest=True)
+        # Values equal to the last edge belong to the last bin
+        binned = binned.cat.codes.where(self.df['TotalPremium'] < builder.edges[-1], len(builder.edges) - 2)
+        expected = pd.crosstab(self.df['Province'], binned)
+        np.testing.assert_array_equal(table.loc[expected.index].to_numpy(), expected.to_numpy())
+
+    def test_indicator(self):
+        table = ContingencyBuilder('Province', 'TotalClaims', bins='indicator').update(self.df).table()
+        expected = pd.crosstab(self.df['Province'], self.df['TotalClaims'] > 0)
+        np.testing.assert_array_equal(table.loc[expected.index].to_numpy(), expected.to_numpy())
+
+    def test_chunked_accumulation_and_merge(self):
+        full = ContingencyBuilder('Province', 'TotalPremium', bins=5).update(self.df)
+        chunked = ContingencyBuilder('Province', 'TotalPremium', edges=full.edges)
+        for start in range(0, len(self.df), 700):
+            chunked.update(self.df.iloc[start:start + 700])
+        pd.testing.assert_frame_equal(chunked.table().sort_index(), full.table().sort_index())
+
+        left = ContingencyBuilder('Province', 'TotalPremium', edges=full.edges).update(self.df.iloc[:2000])
+        right = ContingencyBuilder('Province', 'TotalPremium', edges=full.edges).update(self.df.iloc[2000:])
+        merged = left.merge(right)
+        pd.testing.assert_frame_equal(merged.table().sort_index(), full.table().sort_index())
+        self.assertEqual(merged.to_sparse().sum(), len(self.df))
+
+    def test_chi2(self):
+        builder = ContingencyBuilder('Province', 'TotalClaims', bins='indicator').update(self.df)
+        expected = stats.chi2_contingency(pd.crosstab(self.df['Province'], self.df['TotalClaims'] > 0))
+        chi2, p_value = builder.chi2()
+        self.assertAlmostEqual(chi2, expected[0])
+        self.assertAlmostEqual(p_value, expected[1])
+
+    def test_binned_risk_tests(self):
+        ab_test = ABHypothesisTesting(self.df.assign(PostalCode=self.df['Province']), metric_bins=10)
+        chi2, p_value = ab_test._chi_squared_test('Province', 'TotalPremium', bins=10)
+        self.assertIsInstance(chi2, float)
+        self.assertIn('Chi-squared test on Province', ab_test._risk_across_provinces())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,7 @@
 # tests/test_data_processing.py
 import unittest
 import pandas as pd
-from scripts.data_processing import DataProcessing  # Import the class from your scripts folder
+from scripts.data_processing import DataProcessing, MissingValueImputer  # Import the classes from your scripts folder
 
 class TestDataProcessing(unittest.TestCase):
     
@@ -64,5 +64,35 @@ class TestDataProcessing(unittest.TestCase):
         # Adjust dtype check based on expected column type
         self.assertTrue(pd.api.types.is_object_dtype(processed_df['C'].dtype) or pd.api.types.is_numeric_dtype(processed_df['C'].dtype))
 
+    def test_handle_missing_data_fill_values(self):
+        df = pd.DataFrame({
+            'A': [1.0, 2.0, None, 4.0],
+            'E': ['x', None, 'y', 'x'],
+            'D': [None, None, None, None]
+        })
+        processed_df = DataProcessing(df.copy()).handle_missing_data(missing_type='low', missing_cols=['A', 'E', 'D', 'Z'])
+        self.assertEqual(processed_df['A'].tolist(), [1.0, 2.0, 2.0, 4.0])  # Median
+        self.assertEqual(processed_df['E'].tolist(), ['x', 'x', 'y', 'x'])  # Mode
+        self.assertEqual(processed_df['D'].tolist(), ['Unknown'] * 4)  # Default for empty mode
+
+    def test_imputer_reuse_on_new_batch(self):
+        imputer = self.data_processing.fit_imputer(['A', 'B'])
+        self.assertEqual(imputer.fill_values, {'A': 2.0, 'B': 2.5})
+
+        new_batch = pd.DataFrame({'A': [None, 10.0], 'B': [None, None]})
+        imputed = imputer.transform(new_batch)
+        self.assertEqual(imputed['A'].tolist(), [2.0, 10.0])
+        self.assertEqual(imputed['B'].tolist(), [2.5, 2.5])
+        self.assertTrue(new_batch['A'].isnull().any())  # Input is left untouched
+
+    def test_imputer_categorical_column(self):
+        df = pd.DataFrame({'Gender': pd.Categorical(['Male', None, 'Male', 'Female'])})
+        imputed = MissingValueImputer().fit_transform(df, ['Gender'])
+        self.assertEqual(imputed['Gender'].tolist(), ['Male', 'Male', 'Male', 'Female'])
+
+        empty = pd.DataFrame({'Gender': pd.Categorical([None, None], categories=['Male'])})
+        imputed = MissingValueImputer().fit_transform(empty, ['Gender'])
+        self.assertEqual(imputed['Gender'].tolist(), ['Unknown', 'Unknown'])
+
 if __name__ == '__main__':
     unittest.main()
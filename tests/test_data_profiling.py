@@ -0,0 +1,60 @@
+import unittest
+import numpy as np
+import pandas as pd
+from scripts.data_processing import DataProcessing
+from scripts.data_profiling import HyperLogLog, MissingDataProfiler
+
+class TestMissingDataProfiler(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        n = 1000
+        self.df = pd.DataFrame({
+            'Province': rng.choice(['Gauteng', 'Limpopo', None], n),
+            'TotalPremium': np.where(rng.random(n) < 0.1, np.nan, rng.lognormal(3, 1, n)),
+            'PolicyID': np.arange(n),
+            'Bank': [None] * n
+        })
+
+    def test_summary_matches_missing_data_summary(self):
+        profiler = MissingDataProfiler()
+        for start in range(0, len(self.df), 300):
+            profiler.update(self.df.iloc[start:start + 300])
+
+        expected = DataProcessing(self.df).missing_data_summary()
+        pd.testing.assert_frame_equal(profiler.summary(), expected)
+
+    def test_merge_matches_single_profiler(self):
+        left = MissingDataProfiler().update(self.df.iloc[:400])
+        right = MissingDataProfiler().update(self.df.iloc[400:])
+        merged = left.merge(right)
+
+        single = MissingDataProfiler().update(self.df)
+        pd.testing.assert_frame_equal(merged.summary(), single.summary())
+        pd.testing.assert_frame_equal(merged.profile(), single.profile())
+
+    def test_columns_missing_from_a_chunk(self):
+        profiler = MissingDataProfiler(track_distinct=False)
+        profiler.update(pd.DataFrame({'A': [1, 2]}))
+        profiler.update(pd.DataFrame({'A': [3, None], 'B': ['x', 'y']}))
+
+        expected = DataProcessing(pd.concat([pd.DataFrame({'A': [1, 2]}),
+                                             pd.DataFrame({'A': [3, None], 'B': ['x', 'y']})])).missing_data_summary()
+        pd.testing.assert_frame_equal(profiler.summary(), expected)
+
+    def test_profile_min_max_and_distinct(self):
+        profile = MissingDataProfiler().update(self.df).profile()
+        self.assertEqual(profile.loc['PolicyID', 'Min'], 0)
+        self.assertEqual(profile.loc['PolicyID', 'Max'], 999)
+        self.assertEqual(profile.loc['Province', 'Distinct (approx.)'], 2)
+        self.assertAlmostEqual(profile.loc['PolicyID', 'Distinct (approx.)'], 1000, delta=50)
+        self.assertEqual(profile.loc['Bank', 'Non-Null Count'], 0)
+
+    def test_hyperloglog_accuracy(self):
+        sketch = HyperLogLog(precision=12)
+        for start in range(0, 100000, 25000):
+            sketch.update(pd.Series(np.arange(start, start + 25000)))
+        self.assertAlmostEqual(sketch.estimate(), 100000, delta=5000)
+
+if __name__ == '__main__':
+    unittest.main()
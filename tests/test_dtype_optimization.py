@@ -0,0 +1,160 @@
+import io
+import os
+import tempfile
+import unittest
+import zipfile
+import numpy as np
+import pandas as pd
+from scripts.data_processing import DataProcessing
+from scripts.dtype_optimization import (DtypeSchema, apply_schema, infer_schema, load_schema, optimize_dtypes,
+                                        save_schema)
+from scripts.hypothesis_testing import ABHypothesisTesting
+from scripts.load_data import concat_chunks, load_data
+from scripts.synthetic_data import FILENAME, generate_policies, write_policy_archive
+
+
+def _decategorize(data):
+    """
+    Categories come out of the parser in another order, so categoricals are compared as text.
+    """
+    return data.astype({col: 'str' for col in data.columns if isinstance(data[col].dtype, pd.CategoricalDtype)})
+
+
+def _write_archive(path, data):
+    """
+    Writes rows as the policy file inside a zip inside a zip.
+    """
+    inner = io.BytesIO()
+    with zipfile.ZipFile(inner, 'w') as inner_zip:
+        inner_zip.writestr(FILENAME, data.to_csv(sep='|', index=False))
+    with zipfile.ZipFile(path, 'w') as outer_zip:
+        outer_zip.writestr('MachineLearningRating_v3.zip', inner.getvalue())
+    return path
+
+
+class TestDtypeOptimization(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.archive = write_policy_archive(os.path.join(cls.tmp_dir.name, 'data.zip'), 20_000, seed=1)
+        cls.data = load_data(cls.archive, FILENAME)
+        cls.optimized = optimize_dtypes(cls.data)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp_dir.cleanup()
+
+    def test_infer_schema(self):
+        dtypes = self.optimized.schema.dtypes
+        for column in ('Province', 'Gender', 'CoverType', 'VehicleType', 'make', 'PostalCode'):
+            self.assertEqual(dtypes[column], 'category')
+        for column in ('AlarmImmobiliser', 'TrackingDevice', 'WrittenOff'):
+            self.assertEqual(dtypes[column], 'boolean')
+        self.assertEqual(dtypes['TotalPremium'], 'float32')
+        # Whole numbers stored as float because of missing values
+        self.assertEqual(dtypes['Cylinders'], 'Int8')
+        # Headroom for identifiers that keep growing in later files
+        self.assertEqual(dtypes['UnderwrittenCoverID'], 'Int32')
+        self.assertNotIn('IsVATRegistered', dtypes)
+        self.assertNotIn('NumberOfVehiclesInFleet', dtypes)
+
+    def test_values_are_preserved(self):
+        data = self.optimized.data
+        np.testing.assert_allclose(data['TotalPremium'].to_numpy(dtype=np.float64),
+                                   self.data['TotalPremium'].to_numpy(), rtol=1e-6)
+        np.testing.assert_allclose(data['TotalPremium'].to_numpy(dtype=np.float64),
+                                   self.data['TotalPremium'].to_numpy(), rtol=0, atol=0.005)
+        np.testing.assert_array_equal(data['Cylinders'].to_numpy(dtype=np.float64, na_value=np.nan),
+                                      self.data['Cylinders'].to_numpy())
+        pd.testing.assert_series_equal(data['Rebuilt'].map({True: 'Yes', False: 'No'}).astype('str'),
+                                       self.data['Rebuilt'], check_dtype=False)
+        self.assertTrue(data['Province'].astype('str').equals(self.data['Province']))
+
+    def test_float32_only_when_safe(self):
+        data = pd.DataFrame({'small': [0.1, 2.5, None], 'huge': [1e300, 2.5, 1.0], 'whole': [1e12, 2.0, None]})
+        dtypes = infer_schema(data).dtypes
+        self.assertEqual(dtypes['small'], 'float32')
+        self.assertNotIn('huge', dtypes)
+        self.assertEqual(dtypes['whole'], 'Int64')
+
+    def test_money_keeps_cents(self):
+        data = pd.DataFrame({'SumInsured': [9876543.21, 150000.5, None], 'TotalPremium': [21.93, 1234.56, 0.01]})
+        optimized = optimize_dtypes(data).data
+        # float32 would store 9876543.0
+        self.assertEqual(optimized['SumInsured'].dtype, np.float64)
+        self.assertEqual(optimized['SumInsured'][0], 9876543.21)
+        self.assertEqual(optimized['TotalPremium'].dtype, np.float32)
+        for column in ('SumInsured', 'TotalPremium'):
+            np.testing.assert_array_equal(optimized[column].to_numpy(dtype=np.float64).round(2), data[column])
+
+    def test_memory_report(self):
+        report = self.optimized.report
+        self.assertEqual(list(report.index[:-1]), list(self.data.columns))
+        self.assertEqual(report.loc['Province', 'dtype_after'], 'category')
+        total = report.loc['Total']
+        self.assertAlmostEqual(total['memory_before_mb'], self.data.memory_usage(deep=True, index=False).sum() / 2**20)
+        self.assertLess(total['memory_after_mb'], 0.25 * total['memory_before_mb'])
+
+    def test_schema_applied_while_parsing(self):
+        path = os.path.join(self.tmp_dir.name, 'schema.json')
+        save_schema(self.optimized.schema, path)
+        schema = load_schema(path)
+        self.assertEqual(schema, self.optimized.schema)
+
+        expected = _decategorize(self.optimized.data)
+        parsed = load_data(self.archive, FILENAME, **schema.read_options())
+        self.assertIn('TotalPremium', schema.float_columns)
+        self.assertEqual(parsed['TotalPremium'].dtype, np.float64)
+        others = [col for col in parsed.columns if col not in schema.float_columns]
+        self.assertTrue((parsed.dtypes[others] == self.optimized.data.dtypes[others]).all())
+        applied = apply_schema(parsed, schema)
+        self.assertTrue((applied.dtypes == self.optimized.data.dtypes).all())
+        pd.testing.assert_frame_equal(_decategorize(applied), expected)
+        chunks = load_data(self.archive, FILENAME, chunksize=6000, **schema.read_options())
+        pd.testing.assert_frame_equal(_decategorize(apply_schema(concat_chunks(chunks), schema)), expected)
+
+    def test_saved_schema_on_a_later_file(self):
+        sample = generate_policies(2000, seed=3)
+        sample['TotalClaims'] = sample['TotalClaims'].round()
+        _write_archive(os.path.join(self.tmp_dir.name, 'sample.zip'), sample)
+        path = os.path.join(self.tmp_dir.name, 'sample-schema.json')
+        save_schema(infer_schema(load_data(os.path.join(self.tmp_dir.name, 'sample.zip'), FILENAME)), path)
+        schema = load_schema(path)
+        self.assertTrue(schema.dtypes['TotalClaims'].startswith('Int'))
+        self.assertEqual(schema.dtypes['TotalPremium'], 'float32')
+
+        later = generate_policies(2000, seed=4)
+        later.loc[0, ['TotalClaims', 'TotalPremium']] = [123.45, 9876543.21]
+        archive = _write_archive(os.path.join(self.tmp_dir.name, 'later.zip'), later)
+        parsed = load_data(archive, FILENAME, **schema.read_options())
+        self.assertEqual(parsed.loc[0, 'TotalClaims'], 123.45)
+        self.assertEqual(parsed.loc[0, 'TotalPremium'], 9876543.21)
+
+        applied = apply_schema(parsed, schema)
+        for column in ('TotalClaims', 'TotalPremium'):
+            self.assertEqual(applied[column].dtype, np.float64)
+            pd.testing.assert_series_equal(applied[column], parsed[column])
+        self.assertEqual(applied['Province'].dtype, 'category')
+
+    def test_unknown_flags_become_missing(self):
+        schema = DtypeSchema({'flag': 'boolean'})
+        flags = apply_schema(pd.DataFrame({'flag': ['Yes', 'No', 'Maybe', None]}), schema)['flag']
+        self.assertEqual(flags.tolist(), [True, False, pd.NA, pd.NA])
+
+    def test_analysis_on_optimized_data(self):
+        processing = DataProcessing(self.optimized.data.copy())
+        summary = processing.missing_data_summary()
+        pd.testing.assert_frame_equal(summary, DataProcessing(self.data).missing_data_summary())
+        imputed = processing.handle_missing_data('low', list(summary.index[summary['Percentage (%)'] <= 50]))
+        self.assertFalse(imputed[list(summary.index[summary['Percentage (%)'] <= 50])].isna().any().any())
+
+        results = ABHypothesisTesting(self.optimized.data, metric_bins=10).run_all_tests()
+        expected = ABHypothesisTesting(self.data, metric_bins=10).run_all_tests()
+        self.assertEqual(results.keys(), expected.keys())
+        self.assertEqual(results['Risk Differences Between Women and Men'].split('\n')[1],
+                         expected['Risk Differences Between Women and Men'].split('\n')[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
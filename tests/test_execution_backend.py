@@ -0,0 +1,136 @@
+import os
+import shutil
+import tempfile
+import unittest
+import matplotlib
+matplotlib.use('Agg')
+import numpy as np
+import pandas as pd
+from scripts.data_processing import DataProcessing
+from scripts.data_visualization import DataVisualizer
+from scripts.execution_backend import PartitionedBackend, PartitionedDataset, is_partitioned
+from scripts.hypothesis_testing import ABHypothesisTesting
+from scripts.load_data import concat_chunks, load_data
+from scripts.synthetic_data import FILENAME, iter_policies, write_policy_archive
+
+
+class TestExecutionBackend(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.mkdtemp()
+        cls.dataset = PartitionedDataset.write(iter_policies(20_000, chunk_size=5000, seed=1, categorical=True),
+                                               os.path.join(cls.tmp_dir, 'policies'))
+        cls.data = cls.dataset.to_pandas()
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmp_dir)
+
+    def test_dataset_reads_partitions(self):
+        self.assertTrue(is_partitioned(self.dataset))
+        self.assertEqual((len(self.dataset), self.dataset.n_partitions), (20_000, 4))
+        expected = pd.concat(iter_policies(20_000, chunk_size=5000, seed=1, categorical=True), ignore_index=True)
+        pd.testing.assert_frame_equal(self.data, expected, check_categorical=False)
+        # Partitions keep their position in the dataset
+        self.assertEqual(self.dataset.read_partition(2, ['Province']).index[0], 10_000)
+        view = self.dataset.drop(columns=['Gender', 'NotAColumn'], errors='ignore').select(['Province', 'Title'])
+        self.assertEqual(list(view.to_pandas().columns), ['Province', 'Title'])
+        self.assertIn('Gender', self.dataset.columns)
+
+    def test_missing_data_matches_pandas(self):
+        partitioned, in_memory = DataProcessing(self.dataset, max_workers=2), DataProcessing(self.data.copy())
+        summary = partitioned.missing_data_summary()
+        pd.testing.assert_frame_equal(summary, in_memory.missing_data_summary())
+
+        percentage = summary['Percentage (%)']
+        high, low = list(summary.index[percentage > 50]), list(summary.index[percentage <= 50])
+        for processing in (partitioned, in_memory):
+            processing.handle_missing_data('high', high)
+            processing.handle_missing_data('low', low)
+        self.assertTrue(is_partitioned(partitioned.data))
+
+        imputed = partitioned.data.to_pandas()
+        self.assertEqual(list(imputed.columns), list(in_memory.data.columns))
+        self.assertFalse(imputed[low].isna().any().any())
+        for column, value in in_memory.imputer.fill_values.items():
+            if isinstance(value, float):
+                # Medians come from quantile sketches
+                spread = self.data[column].quantile(0.55) - self.data[column].quantile(0.45)
+                self.assertLessEqual(abs(partitioned.imputer.fill_values[column] - value), spread)
+            else:
+                self.assertEqual(partitioned.imputer.fill_values[column], value)
+
+    def test_cap_all_outliers_matches_pandas(self):
+        columns = ['SumInsured', 'TotalPremium', 'TotalClaims']
+        partitioned, in_memory = DataVisualizer(self.dataset, max_workers=2), DataVisualizer(self.data.copy())
+        capped = partitioned.cap_all_outliers(columns).to_pandas()
+        in_memory.cap_all_outliers(columns)
+        for column in columns:
+            # Quartiles come from quantile sketches
+            scale = self.data[column].quantile(0.76) - self.data[column].quantile(0.24)
+            np.testing.assert_allclose(partitioned.capper.bounds.loc[column], in_memory.capper.bounds.loc[column],
+                                       atol=0.5 * scale + 1e-9)
+            self.assertLessEqual(capped[column].max(), partitioned.capper.bounds.loc[column, 'upper'])
+        # The stored partitions are untouched
+        self.assertEqual(self.dataset.to_pandas(['TotalPremium'])['TotalPremium'].max(),
+                         self.data['TotalPremium'].max())
+
+    def test_hypothesis_tests_match_pandas(self):
+        partitioned, in_memory = ABHypothesisTesting(self.dataset, max_workers=2), ABHypothesisTesting(self.data)
+
+        results, expected = partitioned.run_all_tests(), in_memory.run_all_tests()
+        self.assertEqual(results['Margin Differences Between Postal Codes'],
+                         expected['Margin Differences Between Postal Codes'])
+        self.assertEqual(results['Risk Differences Between Women and Men'],
+                         expected['Risk Differences Between Women and Men'])
+        np.testing.assert_allclose(partitioned._chi_squared_test('Province', 'TotalPremium'),
+                                   in_memory._chi_squared_test('Province', 'TotalPremium'))
+        np.testing.assert_allclose(partitioned._chi_squared_test('Province', 'TotalClaims', bins='indicator'),
+                                   in_memory._chi_squared_test('Province', 'TotalClaims', bins='indicator'))
+
+        pd.testing.assert_frame_equal(partitioned.pairwise_margin_tests('Province'),
+                                      in_memory.pairwise_margin_tests('Province'))
+        pd.testing.assert_frame_equal(partitioned.rolling_margin_tests('Province', window=3),
+                                      in_memory.rolling_margin_tests('Province', window=3))
+
+    def test_segments_match_pandas(self):
+        partitioned, in_memory = ABHypothesisTesting(self.dataset, max_workers=1), ABHypothesisTesting(self.data)
+        for kwargs in ({'value': 'Gauteng'}, {'exclude_values': ['Gauteng', 'Limpopo']},
+                       {'value': 'Gauteng', 'exclude_values': ['Gauteng']}):
+            pd.testing.assert_frame_equal(partitioned._segment_data('Province', columns=['TotalPremium'], **kwargs),
+                                          in_memory._segment_data('Province', columns=['TotalPremium'], **kwargs),
+                                          check_index_type=False)
+            np.testing.assert_array_equal(partitioned.segment_positions('Province', **kwargs),
+                                          in_memory.segment_positions('Province', **kwargs))
+
+    def test_backend_aggregations(self):
+        backend = PartitionedBackend(self.dataset, max_workers=2)
+        modes = backend.modes(['Province', 'Gender'])
+        self.assertEqual(modes['Province'], self.data['Province'].mode()[0])
+        self.assertEqual(modes['Gender'], self.data['Gender'].mode()[0])
+
+        quantiles = backend.quantiles(['TotalPremium', 'SumInsured'], [0.0, 0.5, 1.0])
+        self.assertEqual(quantiles.loc[1.0, 'TotalPremium'], self.data['TotalPremium'].max())
+        self.assertEqual(quantiles.loc[0.0, 'SumInsured'], self.data['SumInsured'].min())
+
+        first = backend.first_rows('PostalCode')
+        expected = self.data['PostalCode'].drop_duplicates()
+        np.testing.assert_array_equal(first.index, expected.to_numpy(dtype=object))
+        np.testing.assert_array_equal(first.to_numpy(), expected.index)
+
+    def test_from_archive(self):
+        archive = write_policy_archive(os.path.join(self.tmp_dir, 'data.zip'), 3000, seed=2)
+        dataset = PartitionedDataset.from_archive(archive, FILENAME, os.path.join(self.tmp_dir, 'archive'),
+                                                  chunksize=1000)
+        self.assertEqual(dataset.n_partitions, 3)
+        expected = concat_chunks(load_data(archive, FILENAME, chunksize=1000))
+        data = dataset.to_pandas()
+        # An all-missing categorical column has no type in Parquet and comes back as object
+        empty = expected.columns[expected.isna().all()]
+        self.assertTrue(data[empty].isna().all().all())
+        pd.testing.assert_frame_equal(data.drop(columns=empty), expected.drop(columns=empty))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+import numpy as np
+import pandas as pd
+import shap
+import xgboost as xgb
+from scipy import sparse
+from scripts.explanations import ShapExplainer, row_keys, summarize_background
+
+
+class TestExplanations(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        rng = np.random.default_rng(0)
+        X = rng.normal(size=(600, 5)).astype(np.float32)
+        X[:, 4] = rng.integers(0, 2, 600)
+        y = 3 * X[:, 0] + X[:, 1] ** 2 + 2 * X[:, 4] + rng.normal(scale=0.1, size=600)
+        cls.X = X
+        cls.model = xgb.XGBRegressor(n_estimators=30, max_depth=3, tree_method='hist').fit(X, y)
+        cls.expected = shap.TreeExplainer(cls.model).shap_values(X)
+
+    def test_row_keys(self):
+        keys = row_keys(np.vstack([self.X[:3], self.X[:1]]))
+        self.assertEqual(keys.dtype, np.uint64)
+        self.assertEqual(keys[0], keys[3])
+        self.assertEqual(len(set(keys[:3].tolist())), 3)
+
+    def test_explain_matches_tree_explainer(self):
+        explainer = ShapExplainer(self.model, chunk_size=100, n_jobs=3)
+        values = explainer.explain(self.X)
+        np.testing.assert_allclose(values, self.expected, rtol=1e-5, atol=1e-5)
+        # SHAP values add up to the prediction
+        np.testing.assert_allclose(values.sum(axis=1) + explainer.expected_value, self.model.predict(self.X), rtol=1e-4, atol=1e-4)
+
+    def test_cache_skips_repeated_and_identical_rows(self):
+        explainer = ShapExplainer(self.model, chunk_size=64)
+        repeated = np.vstack([self.X[:50], self.X[:50], self.X[10:20]])
+        values = explainer.explain(repeated)
+        np.testing.assert_allclose(values[50:100], values[:50])
+        self.assertEqual(explainer.cache_info()['misses'], 50)
+        self.assertEqual(explainer.cache_info()['hits'], 60)
+
+        explainer.explain(self.X[:50])
+        self.assertEqual(explainer.cache_info()['misses'], 50)
+
+        small = ShapExplainer(self.model, cache_size=20)
+        small.explain(self.X[:100])
+        self.assertEqual(small.cache_info()['size'], 20)
+        np.testing.assert_allclose(small.explain(self.X[:100]), self.expected[:100], rtol=1e-5, atol=1e-5)
+
+    def test_sparse_and_frame_inputs(self):
+        explainer = ShapExplainer(self.model, chunk_size=50, n_jobs=2)
+        np.testing.assert_allclose(explainer.explain(sparse.csr_matrix(self.X)), self.expected, rtol=1e-5, atol=1e-5)
+        np.testing.assert_allclose(explainer.explain(pd.DataFrame(self.X)), self.expected, rtol=1e-5, atol=1e-5)
+
+    def test_streaming_importance(self):
+        names = ['a', 'b', 'c', 'd', 'e']
+        explainer = ShapExplainer(self.model, feature_names=names, chunk_size=64)
+        importance = explainer.importance(iter([self.X[:250], sparse.csr_matrix(self.X[250:])]))
+        expected = pd.Series(np.abs(self.expected).mean(axis=0), index=names)
+        pd.testing.assert_series_equal(importance, expected.sort_values(ascending=False),
+                                       check_names=False, check_dtype=False, rtol=1e-5)
+        self.assertEqual(importance.index[0], 'a')
+
+    def test_background_summary_and_interventional(self):
+        background = summarize_background(self.X, n_samples=10)
+        self.assertEqual(background.shape, (10, 5))
+        self.assertEqual(summarize_background(self.X, n_samples=10, method='sample').shape, (10, 5))
+
+        explainer = ShapExplainer(self.model, background=background)
+        expected = shap.TreeExplainer(self.model, data=background, feature_perturbation='interventional').shap_values(self.X[:40])
+        np.testing.assert_allclose(explainer.explain(self.X[:40]), expected, rtol=1e-4, atol=1e-4)
+        with self.assertRaises(ValueError):
+            ShapExplainer(self.model, background=background, approximate=True)
+
+    def test_approximate(self):
+        explainer = ShapExplainer(self.model, approximate=True)
+        expected = shap.TreeExplainer(self.model).shap_values(self.X, approximate=True)
+        np.testing.assert_allclose(explainer.explain(self.X), expected, rtol=1e-5, atol=1e-5)
+
+
+if __name__ == '__main__':
+    unittest.main()
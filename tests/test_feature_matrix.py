@@ -0,0 +1,71 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from scipy import sparse
+from sklearn.feature_selection import f_regression
+from scripts.feature_matrix import FeatureMatrix
+from scripts.preprocessing_pipeline import PreprocessingPipeline
+from tests.test_preprocessing_pipeline import make_policies
+
+
+def is_memory_mapped(array):
+    while array is not None:
+        if isinstance(array, np.memmap):
+            return True
+        array = array.base
+    return False
+
+
+class TestFeatureMatrix(unittest.TestCase):
+
+    def setUp(self):
+        self.data = make_policies(400)
+        self.pipeline = PreprocessingPipeline(k=12, score_func=f_regression, sparse=True).fit(self.data)
+        self.matrix = FeatureMatrix.from_pipeline(self.pipeline, self.data)
+
+    def test_from_pipeline(self):
+        self.assertEqual(self.matrix.shape, (400, 12))
+        self.assertEqual(self.matrix.feature_names, self.pipeline.selected_features)
+        np.testing.assert_array_equal(self.matrix.y, self.data['TotalPremium'])
+
+        # A dense pipeline gives the same matrix, except that one-hot columns are also centered and scaled
+        dense = FeatureMatrix.from_pipeline(PreprocessingPipeline(k=12, score_func=f_regression).fit(self.data), self.data)
+        self.assertEqual(dense.feature_names, self.matrix.feature_names)
+        self.assertLess(self.matrix.X.nnz, dense.X.nnz)
+
+    def test_save_and_load_memory_mapped(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'train')
+            self.matrix.save(path)
+            self.assertTrue(os.path.exists(os.path.join(path, 'meta.json')))
+
+            loaded = FeatureMatrix.load(path)
+            self.assertTrue(is_memory_mapped(loaded.X.data))
+            self.assertTrue(is_memory_mapped(loaded.y))
+            self.assertEqual(loaded.feature_names, self.matrix.feature_names)
+            self.assertEqual((loaded.X != self.matrix.X).nnz, 0)
+            np.testing.assert_array_equal(loaded.y, self.matrix.y)
+
+            X_fold, y_fold = loaded.take([3, 1, 4])
+            np.testing.assert_array_equal(X_fold.toarray(), self.matrix.X[[3, 1, 4]].toarray())
+            np.testing.assert_array_equal(y_fold, self.matrix.y[[3, 1, 4]])
+
+            in_memory = FeatureMatrix.load(path, mmap=False)
+            self.assertFalse(is_memory_mapped(in_memory.X.data))
+            del loaded, X_fold
+
+    def test_load_missing_directory_raises(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            with self.assertRaises(FileNotFoundError):
+                FeatureMatrix.load(tmp)
+
+    def test_shape_mismatch_raises(self):
+        with self.assertRaises(ValueError):
+            FeatureMatrix(sparse.csr_matrix(np.ones((3, 2))), np.ones(4), ['a', 'b'])
+        with self.assertRaises(ValueError):
+            FeatureMatrix(np.ones((3, 2)), np.ones(3), ['a'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+import numpy as np
+import pandas as pd
+from scipy import stats
+from scripts.group_statistics import GroupMoments, adjust_p_values, compare_groups, two_sample_statistics
+from scripts.hypothesis_testing import ABHypothesisTesting
+
+class TestGroupStatistics(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(6)
+        n = 3000
+        self.df = pd.DataFrame({
+            'PostalCode': rng.choice([2000, 8000, 699, 1459, 7784], n),
+            'TotalPremium': rng.lognormal(3, 1, n)
+        })
+        self.df.loc[::50, 'TotalPremium'] = np.nan
+        self.moments = GroupMoments.from_frame(self.df, 'PostalCode', 'TotalPremium')
+
+    def _group(self, code):
+        return self.df.loc[self.df['PostalCode'] == code, 'TotalPremium'].dropna()
+
+    def test_moments_summary(self):
+        summary = self.moments.summary()
+        expected = self.df.groupby('PostalCode')['TotalPremium'].agg(['count', 'mean', 'std'])
+        np.testing.assert_allclose(summary.to_numpy(), expected.to_numpy())
+
+    def test_add_and_subtract(self):
+        first = GroupMoments.from_frame(self.df.iloc[:1000], 'PostalCode', 'TotalPremium')
+        rest = GroupMoments.from_frame(self.df.iloc[1000:], 'PostalCode', 'TotalPremium')
+        pd.testing.assert_frame_equal((first + rest).moments, self.moments.moments, check_dtype=False)
+        np.testing.assert_allclose((self.moments - rest).moments.to_numpy(), first.moments.to_numpy())
+
+    def test_statistics_match_scipy(self):
+        a, b = self._group(2000), self._group(8000)
+        args = (len(a), a.sum(), (a ** 2).sum(), len(b), b.sum(), (b ** 2).sum())
+        t_stat, t_p = two_sample_statistics(*args, test='t')
+        expected = stats.ttest_ind(a, b)
+        self.assertAlmostEqual(float(t_stat), expected.statistic)
+        self.assertAlmostEqual(float(t_p), expected.pvalue)
+
+        w_stat, w_p = two_sample_statistics(*args, test='welch')
+        expected = stats.ttest_ind(a, b, equal_var=False)
+        self.assertAlmostEqual(float(w_stat), expected.statistic)
+        self.assertAlmostEqual(float(w_p), expected.pvalue)
+
+    def test_z_statistic_matches_z_test(self):
+        ab_test = ABHypothesisTesting(self.df)
+        results = ab_test.pairwise_margin_tests(correction=None)
+        self.assertEqual(len(results), 10)
+        row = results[(results['group_a'] == 699) & (results['group_b'] == 1459)].iloc[0]
+        z_stat, p_value = ab_test._z_test(self.df[self.df['PostalCode'] == 699], self.df[self.df['PostalCode'] == 1459], 'TotalPremium')
+        self.assertAlmostEqual(row['statistic'], z_stat)
+        self.assertAlmostEqual(row['p_value'], p_value)
+
+    def test_one_vs_rest(self):
+        results = compare_groups(self.moments, mode='one_vs_rest', test='welch')
+        self.assertEqual(len(results), 5)
+        a = self._group(2000)
+        rest = self.df.loc[self.df['PostalCode'] != 2000, 'TotalPremium'].dropna()
+        row = results[results['group_a'] == 2000].iloc[0]
+        self.assertAlmostEqual(row['statistic'], stats.ttest_ind(a, rest, equal_var=False).statistic)
+
+    def test_one_vs_rest_keeps_small_groups_in_rest(self):
+        df = pd.concat([self.df, pd.DataFrame({'PostalCode': [1], 'TotalPremium': [5000.0]})], ignore_index=True)
+        moments = GroupMoments.from_frame(df, 'PostalCode', 'TotalPremium')
+        results = compare_groups(moments, mode='one_vs_rest', test='welch')
+        self.assertNotIn(1, results['group_a'].tolist())
+        rest = df.loc[df['PostalCode'] != 2000, 'TotalPremium'].dropna()
+        row = results[results['group_a'] == 2000].iloc[0]
+        self.assertEqual(row['n_b'], len(rest))
+        self.assertAlmostEqual(row['statistic'], stats.ttest_ind(self._group(2000), rest, equal_var=False).statistic)
+
+    def test_adjust_p_values(self):
+        p = np.array([0.01, 0.04, 0.03, np.nan, 0.005])
+        np.testing.assert_allclose(adjust_p_values(p, 'bonferroni'), [0.04, 0.16, 0.12, np.nan, 0.02])
+        np.testing.assert_allclose(adjust_p_values(p, 'holm'), [0.03, 0.06, 0.06, np.nan, 0.02])
+        np.testing.assert_allclose(adjust_p_values(p, 'fdr_bh'), [0.02, 0.04, 0.04, np.nan, 0.02])
+
+if __name__ == '__main__':
+    unittest.main()
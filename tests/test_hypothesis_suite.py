@@ -0,0 +1,88 @@
+import unittest
+import numpy as np
+import pandas as pd
+from scipy import stats
+from scripts.hypothesis_suite import HypothesisSpec, default_suite, results_to_frame, run_suite
+from scripts.hypothesis_testing import ABHypothesisTesting
+
+
+class TestHypothesisSuite(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        n = 600
+        self.data = pd.DataFrame({
+            'Province': rng.choice(['Gauteng', 'Western Cape', 'KwaZulu-Natal'], n),
+            'PostalCode': rng.choice(['2000', '7100', '4001'], n),
+            'Gender': rng.choice(['Male', 'Female', 'Not specified'], n),
+            'VehicleType': rng.choice(['Passenger Vehicle', 'Heavy Commercial'], n),
+            'TotalPremium': rng.gamma(2.0, 50.0, n),
+            'TotalClaims': rng.exponential(30.0, n),
+        })
+        self.specs = [
+            HypothesisSpec('Gender', 'TotalPremium', 't', groups=('Male', 'Female')),
+            HypothesisSpec('Gender', 'TotalClaims', 'welch', groups=('Male', 'Female'),
+                           filters={'Province': 'Gauteng'}),
+            HypothesisSpec('PostalCode', 'TotalPremium', 'z', groups=('2000', '7100'),
+                           filters={'VehicleType': ['Passenger Vehicle'], 'Province': ['Gauteng', 'Western Cape']}),
+            HypothesisSpec('Province', 'TotalClaims', 'chi2', bins=4, filters={'Gender': 'Male'}),
+            HypothesisSpec('Gender', 'TotalPremium', 'permutation', groups=('Male', 'Female'),
+                           options={'n_resamples': 200, 'random_state': 1}),
+        ]
+
+    def test_results_match_direct_tests(self):
+        results = run_suite(self.data, self.specs, executor=None)
+        self.assertEqual([r.name for r in results], [spec.label() for spec in self.specs])
+        self.assertTrue(all(r.error is None for r in results))
+
+        male = self.data.loc[self.data['Gender'] == 'Male', 'TotalPremium']
+        female = self.data.loc[self.data['Gender'] == 'Female', 'TotalPremium']
+        t_stat, p_value = stats.ttest_ind(male, female)
+        self.assertAlmostEqual(results[0].statistic, t_stat)
+        self.assertAlmostEqual(results[0].p_value, p_value)
+        self.assertEqual((results[0].n_a, results[0].n_b, results[0].n), (len(male), len(female), len(male) + len(female)))
+
+        segment = self.data[self.data['Province'] == 'Gauteng']
+        t_stat, p_value = stats.ttest_ind(segment.loc[segment['Gender'] == 'Male', 'TotalClaims'],
+                                          segment.loc[segment['Gender'] == 'Female', 'TotalClaims'], equal_var=False)
+        self.assertAlmostEqual(results[1].statistic, t_stat)
+        self.assertAlmostEqual(results[1].p_value, p_value)
+
+        segment = self.data[(self.data['VehicleType'] == 'Passenger Vehicle')
+                            & self.data['Province'].isin(['Gauteng', 'Western Cape'])]
+        self.assertEqual(results[2].n, segment['PostalCode'].isin(['2000', '7100']).sum())
+
+        self.assertEqual(results[3].n, (self.data['Gender'] == 'Male').sum())
+        self.assertEqual(results[3].reject, results[3].p_value < 0.05)
+
+    def test_executors_give_identical_results(self):
+        sequential = results_to_frame(run_suite(self.data, self.specs, executor=None)).drop(columns='runtime_s')
+        for executor in ('thread', 'process'):
+            parallel = results_to_frame(run_suite(self.data, self.specs, executor=executor, max_workers=2))
+            pd.testing.assert_frame_equal(parallel.drop(columns='runtime_s'), sequential)
+            self.assertTrue((parallel['runtime_s'] >= 0).all())
+
+    def test_errors_are_recorded(self):
+        specs = [
+            HypothesisSpec('Gender', 'TotalPremium', 'anova', groups=('Male', 'Female')),
+            HypothesisSpec('Gender', 'TotalPremium', 't', groups=('Male', 'Unknown')),
+            HypothesisSpec('Gender', 'TotalPremium', 't'),
+        ]
+        results = run_suite(self.data, specs, executor='thread', max_workers=2)
+        self.assertTrue(all(r.error is not None and r.p_value is None and r.reject is None for r in results))
+        self.assertIn('Unknown test', results[0].error)
+
+    def test_default_suite_matches_run_all_tests(self):
+        tester = ABHypothesisTesting(self.data)
+        results = {r.name: r for r in run_suite(tester, default_suite(), executor='thread')}
+        chi2, p_value = tester._chi_squared_test('Province', 'TotalPremium')
+        self.assertAlmostEqual(results['Risk Differences Across Provinces'].p_value, p_value)
+        expected = tester.run_all_tests()
+        self.assertEqual(list(results), list(expected))
+        for name in ('Margin Differences Between Postal Codes', 'Risk Differences Between Women and Men'):
+            self.assertIn(f"statistic = {results[name].statistic}, p-value = {results[name].p_value}\n",
+                          expected[name])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,6 +3,7 @@ import pandas as pd
 import numpy as np
 from scipy import stats
 from scripts.hypothesis_testing import ABHypothesisTesting
+from scripts.synthetic_data import generate_policies
 
 class TestABHypothesisTesting(unittest.TestCase):
 
@@ -27,6 +28,40 @@ class TestABHypothesisTesting(unittest.TestCase):
         expected_result = self.data[self.data['Gender'] == 'Male']
         pd.testing.assert_frame_equal(result, expected_result)
 
+    def test_segment_data_is_copy_free(self):
+        # Without a filter the shared data itself is returned
+        self.assertIs(self.ab_test._segment_data('Province'), self.ab_test.data)
+
+        # Group indexes are built once per feature and reused
+        self.ab_test._segment_data('Province', value='B')
+        index = self.ab_test._group_indexes['Province']
+        self.ab_test._segment_data('Province', value='C')
+        self.assertIs(self.ab_test._group_indexes['Province'], index)
+
+        result = self.ab_test._segment_data('Province', value='B', columns=['TotalPremium'])
+        pd.testing.assert_frame_equal(result, self.data.loc[self.data['Province'] == 'B', ['TotalPremium']])
+        self.assertTrue(self.ab_test._segment_data('Province', value='Z').empty)
+
+    def test_segment_data_exclude_keeps_missing_values(self):
+        data = self.data.copy()
+        data.loc[0, 'Gender'] = None
+        ab_test = ABHypothesisTesting(data)
+        result = ab_test._segment_data('Gender', exclude_values=['Female', 'Not Specified'])
+        pd.testing.assert_frame_equal(result, data[~data['Gender'].isin(['Female', 'Not Specified'])])
+
+    def test_run_all_tests_does_not_mutate_data(self):
+        data = pd.concat([self.data, pd.DataFrame({'Province': ['A'], 'PostalCode': ['123'], 'Gender': ['Not Specified'],
+                                                   'TotalPremium': [900], 'TotalClaims': [0]})], ignore_index=True)
+        ab_test = ABHypothesisTesting(data)
+        ab_test.run_all_tests()
+        self.assertIs(ab_test.data, data)
+        self.assertEqual(len(ab_test.data), 7)
+
+    def test_reassigning_data_resets_group_indexes(self):
+        self.ab_test._segment_data('Province', value='A')
+        self.ab_test.data = self.data.iloc[:2]
+        self.assertEqual(len(self.ab_test._segment_data('Province', value='B')), 0)
+
     def test_check_identical_values(self):
         # Test with a column that has all identical values
         # Make sure to modify the sample data as needed
@@ -70,5 +105,28 @@ class TestABHypothesisTesting(unittest.TestCase):
         self.assertIsInstance(results['Margin Differences Between Postal Codes'], str)
         self.assertIsInstance(results['Risk Differences Between Women and Men'], str)
 
+    def test_resampling_test(self):
+        group_a = self.ab_test._segment_data('Gender', value='Male')
+        group_b = self.ab_test._segment_data('Gender', value='Female')
+        for method in ('permutation', 'bootstrap'):
+            diff, p_value = self.ab_test._resampling_test(group_a, group_b, 'TotalPremium', method,
+                                                          n_resamples=500, random_state=0)
+            self.assertEqual(diff, -500.0)
+            self.assertTrue(0 < p_value <= 1)
+
+    def test_run_all_tests_with_resampling(self):
+        results = self.ab_test.run_all_tests(resampling='permutation', n_resamples=200, random_state=0)
+        self.assertIn('Margin Differences Between Postal Codes (Permutation)', results)
+        self.assertIn('Risk Differences Between Women and Men (Permutation)', results)
+        self.assertIsInstance(results['Risk Differences Between Women and Men (Permutation)'], str)
+
+    def test_run_all_tests_on_synthetic_data(self):
+        # A realistically shaped portfolio instead of the six-row frame
+        data = generate_policies(5_000, seed=0)
+        results = ABHypothesisTesting(data, metric_bins=10).run_all_tests()
+        self.assertEqual(len(results), 4)
+        for result in results.values():
+            self.assertRegex(result, r'p-value = [0-9.e-]+\n')
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,131 @@
+import io
+import os
+import shutil
+import tempfile
+import unittest
+import zipfile
+from scripts.execution_backend import PartitionedDataset
+from scripts.ingestion import STAGING_DIR, SchemaError, ingest_archives, read_manifest, resolve_archives, validate_chunk
+from scripts.load_data import file_digest
+from scripts.synthetic_data import FILENAME, generate_policies
+
+
+def _write_archive(path, data):
+    """
+    Writes rows as the policy file inside a zip inside a zip, like the monthly drops.
+    """
+    text = data.to_csv(sep='|', index=False)
+    inner = io.BytesIO()
+    with zipfile.ZipFile(inner, 'w') as inner_zip:
+        inner_zip.writestr(FILENAME, text)
+    with zipfile.ZipFile(path, 'w') as outer_zip:
+        outer_zip.writestr('MachineLearningRating_v3.zip', inner.getvalue())
+    return path
+
+
+def _policies(months, n_rows=600, seed=0):
+    data = generate_policies(n_rows, seed=seed)
+    data['TransactionMonth'] = [f'{months[i % len(months)]}-01 00:00:00' for i in range(n_rows)]
+    return data
+
+
+class TestIngestion(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.drops = os.path.join(self.tmp_dir, 'drops')
+        self.store = os.path.join(self.tmp_dir, 'store')
+        os.makedirs(self.drops)
+        self.january = _policies(['2015-01', '2015-02'], seed=1)
+        self.march = _policies(['2015-02', '2015-03'], seed=2)
+        _write_archive(os.path.join(self.drops, 'drop-2015-02.zip'), self.january)
+        _write_archive(os.path.join(self.drops, 'drop-2015-03.zip'), self.march)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _stored(self):
+        return PartitionedDataset(self.store).to_pandas()
+
+    def test_ingests_only_new_months(self):
+        report = ingest_archives(os.path.join(self.drops, '*.zip'), FILENAME, self.store, max_workers=2,
+                                 chunksize=250)
+        self.assertEqual(report['status'].tolist(), ['ingested', 'ingested'])
+        self.assertEqual(report['rows'].tolist(), [600, 600])
+        self.assertEqual(report['months_added'].tolist(), [['2015-01', '2015-02'], ['2015-03']])
+        self.assertEqual(report['months_skipped'].tolist(), [[], ['2015-02']])
+
+        self.assertEqual(sorted(os.listdir(self.store)),
+                         ['digests.json', 'manifest.json', 'month=2015-01', 'month=2015-02', 'month=2015-03'])
+        stored = self._stored()
+        self.assertEqual(len(stored), 900)
+        months = stored['TransactionMonth'].astype(str).str[:7]
+        self.assertEqual(months.value_counts().sort_index().tolist(), [300, 300, 300])
+        # The second archive's February rows were not added
+        expected = self.january['UnderwrittenCoverID'][self.january['TransactionMonth'].str.startswith('2015-02')]
+        self.assertEqual(sorted(stored.loc[months == '2015-02', 'UnderwrittenCoverID']), sorted(expected))
+
+    def test_rerun_is_idempotent(self):
+        ingest_archives(os.path.join(self.drops, '*.zip'), FILENAME, self.store, max_workers=1)
+        before = sorted(os.path.join(root, name) for root, _, names in os.walk(self.store) for name in names)
+
+        # A renamed copy of an ingested archive has the same content hash
+        shutil.copy(os.path.join(self.drops, 'drop-2015-02.zip'), os.path.join(self.drops, 'copy.zip'))
+        report = ingest_archives(os.path.join(self.drops, '*.zip'), FILENAME, self.store, max_workers=2)
+        self.assertEqual(report['status'].tolist(), ['skipped'] * 3)
+        after = sorted(os.path.join(root, name) for root, _, names in os.walk(self.store) for name in names)
+        self.assertEqual(after, before)
+        self.assertEqual(len(self._stored()), 900)
+
+    def test_leftover_staging_parts_are_discarded(self):
+        # An interrupted run with a smaller chunksize left more parts than this run writes
+        archive = os.path.join(self.drops, 'drop-2015-02.zip')
+        prefix = file_digest(archive)[:16]
+        staged = os.path.join(self.store, STAGING_DIR, prefix, 'month=2015-01')
+        os.makedirs(staged)
+        for index in range(5):
+            self.january.head(10).to_parquet(os.path.join(staged, f'part-{prefix}-{index:05d}.parquet'))
+
+        report = ingest_archives(archive, FILENAME, self.store, max_workers=1, chunksize=1000)
+        self.assertEqual(report['rows'].tolist(), [600])
+        self.assertEqual(len(self._stored()), 600)
+        self.assertEqual(len(os.listdir(os.path.join(self.store, 'month=2015-01'))), 1)
+
+    def test_refresh_adds_new_drop(self):
+        ingest_archives(os.path.join(self.drops, 'drop-2015-02.zip'), FILENAME, self.store, max_workers=1)
+        report = ingest_archives(os.path.join(self.drops, '*.zip'), FILENAME, self.store, max_workers=1)
+        self.assertEqual(report['status'].tolist(), ['skipped', 'ingested'])
+        self.assertEqual(report['months_added'].tolist(), [[], ['2015-03']])
+        self.assertEqual(sorted(read_manifest(self.store)['months']), ['2015-01', '2015-02', '2015-03'])
+
+    def test_schema_errors_fail_the_archive_only(self):
+        _write_archive(os.path.join(self.drops, 'drop-2015-04.zip'),
+                       _policies(['2015-04']).drop(columns=['Gender']))
+        report = ingest_archives([os.path.join(self.drops, 'drop-2015-04.zip'),
+                                  os.path.join(self.drops, 'drop-2015-02.zip')], FILENAME, self.store, max_workers=2)
+        self.assertEqual(report['status'].tolist(), ['ingested', 'failed'])
+        self.assertIn("SchemaError: Columns differ from the store: missing ['Gender']", report['error'].iloc[1])
+
+        manifest = read_manifest(self.store)
+        self.assertEqual(sorted(manifest['months']), ['2015-01', '2015-02'])
+        self.assertEqual(len(manifest['archives']), 1)
+        self.assertFalse(os.path.exists(os.path.join(self.store, STAGING_DIR)))
+        self.assertEqual(len(self._stored()), 600)
+
+    def test_validate_chunk(self):
+        columns = list(self.january.columns)
+        reordered = validate_chunk(self.january[columns[::-1]], columns)
+        self.assertEqual(list(reordered.columns), columns)
+        with self.assertRaises(SchemaError):
+            validate_chunk(self.january.assign(TransactionMonth='not a date'), columns)
+
+    def test_resolve_archives(self):
+        archives = resolve_archives([os.path.join(self.drops, '*.zip'), os.path.join(self.drops, 'drop-2015-03.zip')])
+        self.assertEqual([os.path.basename(path) for path in archives], ['drop-2015-02.zip', 'drop-2015-03.zip'])
+        self.assertEqual(resolve_archives(os.path.join(self.drops, '*.tar')), [])
+        with self.assertRaises(FileNotFoundError):
+            resolve_archives(os.path.join(self.drops, 'missing.zip'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+import numpy as np
+import pandas as pd
+from scripts import instrumentation
+from scripts.data_processing import DataProcessing
+from scripts.hypothesis_testing import ABHypothesisTesting
+from scripts.instrumentation import instrument, instrumented, profile_next_call, registry
+from scripts.synthetic_data import generate_policies
+
+
+@instrument
+def allocate(n):
+    return np.ones(n)
+
+
+@instrument(name='outer_step')
+def outer(data):
+    time.sleep(0.01)
+    allocate(1_000_000)
+    return data.head(3)
+
+
+@instrument
+def stream(n_chunks):
+    for i in range(n_chunks):
+        time.sleep(0.01)
+        yield pd.DataFrame({'a': range(i + 1)})
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        registry.clear()
+
+    def tearDown(self):
+        instrumentation.disable()
+        registry.clear()
+
+    def test_disabled_records_nothing(self):
+        self.assertFalse(instrumentation.is_enabled())
+        allocate(10)
+        self.assertEqual(len(registry.records), 0)
+
+    def test_records_time_memory_rows_and_nesting(self):
+        with instrumented():
+            outer(pd.DataFrame({'a': range(10)}))
+        records = registry.to_frame().set_index('name')
+        self.assertEqual(list(records.index), ['allocate', 'outer_step'])
+
+        step = records.loc['outer_step']
+        self.assertGreaterEqual(step['wall_time_s'], 0.01)
+        self.assertEqual(step['rows'], 3)
+        self.assertEqual(step['depth'], 0)
+        # The 8 MB allocated by the nested call counts toward the outer peak as well
+        self.assertGreater(step['memory_peak_mb'], 7.5)
+
+        inner = records.loc['allocate']
+        self.assertEqual(inner['parent'], 'outer_step')
+        self.assertEqual(inner['depth'], 1)
+        self.assertGreater(inner['memory_peak_mb'], 7.5)
+        self.assertTrue(pd.isna(inner['rows']))
+
+    def test_errors_are_recorded_and_raised(self):
+        @instrument
+        def fail():
+            raise ValueError('boom')
+
+        with instrumented(memory=False):
+            with self.assertRaises(ValueError):
+                fail()
+        record = registry.records[-1]
+        self.assertEqual(record.error, 'ValueError: boom')
+        self.assertIsNone(record.memory_peak_mb)
+
+    def test_json_lines_sink(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'calls.jsonl')
+            with instrumented(path=path):
+                allocate(10)
+                allocate(10)
+            allocate(10)
+            with open(path) as f:
+                lines = [json.loads(line) for line in f]
+        self.assertEqual([line['name'] for line in lines], ['allocate', 'allocate'])
+        self.assertIn('cpu_time_s', lines[0])
+
+    def test_generators_are_recorded_when_consumed(self):
+        with instrumented(memory=False):
+            chunks = stream(3)
+            self.assertEqual(len(registry.records), 0)
+            self.assertEqual(sum(len(chunk) for chunk in chunks), 6)
+            partial = stream(3)
+            next(partial)
+            partial.close()
+        consumed, closed = registry.records
+        self.assertEqual((consumed.name, consumed.rows, consumed.error), ('stream', 6, None))
+        self.assertGreaterEqual(consumed.wall_time_s, 0.03)
+        self.assertIsNone(consumed.memory_peak_mb)
+        self.assertEqual(closed.rows, 1)
+
+    def test_environment_setting(self):
+        for setting in ['', '0', 'false', 'No', ' off ']:
+            instrumentation.configure_from_environment(setting)
+            self.assertFalse(instrumentation.is_enabled(), setting)
+        instrumentation.configure_from_environment('true')
+        self.assertTrue(instrumentation.is_enabled())
+        self.assertEqual(registry.sinks, [])
+        instrumentation.disable()
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'calls.jsonl')
+            instrumentation.configure_from_environment(path)
+            self.assertEqual([sink.path for sink in registry.sinks], [path])
+
+    def test_profile_next_call(self):
+        with instrumented(memory=False):
+            profile_next_call('outer_step')
+            outer(pd.DataFrame({'a': range(5)}))
+            outer(pd.DataFrame({'a': range(5)}))
+        self.assertIn('allocate', instrumentation.last_profiles['outer_step'])
+        self.assertEqual(instrumentation._profile_requests, {})
+
+    def test_pipeline_steps_are_instrumented(self):
+        data = generate_policies(20_000, seed=0)
+        with instrumented():
+            DataProcessing(data).handle_missing_data('low', ['Bank', 'CustomValueEstimate'])
+            ABHypothesisTesting(data, metric_bins=5).run_all_tests()
+        summary = registry.summary()
+        for name in ['DataProcessing.handle_missing_data', 'MissingValueImputer.fit',
+                     'ABHypothesisTesting.run_all_tests', 'ABHypothesisTesting._chi_squared_test',
+                     'ABHypothesisTesting._t_test']:
+            self.assertIn(name, summary.index)
+        self.assertEqual(summary.loc['ABHypothesisTesting._chi_squared_test', 'calls'], 2)
+        self.assertEqual(summary.loc['ABHypothesisTesting.run_all_tests', 'rows'], 20_000)
+        gender_rows = data['Gender'].isin(['Male', 'Female']).sum()
+        self.assertEqual(summary.loc['ABHypothesisTesting._t_test', 'rows'], gender_rows)
+
+
+if __name__ == '__main__':
+    unittest.main()
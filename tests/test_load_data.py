@@ -0,0 +1,145 @@
+import os
+import shutil
+import tempfile
+import unittest
+import zipfile
+import pandas as pd
+from scripts.load_data import (load_data, load_data_cached, load_txt_from_zip, open_zip_member,
+                               reduce_chunks, concat_chunks)
+
+class TestLoadData(unittest.TestCase):
+
+    def setUp(self):
+        # Write a small pipe-separated policy file to a temporary directory
+        self.tmp_dir = tempfile.mkdtemp()
+        self.filename = 'policies.txt'
+        self.data = pd.DataFrame({
+            'PolicyID': [1, 2, 3, 4, 5],
+            'Province': ['Gauteng', 'Western Cape', 'Gauteng', 'Limpopo', 'Gauteng'],
+            'PostalCode': [2000, 8000, 2000, 699, 2000],
+            'TotalPremium': [21.93, 0.0, 512.85, 3.26, 100.5],
+            'TotalClaims': [0.0, 0.0, 1500.0, 0.0, 0.0]
+        })
+        self.data.to_csv(os.path.join(self.tmp_dir, self.filename), sep='|', index=False)
+
+        # Nest the file inside an inner zip, stored inside an outer zip
+        inner_zip_path = os.path.join(self.tmp_dir, 'inner.zip')
+        with zipfile.ZipFile(inner_zip_path, 'w', zipfile.ZIP_DEFLATED) as inner_zip:
+            inner_zip.write(os.path.join(self.tmp_dir, self.filename), arcname=self.filename)
+        self.outer_zip_path = os.path.join(self.tmp_dir, 'outer.zip')
+        with zipfile.ZipFile(self.outer_zip_path, 'w', zipfile.ZIP_DEFLATED) as outer_zip:
+            outer_zip.writestr('README.txt', 'policies')
+            outer_zip.write(inner_zip_path, arcname='inner.zip')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_load_txt_from_zip(self):
+        df = load_txt_from_zip(self.tmp_dir, self.filename)
+        self.assertEqual(df.shape, (5, 5))
+        self.assertEqual(df['TotalPremium'].dtype, 'float64')
+
+    def test_streaming_chunks_are_typed(self):
+        chunks = list(load_txt_from_zip(self.tmp_dir, self.filename, chunksize=2))
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 2, 1])
+        for chunk in chunks:
+            self.assertIsInstance(chunk['Province'].dtype, pd.CategoricalDtype)
+            self.assertEqual(chunk['PostalCode'].dtype, 'int64')
+            self.assertEqual(chunk['TotalPremium'].dtype, 'float32')
+
+    def test_postal_codes_match_across_load_paths(self):
+        full = load_txt_from_zip(self.tmp_dir, self.filename)
+        streamed = concat_chunks(load_txt_from_zip(self.tmp_dir, self.filename, chunksize=2))
+        self.assertEqual(streamed['PostalCode'].dtype, full['PostalCode'].dtype)
+        self.assertEqual((streamed['PostalCode'] == 2000).sum(), (full['PostalCode'] == 2000).sum())
+
+    def test_streaming_usecols(self):
+        chunks = load_txt_from_zip(self.tmp_dir, self.filename, chunksize=2, usecols=['Province', 'TotalClaims'])
+        df = concat_chunks(chunks)
+        self.assertEqual(list(df.columns), ['Province', 'TotalClaims'])
+
+    def test_concat_chunks_keeps_categoricals(self):
+        df = concat_chunks(load_txt_from_zip(self.tmp_dir, self.filename, chunksize=2))
+        self.assertIsInstance(df['Province'].dtype, pd.CategoricalDtype)
+        self.assertEqual(set(df['Province'].cat.categories), {'Gauteng', 'Western Cape', 'Limpopo'})
+        self.assertEqual(df['Province'].tolist(), self.data['Province'].tolist())
+
+    def test_reduce_chunks(self):
+        chunks = load_txt_from_zip(self.tmp_dir, self.filename, chunksize=2)
+        total = reduce_chunks(chunks, lambda acc, chunk: acc + chunk['TotalPremium'].astype('float64').sum(), initial=0.0)
+        self.assertAlmostEqual(total, self.data['TotalPremium'].sum(), places=3)
+
+        counts = reduce_chunks(load_txt_from_zip(self.tmp_dir, self.filename, chunksize=2),
+                               lambda acc, chunk: acc.add(chunk['Province'].value_counts(), fill_value=0),
+                               initial=pd.Series(dtype='float64'))
+        self.assertEqual(counts['Gauteng'], 3)
+
+    def test_open_zip_member(self):
+        with open_zip_member(self.outer_zip_path, self.filename) as member:
+            header = member.readline().decode().strip()
+        self.assertEqual(header, '|'.join(self.data.columns))
+
+        with self.assertRaises(FileNotFoundError):
+            with open_zip_member(self.outer_zip_path, 'missing.txt'):
+                pass
+
+    def test_load_data_reads_nested_zip_without_extracting(self):
+        before = set(os.listdir(self.tmp_dir))
+        df = load_data(self.outer_zip_path, self.filename)
+        pd.testing.assert_frame_equal(df, self.data)
+        self.assertEqual(set(os.listdir(self.tmp_dir)), before)
+
+    def test_load_data_streams_nested_zip(self):
+        df = concat_chunks(load_data(self.outer_zip_path, self.filename, chunksize=2))
+        self.assertEqual(len(df), 5)
+        self.assertIsInstance(df['Province'].dtype, pd.CategoricalDtype)
+
+    def test_load_data_extract_to(self):
+        extract_to = os.path.join(self.tmp_dir, 'extracted')
+        df = load_data(self.outer_zip_path, self.filename, extract_to=extract_to)
+        pd.testing.assert_frame_equal(df, self.data)
+        self.assertTrue(os.path.exists(os.path.join(extract_to, self.filename)))
+
+    def test_load_data_missing_member(self):
+        with self.assertRaises(RuntimeError):
+            load_data(self.outer_zip_path, 'missing.txt')
+        with self.assertRaises(RuntimeError):
+            list(load_data(self.outer_zip_path, 'missing.txt', chunksize=2))
+
+    def test_load_data_cached(self):
+        cache_dir = os.path.join(self.tmp_dir, 'cache')
+        df = load_data_cached(self.outer_zip_path, self.filename, cache_dir=cache_dir)
+        pd.testing.assert_frame_equal(df, self.data)
+        entries = [entry for entry in os.listdir(cache_dir) if entry.endswith('.feather')]
+        self.assertEqual(len(entries), 1)
+
+        # Warm reload with column projection
+        df = load_data_cached(self.outer_zip_path, self.filename, cache_dir=cache_dir, columns=['Province', 'TotalPremium'])
+        pd.testing.assert_frame_equal(df, self.data[['Province', 'TotalPremium']])
+
+        # Changing the source archive invalidates the entry
+        with zipfile.ZipFile(self.outer_zip_path, 'a') as outer_zip:
+            outer_zip.writestr('NOTES.txt', 'updated')
+        os.utime(self.outer_zip_path, ns=(0, 0))
+        load_data_cached(self.outer_zip_path, self.filename, cache_dir=cache_dir)
+        new_entries = [entry for entry in os.listdir(cache_dir) if entry.endswith('.feather')]
+        self.assertEqual(len(new_entries), 1)
+        self.assertNotEqual(new_entries, entries)
+
+    def test_load_data_cached_same_name_in_other_directory(self):
+        cache_dir = os.path.join(self.tmp_dir, 'cache')
+        other_dir = os.path.join(self.tmp_dir, 'other')
+        os.makedirs(other_dir)
+        other_zip_path = os.path.join(other_dir, 'outer.zip')
+        with zipfile.ZipFile(other_zip_path, 'w') as outer_zip:
+            outer_zip.writestr(self.filename, self.data.iloc[:2].to_csv(sep='|', index=False))
+
+        load_data_cached(self.outer_zip_path, self.filename, cache_dir=cache_dir)
+        load_data_cached(other_zip_path, self.filename, cache_dir=cache_dir)
+        entries = [entry for entry in os.listdir(cache_dir) if entry.endswith('.feather')]
+        self.assertEqual(len(entries), 2)
+        self.assertEqual(len(load_data_cached(self.outer_zip_path, self.filename, cache_dir=cache_dir)), 5)
+        self.assertEqual(len(load_data_cached(other_zip_path, self.filename, cache_dir=cache_dir)), 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from scipy import sparse
+from sklearn.linear_model import LinearRegression
+from sklearn.metrics import mean_squared_error
+from sklearn.model_selection import KFold
+from scripts.feature_matrix import FeatureMatrix
+from scripts.model_training import cross_validate_models, make_model, metrics_table, split_cores
+
+
+class TestModelTraining(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        n = 300
+        dense = rng.normal(size=(n, 3))
+        onehot = sparse.random(n, 4, density=0.2, format='csr', random_state=1, data_rvs=np.ones)
+        X = sparse.hstack([sparse.csr_matrix(dense), onehot], format='csr').astype(np.float32)
+        y = 3 * dense[:, 0] - 2 * dense[:, 1] + 5 * onehot[:, 0].toarray().ravel() + rng.normal(scale=0.1, size=n)
+        self.matrix = FeatureMatrix(X, y, ['a', 'b', 'c', 'd_1', 'd_2', 'd_3', 'd_4'])
+
+    def test_split_cores(self):
+        self.assertEqual(split_cores(20, n_cores=8), (8, 1))
+        self.assertEqual(split_cores(4, n_cores=8), (4, 2))
+        self.assertEqual(split_cores(20, max_workers=2, n_cores=8), (2, 4))
+        self.assertEqual(split_cores(3, n_cores=1), (1, 1))
+        self.assertEqual(split_cores(3, max_workers=2, n_cores=1), (2, 1))
+
+    def test_make_model(self):
+        model = make_model('XGBoost', n_jobs=3)
+        self.assertEqual(model.get_params()['tree_method'], 'hist')
+        self.assertEqual(model.get_params()['n_jobs'], 3)
+        self.assertEqual(make_model('Random Forest', n_jobs=2).n_jobs, 2)
+        with self.assertRaises(ValueError):
+            make_model('SVM')
+
+    def test_cross_validation_in_process(self):
+        results = cross_validate_models(self.matrix, n_splits=3, max_workers=1, n_estimators=200)
+        self.assertEqual(len(results), 12)
+        self.assertEqual(list(results['model'].unique()), ['Random Forest', 'XGBoost', 'Decision Tree', 'Linear Regression'])
+
+        # Folds match a plain KFold fit of the same model
+        train, test = next(KFold(n_splits=3, shuffle=True, random_state=42).split(np.arange(300)))
+        model = LinearRegression().fit(self.matrix.X[train], self.matrix.y[train])
+        linear = results[(results['model'] == 'Linear Regression') & (results['fold'] == 0)].iloc[0]
+        self.assertAlmostEqual(linear['MSE'], mean_squared_error(self.matrix.y[test], model.predict(self.matrix.X[test])))
+        self.assertEqual((linear['n_train'], linear['n_test']), (len(train), len(test)))
+
+        xgboost = results[results['model'] == 'XGBoost']
+        self.assertTrue((xgboost['best_iteration'] < 199).all())
+        self.assertTrue((xgboost['n_train'] < 200).all())
+
+        table = metrics_table(results)
+        self.assertEqual(list(table.columns), ['MSE', 'R2', 'MSE_std', 'R2_std'])
+        self.assertGreater(table.loc['Linear Regression', 'R2'], 0.95)
+
+    def test_parallel_matches_sequential(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'matrix')
+            self.matrix.save(path)
+            models = ['Decision Tree', 'XGBoost']
+            parallel = cross_validate_models(path, models=models, n_splits=2, max_workers=2, n_estimators=50)
+            sequential = cross_validate_models(self.matrix, models=models, n_splits=2, max_workers=1, n_estimators=50)
+        self.assertEqual(list(parallel['model']), ['Decision Tree'] * 2 + ['XGBoost'] * 2)
+        np.testing.assert_allclose(parallel['MSE'], sequential['MSE'], rtol=1e-6)
+
+    def test_unknown_model_raises(self):
+        with self.assertRaises(ValueError):
+            cross_validate_models(self.matrix, models=['SVM'], max_workers=1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+import numpy as np
+import pandas as pd
+from scripts.data_visualization import DataVisualizer
+from scripts.outlier_capping import IQRCapper, KLLSketch
+
+class TestIQRCapper(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        n = 2000
+        self.df = pd.DataFrame({
+            'TotalPremium': rng.lognormal(3, 1.2, n),
+            'TotalClaims': np.where(rng.random(n) < 0.3, rng.lognormal(8, 1.5, n), 0.0),
+            'SumInsured': rng.integers(1000, 500000, n).astype(float),
+            'Province': rng.choice(['Gauteng', 'Limpopo'], n)
+        })
+        self.df.loc[::97, 'TotalPremium'] = np.nan
+        self.columns = ['TotalPremium', 'TotalClaims', 'SumInsured']
+
+    def _reference_cap(self, df):
+        # Per-column, per-element reference implementation of IQR capping
+        df = df.copy()
+        for column in self.columns:
+            q1, q3 = df[column].quantile(0.25), df[column].quantile(0.75)
+            lower, upper = q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1)
+            df[column] = df[column].apply(lambda x: lower if x < lower else (upper if x > upper else x))
+        return df
+
+    def test_fit_transform_matches_reference(self):
+        capped = IQRCapper().fit_transform(self.df, self.columns)
+        pd.testing.assert_frame_equal(capped, self._reference_cap(self.df))
+        self.assertTrue(self.df['TotalPremium'].max() > capped['TotalPremium'].max())  # Input untouched
+
+    def test_cap_all_outliers(self):
+        expected = self._reference_cap(self.df)
+        vis = DataVisualizer(self.df)
+        capped = vis.cap_all_outliers(self.columns)
+        pd.testing.assert_frame_equal(capped, expected)
+        self.assertIsInstance(vis.capper, IQRCapper)
+
+    def test_fitted_bounds_reused_on_new_data(self):
+        capper = IQRCapper().fit(self.df, self.columns)
+        new_data = pd.DataFrame({'TotalPremium': [-1e6, 1e6], 'TotalClaims': [0.0, 1e9], 'SumInsured': [0.0, 1e9]})
+        capped = capper.transform(new_data)
+        self.assertEqual(capped['TotalPremium'].tolist(), capper.bounds.loc['TotalPremium'].tolist())
+
+    def test_partial_fit_approximates_exact_bounds(self):
+        streaming = IQRCapper(seed=0)
+        for start in range(0, len(self.df), 500):
+            streaming.partial_fit(self.df.iloc[start:start + 500], self.columns)
+        exact = IQRCapper().fit(self.df, self.columns)
+        spread = self.df[self.columns].std()
+        error = (streaming.bounds - exact.bounds).abs().div(spread, axis=0)
+        self.assertTrue((error < 0.1).all().all())
+
+    def test_kll_sketch_quantiles(self):
+        values = np.random.default_rng(2).normal(size=200000)
+        sketch = KLLSketch(k=200, seed=0)
+        for chunk in np.array_split(values, 20):
+            sketch.update(chunk)
+        other = KLLSketch(k=200, seed=1).update(values[:1000])
+        self.assertAlmostEqual(sketch.quantile(0.5), 0.0, delta=0.05)
+        self.assertEqual(sketch.quantile(1.0), values.max())
+        ranks = np.searchsorted(np.sort(values), sketch.quantile([0.1, 0.25, 0.75, 0.9])) / len(values)
+        np.testing.assert_allclose(ranks, [0.1, 0.25, 0.75, 0.9], atol=0.02)
+        self.assertEqual(sketch.merge(other).count, 201000)
+
+if __name__ == '__main__':
+    unittest.main()
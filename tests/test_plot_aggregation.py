@@ -0,0 +1,63 @@
+import unittest
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+from matplotlib import cbook
+import numpy as np
+import pandas as pd
+from scripts import plot_aggregation as agg
+from scripts.data_visualization import DataVisualizer
+
+class TestPlotAggregation(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        n = 3000
+        self.df = pd.DataFrame({
+            'Province': rng.choice(['Gauteng', 'Western Cape', 'Limpopo'], n, p=[0.5, 0.3, 0.2]),
+            'CoverType': rng.choice(['Own Damage', 'Windscreen'], n),
+            'VehicleType': rng.choice(['Passenger Vehicle', 'Medium Commercial'], n),
+            'make': rng.choice(['TOYOTA', 'NISSAN'], n),
+            'TotalPremium': rng.lognormal(3, 1.2, n),
+            'TotalClaims': np.where(rng.random(n) < 0.2, rng.lognormal(8, 1, n), 0.0)
+        })
+
+    def tearDown(self):
+        plt.close('all')
+
+    def test_count_table(self):
+        counts = agg.count_table(self.df, 'Province')
+        pd.testing.assert_series_equal(counts, self.df['Province'].value_counts(), check_names=False)
+
+        by_cover = agg.count_table(self.df, 'Province', hue='CoverType')
+        expected = pd.crosstab(self.df['Province'], self.df['CoverType']).reindex(by_cover.index)
+        pd.testing.assert_frame_equal(by_cover, expected, check_names=False)
+
+    def test_box_summary_matches_matplotlib(self):
+        summaries = agg.box_summary(self.df, 'TotalPremium', x='Province')
+        for summary in summaries:
+            values = self.df.loc[self.df['Province'] == summary['label'], 'TotalPremium']
+            expected = cbook.boxplot_stats(values.to_numpy())[0]
+            for key in ('q1', 'med', 'q3', 'whislo', 'whishi', 'mean'):
+                self.assertAlmostEqual(summary[key], expected[key])
+
+    def test_sample_rows_per_group(self):
+        sample = agg.sample_rows(self.df, n=100, by='Province')
+        self.assertTrue((sample['Province'].value_counts() == 100).all())
+        self.assertEqual(len(agg.sample_rows(self.df, n=10)), 10)
+
+    def test_histogram_and_kde(self):
+        counts, edges = agg.histogram(self.df['TotalPremium'], bins=30)
+        self.assertEqual(counts.sum(), len(self.df))
+        x, y = agg.kde_curve(self.df['TotalPremium'], edges, n=500)
+        self.assertEqual(len(x), len(y))
+
+    def test_aggregate_mode_renders(self):
+        vis = DataVisualizer(self.df, aggregate=True, sample_size=200)
+        vis.univariate_analysis(num_cols=['TotalPremium'], cat_cols=['Province'])
+        vis.plot_geographical_trends(['Own Damage', 'Windscreen'])
+        vis.plot_outliers_boxplot(['TotalPremium', 'TotalClaims'])
+        vis.plot_violin_premium_by_cover('CoverType', 'TotalPremium')
+
+if __name__ == '__main__':
+    unittest.main()
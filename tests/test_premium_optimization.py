@@ -0,0 +1,86 @@
+import time
+import unittest
+import numpy as np
+import pandas as pd
+from scipy import optimize
+from scripts.premium_optimization import optimize_premiums, segment_loss_ratios
+
+
+class TestPremiumOptimization(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        n = 5000
+        self.data = pd.DataFrame({
+            'Province': rng.choice(['Gauteng', 'Western Cape', 'Limpopo'], n),
+            'PostalCode': rng.choice(['2000', '7100', '4001', '1200'], n),
+            'VehicleType': rng.choice(['Passenger Vehicle', 'Medium Commercial'], n),
+            'CoverType': rng.choice(['Own Damage', 'Windscreen'], n),
+            'TotalPremium': rng.gamma(2.0, 50.0, n),
+            'TotalClaims': np.where(rng.random(n) < 0.1, rng.exponential(700.0, n), 0.0),
+        })
+
+    def test_segment_loss_ratios(self):
+        table = segment_loss_ratios(self.data, full_credibility=100)
+        self.assertEqual(table['policies'].sum(), len(self.data))
+        self.assertAlmostEqual(table['claims'].sum(), self.data['TotalClaims'].sum())
+
+        segment = self.data[(self.data['Province'] == 'Gauteng') & (self.data['PostalCode'] == '2000')
+                            & (self.data['VehicleType'] == 'Passenger Vehicle') & (self.data['CoverType'] == 'Windscreen')]
+        row = table.loc[('Gauteng', '2000', 'Passenger Vehicle', 'Windscreen')]
+        self.assertEqual(row['claim_count'], (segment['TotalClaims'] > 0).sum())
+        z = min(1.0, np.sqrt(row['claim_count'] / 100))
+        portfolio = self.data['TotalClaims'].sum() / self.data['TotalPremium'].sum()
+        lr = segment['TotalClaims'].sum() / segment['TotalPremium'].sum()
+        self.assertAlmostEqual(row['credibility'], z)
+        self.assertAlmostEqual(row['credible_loss_ratio'], z * lr + (1 - z) * portfolio)
+
+    def test_matches_general_solver(self):
+        table = segment_loss_ratios(self.data, segments=['Province', 'CoverType'], full_credibility=50)
+        result = optimize_premiums(table, target_loss_ratio=0.6, max_change=0.3, elasticity=-1.5, min_retention=0.7)
+        self.assertTrue(result.feasible)
+        self.assertLessEqual(result.loss_ratio_after, 0.6 + 1e-6)
+        self.assertGreater(result.lagrange_multiplier, 0.0)
+
+        # Premium shares keep the general solver well scaled
+        premium = table['premium'].to_numpy() / table['premium'].sum()
+        indicated = (table['credible_loss_ratio'] / 0.6 - 1).to_numpy()
+        bounds = [(-0.3, min(0.3, 0.3 / 1.5))] * len(table)
+        required = table['claims'].sum() / table['premium'].sum() / 0.6 - 1
+        reference = optimize.minimize(lambda r: premium @ (r - indicated) ** 2, np.zeros(len(table)),
+                                      jac=lambda r: 2 * premium * (r - indicated), bounds=bounds, method='SLSQP',
+                                      constraints=[{'type': 'ineq', 'fun': lambda r: premium @ r - required}],
+                                      options={'ftol': 1e-12, 'maxiter': 500})
+        np.testing.assert_allclose(result.segments['recommended_change'], reference.x, atol=1e-4)
+        self.assertTrue((result.segments['expected_retention'] >= 0.7 - 1e-12).all())
+
+    def test_unconstrained_margin_keeps_indicated_changes(self):
+        table = segment_loss_ratios(self.data)
+        result = optimize_premiums(table, target_loss_ratio=5.0, max_change=1.0, elasticity=0.0)
+        self.assertEqual(result.lagrange_multiplier, 0.0)
+        np.testing.assert_allclose(result.segments['recommended_change'],
+                                   np.clip(result.segments['indicated_change'], -1.0, 1.0))
+
+    def test_infeasible_target(self):
+        table = segment_loss_ratios(self.data)
+        result = optimize_premiums(table, target_loss_ratio=0.01, max_change=0.1)
+        self.assertFalse(result.feasible)
+        np.testing.assert_allclose(result.segments['recommended_change'], 0.1)
+        self.assertGreater(result.loss_ratio_after, 0.01)
+
+    def test_thousands_of_segments(self):
+        rng = np.random.default_rng(1)
+        n = 20_000
+        table = pd.DataFrame({'premium': rng.gamma(2.0, 5000.0, n), 'claims': rng.gamma(1.0, 6500.0, n)})
+        table['credible_loss_ratio'] = table['claims'] / table['premium']
+        elasticity = pd.Series(rng.uniform(-2.0, 0.0, n), index=table.index)
+        start = time.perf_counter()
+        result = optimize_premiums(table, target_loss_ratio=0.6, max_change=0.25, elasticity=elasticity)
+        self.assertLess(time.perf_counter() - start, 2.0)
+        self.assertTrue(result.feasible)
+        self.assertGreater(result.lagrange_multiplier, 0.0)
+        self.assertAlmostEqual(result.loss_ratio_after, 0.6, places=6)
+
+
+if __name__ == '__main__':
+    unittest.main()
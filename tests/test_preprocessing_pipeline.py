@@ -0,0 +1,125 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.feature_selection import SelectKBest, f_regression
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+from scripts.preprocessing_pipeline import PreprocessingPipeline
+
+
+def make_policies(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Unnamed: 0': np.arange(n),
+        'UnderwrittenCoverID': rng.integers(1, 10_000, n),
+        'PolicyID': rng.integers(1, 5_000, n),
+        'TransactionMonth': rng.choice(['2015-01-01 00:00:00', '2015-05-01 00:00:00', '2014-11-01 00:00:00'], n),
+        'IsVATRegistered': rng.choice([True, False], n),
+        'Language': 'English',
+        'Country': 'South Africa',
+        'MaritalStatus': rng.choice(['Single', 'Not specified'], n),
+        'Title': rng.choice(['Mr', 'Mrs', 'Ms', 'Miss', 'Dr'], n),
+        'Gender': rng.choice(['Male', 'Female', 'Not specified'], n),
+        'Province': rng.choice(['Gauteng', 'Western Cape', 'Limpopo', 'North West'], n),
+        'CoverType': rng.choice([f'Cover {i}' for i in range(15)], n),
+        'PostalCode': rng.choice([str(code) for code in range(1000, 1040)], n),
+        'CapitalOutstanding': rng.choice(['119300', '0', '', '52000.5'], n),
+        'SumInsured': rng.gamma(2.0, 50_000.0, n),
+        'Cylinders': rng.choice([4, 6, 8], n),
+        'CrossBorder': np.where(rng.random(n) < 0.5, None, 'No'),
+        'TotalPremium': rng.gamma(2.0, 50.0, n),
+        'TotalClaims': np.where(rng.random(n) < 0.9, 0.0, rng.exponential(1000.0, n)),
+    })
+
+
+class TestPreprocessingPipeline(unittest.TestCase):
+
+    def setUp(self):
+        self.data = make_policies(500)
+        self.pipeline = PreprocessingPipeline(k=8, score_func=f_regression).fit(self.data)
+
+    def test_prepare_matches_notebook_steps(self):
+        prepared = self.pipeline.prepare(self.data)
+        title_to_gender_map = {'Mr': 'Male', 'Mrs': 'Female', 'Ms': 'Female', 'Miss': 'Female', 'Dr': None}
+        expected = self.data.apply(lambda row: title_to_gender_map.get(row['Title'], row['Gender']), axis=1)
+        pd.testing.assert_series_equal(prepared['Gender'], expected, check_names=False, check_dtype=False)
+
+        for col in ['Language', 'Country', 'MaritalStatus', 'PolicyID', 'TransactionMonth', 'CrossBorder']:
+            self.assertNotIn(col, prepared.columns)
+        self.assertEqual(prepared['IsVATRegistered'].dtype, int)
+        self.assertEqual(prepared['CapitalOutstanding'].isna().sum(), 0)
+        self.assertEqual(set(prepared['TransactionQuarter']), {1, 2, 4})
+        self.assertIn('TransactionMonth', self.data.columns)
+
+    def test_encodings_by_cardinality(self):
+        self.assertEqual(set(self.pipeline.label_categories), {'Gender', 'Province', 'Title'})
+        self.assertEqual(set(self.pipeline.onehot_categories), {'CoverType'})
+        self.assertEqual(set(self.pipeline.frequencies), {'PostalCode'})
+
+        encoded = self.pipeline.encode(self.data)
+        self.assertEqual(encoded['Province'].dtype, np.int8)
+        np.testing.assert_array_equal(encoded['Province'], LabelEncoder().fit_transform(self.data['Province']))
+        self.assertNotIn('CoverType_Cover 0', encoded.columns)
+        np.testing.assert_array_equal(encoded['CoverType_Cover 1'], (self.data['CoverType'] == 'Cover 1').astype(np.uint8))
+        np.testing.assert_array_equal(encoded['PostalCode_freq'], self.data['PostalCode'].map(self.data['PostalCode'].value_counts()))
+        # Derived from the target, so it would leak it into the features
+        self.assertNotIn('Premium_to_Claims_Ratio', encoded.columns)
+        self.assertFalse(set(self.pipeline.feature_names) & {'TotalPremium', 'TotalClaims'})
+
+    def test_transform_matches_sklearn_steps(self):
+        encoded = self.pipeline.encode(self.data)
+        X_scaled = StandardScaler().fit_transform(encoded)
+        selector = SelectKBest(score_func=f_regression, k=8).fit(X_scaled, self.data['TotalPremium'])
+
+        result = self.pipeline.transform(self.data)
+        self.assertEqual(list(result.columns), list(encoded.columns[selector.get_support()]))
+        np.testing.assert_allclose(result.to_numpy(), selector.transform(X_scaled))
+
+    def test_new_batch_with_unseen_values(self):
+        batch = make_policies(50, seed=1)
+        batch.loc[0, ['Province', 'PostalCode', 'CoverType']] = ['Mars', '9999', 'Unknown cover']
+        batch = batch.drop(columns=['Cylinders'])
+        encoded = self.pipeline.encode(batch)
+
+        self.assertEqual(list(encoded.columns), self.pipeline.feature_names)
+        self.assertEqual(encoded.loc[0, 'Province'], -1)
+        self.assertEqual(encoded.loc[0, 'PostalCode_freq'], 0)
+        self.assertEqual(encoded.filter(like='CoverType_').loc[0].sum(), 0)
+        self.assertTrue((encoded['Cylinders'] == 0).all())
+        self.assertEqual(self.pipeline.transform(batch).shape, (50, 8))
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'pipeline.pkl')
+            self.pipeline.save(path)
+            loaded = PreprocessingPipeline.load(path)
+        pd.testing.assert_frame_equal(loaded.transform(self.data), self.pipeline.transform(self.data))
+
+    def test_sparse_pipeline_matches_dense(self):
+        sparse_pipeline = PreprocessingPipeline(k=12, score_func=f_regression, sparse=True).fit(self.data)
+        dense_pipeline = PreprocessingPipeline(k=12, score_func=f_regression).fit(self.data)
+        self.assertEqual(sparse_pipeline.feature_names, dense_pipeline.feature_names)
+        self.assertEqual(sparse_pipeline.selected_features, dense_pipeline.selected_features)
+        self.assertTrue(any(name.startswith('CoverType_') for name in sparse_pipeline.selected_features))
+
+        np.testing.assert_allclose(sparse_pipeline.encode_sparse(self.data).toarray(),
+                                   dense_pipeline.encode(self.data).to_numpy(dtype=np.float64), rtol=1e-6)
+
+        X = sparse_pipeline.transform(self.data)
+        self.assertTrue(sparse.isspmatrix_csr(X) or isinstance(X, sparse.csr_array))
+        self.assertEqual(X.dtype, np.float32)
+        expected = dense_pipeline.transform(self.data)
+        onehot = [name.startswith('CoverType_') for name in expected.columns]
+        np.testing.assert_allclose(X.toarray()[:, ~np.array(onehot)], expected.loc[:, ~np.array(onehot)], rtol=1e-5, atol=1e-5)
+        encoded = dense_pipeline.encode(self.data)
+        np.testing.assert_array_equal(X.toarray()[:, onehot], encoded[expected.columns[onehot]])
+
+    def test_transform_before_fit_raises(self):
+        with self.assertRaises(RuntimeError):
+            PreprocessingPipeline().transform(self.data)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import os
+import shutil
+import tempfile
+import unittest
+import matplotlib
+matplotlib.use('Agg')
+import numpy as np
+import pandas as pd
+from scripts.load_data import write_columnar
+from scripts.report_export import _split_specs, export_report
+
+class TestReportExport(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(4)
+        n = 500
+        self.df = pd.DataFrame({
+            'Province': rng.choice(['Gauteng', 'Western Cape', 'Limpopo'], n),
+            'CoverType': rng.choice(['Own Damage', 'Windscreen'], n),
+            'VehicleType': rng.choice(['Passenger Vehicle', 'Medium Commercial'], n),
+            'make': rng.choice(['TOYOTA', 'NISSAN'], n),
+            'TotalPremium': rng.lognormal(3, 1.2, n),
+            'TotalClaims': np.where(rng.random(n) < 0.2, rng.lognormal(8, 1, n), 0.0)
+        })
+        self.specs = [
+            {'kind': 'univariate', 'num_cols': ['TotalPremium'], 'cat_cols': ['Province']},
+            {'kind': 'correlation', 'cols': ['TotalPremium', 'TotalClaims']},
+            {'kind': 'geographical_trends', 'cover_types': ['Own Damage', 'Windscreen']},
+            {'kind': 'outliers_boxplot', 'cols': ['TotalPremium', 'TotalClaims']},
+        ]
+        self.output_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.output_dir)
+
+    def test_export_in_process(self):
+        timings = export_report(self.df, self.specs, self.output_dir, formats=('png', 'svg'), max_workers=1)
+        self.assertEqual(len(timings), 5)  # Univariate is split into one figure per column
+        files = [path for paths in timings['files'] for path in paths]
+        self.assertEqual(len(files), 10)
+        self.assertTrue(all(os.path.exists(path) for path in files))
+        self.assertTrue((timings['wall_time_s'] > 0).all())
+
+    def test_export_process_pool_from_columnar_file(self):
+        data_path = os.path.join(self.output_dir, 'data.feather')
+        write_columnar(self.df, data_path)
+        timings = export_report(data_path, self.specs, self.output_dir, max_workers=2)
+        self.assertEqual(sorted(os.path.basename(path) for paths in timings['files'] for path in paths),
+                         ['correlation_matrix.png', 'geographical_trends.png', 'outliers_boxplot.png',
+                          'univariate_Province.png', 'univariate_TotalPremium.png'])
+
+    def test_univariate_columns_detected(self):
+        paths = [os.path.join(self.output_dir, name) for name in ('data.parquet', 'data.feather')]
+        for path in paths:
+            write_columnar(self.df, path)
+        for data in [self.df] + paths:
+            tasks = _split_specs([{'kind': 'univariate'}, {'kind': 'univariate', 'num_cols': []}], data)
+            self.assertEqual([kwargs['num_cols'] + kwargs['cat_cols'] for _, kwargs in tasks],
+                             [[col] for col in ['TotalPremium', 'TotalClaims', 'Province', 'CoverType',
+                                                'VehicleType', 'make', 'Province', 'CoverType', 'VehicleType',
+                                                'make']])
+
+    def test_unknown_plot_kind(self):
+        with self.assertRaises(ValueError):
+            export_report(self.df, [{'kind': 'pie'}], self.output_dir, max_workers=1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+import numpy as np
+from scipy import stats
+from scripts.resampling import bootstrap_test, permutation_test
+
+class TestResampling(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(5)
+        self.a = rng.lognormal(3, 1, 400)
+        self.b = rng.lognormal(3.3, 1, 300)
+
+    def test_permutation_test_matches_scipy(self):
+        result = permutation_test(self.a, self.b, n_resamples=4000, random_state=0)
+        expected = stats.permutation_test((self.a, self.b), lambda x, y, axis: x.mean(axis=axis) - y.mean(axis=axis),
+                                          n_resamples=4000, random_state=0)
+        self.assertAlmostEqual(result.statistic, expected.statistic)
+        self.assertAlmostEqual(result.p_value, expected.pvalue, delta=0.01)
+
+    def test_permutation_test_is_reproducible_across_blocks_and_workers(self):
+        single = permutation_test(self.a, self.b, n_resamples=1000, random_state=7, block_bytes=10**6)
+        parallel = permutation_test(self.a, self.b, n_resamples=1000, random_state=7, block_bytes=10**6, n_jobs=2)
+        self.assertEqual(single, parallel)
+
+    def test_permutation_test_no_difference(self):
+        result = permutation_test(self.a, self.a.copy(), n_resamples=500, random_state=0)
+        self.assertEqual(result.p_value, 1.0)
+
+    def test_median_statistic(self):
+        result = permutation_test(self.a, self.b, statistic='median', n_resamples=500, random_state=0)
+        self.assertAlmostEqual(result.statistic, np.median(self.a) - np.median(self.b))
+
+    def test_bootstrap_test(self):
+        result = bootstrap_test(self.a, self.b, n_resamples=2000, random_state=0)
+        low, high = result.confidence_interval
+        self.assertTrue(low < result.statistic < high)
+        self.assertTrue(result.p_value < 0.05)
+
+    def test_missing_values_dropped(self):
+        result = permutation_test(np.append(self.a, np.nan), self.b, n_resamples=100, random_state=0)
+        self.assertAlmostEqual(result.statistic, self.a.mean() - self.b.mean())
+        with self.assertRaises(ValueError):
+            permutation_test([np.nan], self.b)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+import io
+import json
+import os
+import tempfile
+import threading
+import unittest
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pyarrow as pa
+from sklearn.feature_selection import f_regression
+from sklearn.linear_model import LinearRegression
+from scripts.feature_matrix import FeatureMatrix
+from scripts.preprocessing_pipeline import PreprocessingPipeline
+from scripts.scoring_service import MicroBatcher, PremiumScorer, make_http_server, serve_stdio
+from tests.test_preprocessing_pipeline import make_policies
+
+
+class TestScoringService(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        data = make_policies(400)
+        # A premium of 10 plus 0.1% of the sum insured, so predictions have a known value
+        data['TotalPremium'] = 10 + data['SumInsured'] / 1000 + np.random.default_rng(2).normal(0, 0.01, len(data))
+        pipeline = PreprocessingPipeline(k=10, score_func=f_regression, sparse=True).fit(data)
+        matrix = FeatureMatrix.from_pipeline(pipeline, data)
+        cls.scorer = PremiumScorer(pipeline, LinearRegression().fit(matrix.X, matrix.y))
+        # Quotes do not know the premium or the claims yet
+        cls.quotes = make_policies(40, seed=1).drop(columns=['TotalPremium', 'TotalClaims'])
+        cls.expected = cls.scorer.predict(cls.quotes)
+
+    def test_predictions_match_known_premiums(self):
+        self.assertNotIn('TotalPremium', self.scorer.required_columns)
+        np.testing.assert_allclose(self.expected, 10 + self.quotes['SumInsured'] / 1000, atol=0.1)
+
+    def test_missing_columns_raise(self):
+        with self.assertRaisesRegex(ValueError, "missing required columns: \\['SumInsured'\\]"):
+            self.scorer.predict(self.quotes.drop(columns=['SumInsured']))
+
+    def test_predict_accepts_records_frames_and_arrow(self):
+        self.assertEqual(self.expected.shape, (40,))
+        records = json.loads(self.quotes.to_json(orient='records'))
+        np.testing.assert_allclose(self.scorer.predict(records), self.expected, rtol=1e-6)
+        np.testing.assert_allclose(self.scorer.predict(records[3]), self.expected[3:4], rtol=1e-6)
+        batch = pa.RecordBatch.from_pandas(self.quotes, preserve_index=False)
+        np.testing.assert_allclose(self.scorer.predict(batch), self.expected, rtol=1e-6)
+        self.assertEqual(len(self.scorer.predict([])), 0)
+        with self.assertRaises(TypeError):
+            self.scorer.predict('not records')
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = os.path.join(tmp, 'pipeline.pkl'), os.path.join(tmp, 'model.pkl')
+            self.scorer.save(*paths)
+            loaded = PremiumScorer.load(*paths)
+        np.testing.assert_allclose(loaded.predict(self.quotes), self.expected)
+
+    def test_micro_batcher_groups_concurrent_requests(self):
+        records = self.quotes.to_dict(orient='records')
+        with MicroBatcher(self.scorer, max_batch_size=16, max_wait_ms=20) as batcher:
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                results = list(pool.map(lambda record: batcher.predict(record, timeout=10), records))
+            self.assertLess(len(batcher.batch_sizes), len(records))
+            self.assertLessEqual(max(batcher.batch_sizes), 16 + 7)
+            np.testing.assert_allclose(np.concatenate(results), self.expected, rtol=1e-6)
+
+            future = batcher.submit(self.quotes.iloc[:5])
+            np.testing.assert_allclose(future.result(timeout=10), self.expected[:5], rtol=1e-6)
+        with self.assertRaises(RuntimeError):
+            batcher.submit(records[0])
+
+    def test_errors_reach_the_caller(self):
+        with MicroBatcher(self.scorer) as batcher:
+            with self.assertRaises(Exception):
+                batcher.predict({'Title': 'Mr'}, timeout=10)
+            # The batcher keeps serving after a failed batch
+            np.testing.assert_allclose(batcher.predict(self.quotes.iloc[:2], timeout=10), self.expected[:2], rtol=1e-6)
+
+    def test_malformed_request_fails_alone(self):
+        records = self.quotes.to_dict(orient='records')
+        with MicroBatcher(self.scorer, max_batch_size=64, max_wait_ms=200) as batcher:
+            futures = [batcher.submit(records[0]), batcher.submit({'Title': 'Mr'}), batcher.submit(records[1:3])]
+            with self.assertRaises(ValueError):
+                futures[1].result(timeout=10)
+            np.testing.assert_allclose(futures[0].result(timeout=10), self.expected[:1], rtol=1e-6)
+            np.testing.assert_allclose(futures[2].result(timeout=10), self.expected[1:3], rtol=1e-6)
+            # The malformed request never joined the batch
+            self.assertEqual(list(batcher.batch_sizes), [3])
+
+    def test_request_missing_one_column_is_not_scored_with_its_batch(self):
+        records = self.quotes.to_dict(orient='records')
+        incomplete = {key: value for key, value in records[1].items() if key != 'SumInsured'}
+        with MicroBatcher(self.scorer, max_batch_size=64, max_wait_ms=200) as batcher:
+            futures = [batcher.submit(records[0]), batcher.submit(incomplete)]
+            with self.assertRaisesRegex(ValueError, "missing required columns: \\['SumInsured'\\]"):
+                futures[1].result(timeout=10)
+            np.testing.assert_allclose(futures[0].result(timeout=10), self.expected[:1], rtol=1e-6)
+        # The same holds for one list of records scored directly
+        with self.assertRaisesRegex(ValueError, 'SumInsured'):
+            self.scorer.predict([records[0], incomplete])
+
+    def test_http_server(self):
+        with MicroBatcher(self.scorer) as batcher:
+            server = make_http_server(batcher, port=0)
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+            try:
+                url = f"http://127.0.0.1:{server.server_address[1]}"
+                with urllib.request.urlopen(f"{url}/health") as response:
+                    self.assertEqual(json.load(response), {'status': 'ok'})
+
+                body = json.dumps({'records': json.loads(self.quotes.iloc[:3].to_json(orient='records'))}).encode()
+                request = urllib.request.Request(f"{url}/predict", data=body, headers={'Content-Type': 'application/json'})
+                with urllib.request.urlopen(request) as response:
+                    np.testing.assert_allclose(json.load(response)['predictions'], self.expected[:3], rtol=1e-6)
+
+                body = json.dumps({'records': [{'Title': 'Mr'}]}).encode()
+                request = urllib.request.Request(f"{url}/predict", data=body)
+                with self.assertRaises(urllib.error.HTTPError) as error:
+                    urllib.request.urlopen(request)
+                self.assertEqual(error.exception.code, 400)
+                self.assertIn('missing required columns', json.load(error.exception)['error'])
+
+                request = urllib.request.Request(f"{url}/predict", data=b'not json')
+                with self.assertRaises(urllib.error.HTTPError) as error:
+                    urllib.request.urlopen(request)
+                self.assertEqual(error.exception.code, 400)
+            finally:
+                server.shutdown()
+                server.server_close()
+
+    def test_stdio(self):
+        lines = [self.quotes.iloc[[i]].to_json(orient='records') for i in range(5)]
+        stdin = io.StringIO('\n'.join(lines + ['', 'not json']) + '\n')
+        stdout = io.StringIO()
+        with MicroBatcher(self.scorer) as batcher:
+            self.assertEqual(serve_stdio(batcher, stdin, stdout), 6)
+        outputs = [json.loads(line) for line in stdout.getvalue().splitlines()]
+        np.testing.assert_allclose([out['predictions'][0] for out in outputs[:5]], self.expected[:5], rtol=1e-6)
+        self.assertIn('error', outputs[5])
+
+
+if __name__ == '__main__':
+    unittest.main()
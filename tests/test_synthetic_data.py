@@ -0,0 +1,77 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from scripts.load_data import load_data
+from scripts.synthetic_data import (CONDITION_COLUMNS, FILENAME, MISSING_RATES, N_POSTAL_CODES, POLICY_COLUMNS,
+                                    VEHICLE_COLUMNS, generate_policies, iter_policies, write_policy_archive)
+
+
+class TestSyntheticData(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.data = generate_policies(200_000, seed=1)
+
+    def test_schema(self):
+        self.assertEqual(len(POLICY_COLUMNS), 52)
+        self.assertEqual(list(self.data.columns), POLICY_COLUMNS)
+        self.assertEqual(len(self.data), 200_000)
+        self.assertTrue(self.data['UnderwrittenCoverID'].is_unique)
+        self.assertTrue(pd.api.types.is_string_dtype(self.data['Province']))
+        self.assertTrue(pd.api.types.is_float_dtype(self.data['TotalPremium']))
+
+    def test_reproducible(self):
+        pd.testing.assert_frame_equal(generate_policies(1000, seed=3), generate_policies(1000, seed=3))
+        self.assertFalse(generate_policies(1000, seed=3).equals(generate_policies(1000, seed=4)))
+
+    def test_chunks_continue_the_rows(self):
+        chunks = list(iter_policies(2500, chunk_size=1000, seed=5))
+        self.assertEqual([len(chunk) for chunk in chunks], [1000, 1000, 500])
+        data = pd.concat(chunks)
+        np.testing.assert_array_equal(data['UnderwrittenCoverID'], np.arange(1, 2501))
+        pd.testing.assert_frame_equal(chunks[1], generate_policies(1000, seed=5, start=1000))
+
+    def test_missing_values(self):
+        rates = self.data.isna().mean()
+        for column, rate in MISSING_RATES.items():
+            self.assertAlmostEqual(rates[column], rate, delta=0.01)
+        # Columns of a group are missing together
+        vehicle_missing = self.data[VEHICLE_COLUMNS].isna()
+        self.assertTrue(vehicle_missing.eq(vehicle_missing['make'], axis=0).all().all())
+        condition_missing = self.data[CONDITION_COLUMNS].isna()
+        self.assertTrue(condition_missing.eq(condition_missing['WrittenOff'], axis=0).all().all())
+        self.assertEqual(rates['TotalPremium'], 0)
+
+    def test_distributions(self):
+        self.assertGreater(self.data['PostalCode'].nunique(), 0.8 * N_POSTAL_CODES)
+        self.assertEqual(self.data['Province'].nunique(), 9)
+        self.assertEqual(self.data['Gender'].value_counts().index[0], 'Not specified')
+        self.assertEqual(self.data.groupby('PostalCode')['Province'].nunique().max(), 1)
+
+        claims = self.data['TotalClaims']
+        self.assertLess((claims != 0).mean(), 0.01)
+        # Heavy tail: the largest claims dwarf the typical one
+        self.assertGreater(claims.max(), 50 * claims[claims > 0].median())
+        self.assertGreater((self.data['TotalPremium'] == 0).mean(), 0.3)
+        self.assertTrue((self.data['TotalPremium'] < 0).any())
+
+    def test_archive_loads_like_the_real_data(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = write_policy_archive(os.path.join(tmp, 'data.zip'), 3000, chunk_size=1000, seed=2)
+            loaded = load_data(path, FILENAME)
+            chunks = list(load_data(path, FILENAME, chunksize=1000))
+
+        expected = pd.concat(iter_policies(3000, chunk_size=1000, seed=2))
+        self.assertEqual(list(loaded.columns), POLICY_COLUMNS)
+        self.assertEqual(len(loaded), 3000)
+        self.assertEqual(sum(len(chunk) for chunk in chunks), 3000)
+        np.testing.assert_allclose(loaded['TotalClaims'], expected['TotalClaims'])
+        pd.testing.assert_series_equal(loaded['Province'], expected['Province'].reset_index(drop=True),
+                                       check_dtype=False)
+        self.assertEqual(loaded['Gender'].isna().sum(), expected['Gender'].isna().sum())
+
+
+if __name__ == '__main__':
+    unittest.main()
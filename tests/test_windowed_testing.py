@@ -0,0 +1,84 @@
+import unittest
+import numpy as np
+import pandas as pd
+from scripts.group_statistics import GroupMoments, compare_groups
+from scripts.hypothesis_testing import ABHypothesisTesting
+from scripts.windowed_testing import WindowedGroupTester, monthly_moments, rolling_group_tests
+
+
+class TestWindowedTesting(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        n = 1200
+        months = pd.date_range('2014-01-01', periods=6, freq='MS')
+        self.data = pd.DataFrame({
+            'TransactionMonth': rng.choice(months, n).astype('datetime64[ns]').astype(str),
+            'Province': rng.choice(['Gauteng', 'Western Cape', 'Limpopo'], n),
+            'Gender': rng.choice(['Male', 'Female'], n),
+            'TotalPremium': rng.gamma(2.0, 50.0, n),
+        })
+        self.data.loc[::17, 'TotalPremium'] = np.nan
+        self.months = pd.to_datetime(self.data['TransactionMonth']).dt.to_period('M')
+
+    def _expected(self, feature, start, end, **kwargs):
+        rows = self.data[(self.months >= start) & (self.months <= end)]
+        return compare_groups(GroupMoments.from_frame(rows, feature, 'TotalPremium'), **kwargs)
+
+    def test_monthly_moments(self):
+        moments = monthly_moments(self.data, 'Province', 'TotalPremium')
+        self.assertEqual([month for month, _ in moments], sorted(self.months.unique()))
+        month, first = moments[0]
+        expected = GroupMoments.from_frame(self.data[self.months == month], 'Province', 'TotalPremium')
+        pd.testing.assert_frame_equal(first.moments.sort_index(), expected.moments.sort_index(), check_names=False)
+
+    def test_windows_match_rescanning(self):
+        tester = WindowedGroupTester('Province', 'TotalPremium', window=3)
+        results = tester.update(self.data)
+        windows = results[['window_start', 'window_end']].drop_duplicates()
+        self.assertEqual(len(windows), 6)
+
+        for start, end in windows.itertuples(index=False):
+            self.assertLessEqual((end - start).n, 2)
+            window = results[(results['window_start'] == start) & (results['window_end'] == end)]
+            expected = self._expected('Province', start, end).sort_values(['group_a', 'group_b'])
+            window = window.drop(columns=['window_start', 'window_end']).sort_values(['group_a', 'group_b'])
+            pd.testing.assert_frame_equal(window.reset_index(drop=True), expected.reset_index(drop=True))
+
+    def test_incremental_updates_match_single_pass(self):
+        tester = WindowedGroupTester('Gender', 'TotalPremium', window=2, mode='one_vs_rest', test='welch')
+        for month in sorted(self.months.unique()):
+            tester.update(self.data[self.months == month])
+        single = WindowedGroupTester('Gender', 'TotalPremium', window=2, mode='one_vs_rest', test='welch')
+        single.update(self.data)
+        pd.testing.assert_frame_equal(tester.results(), single.results())
+        self.assertEqual(len(tester.months), 2)
+
+    def test_gap_month_does_not_widen_window(self):
+        data = self.data[self.months != pd.Period('2014-04', 'M')]
+        tester = WindowedGroupTester('Province', 'TotalPremium', window=3)
+        results = tester.update(data)
+        last = results[results['window_end'] == pd.Period('2014-05', 'M')]
+        # March and May only: February is not kept in place of the missing April
+        self.assertEqual(last['window_start'].unique().tolist(), [pd.Period('2014-03', 'M')])
+        rows = self.data[self.months.isin([pd.Period('2014-03', 'M'), pd.Period('2014-05', 'M')])]
+        expected = compare_groups(GroupMoments.from_frame(rows, 'Province', 'TotalPremium'))
+        pd.testing.assert_frame_equal(last.drop(columns=['window_start', 'window_end']).reset_index(drop=True),
+                                      expected)
+        self.assertEqual([month for month, _ in tester.months], [pd.Period('2014-05', 'M'), pd.Period('2014-06', 'M')])
+
+    def test_out_of_order_month_raises(self):
+        tester = WindowedGroupTester('Province', 'TotalPremium')
+        tester.update(self.data[self.months == self.months.max()])
+        with self.assertRaises(ValueError):
+            tester.update(self.data[self.months == self.months.min()])
+
+    def test_rolling_group_tests_and_hypothesis_method(self):
+        results = rolling_group_tests(self.data, ['Province', 'Gender'], window=3)
+        self.assertEqual(set(results['feature']), {'Province', 'Gender'})
+        gender = results[results['feature'] == 'Gender'].drop(columns='feature').reset_index(drop=True)
+        pd.testing.assert_frame_equal(gender, ABHypothesisTesting(self.data).rolling_margin_tests('Gender', window=3))
+
+
+if __name__ == '__main__':
+    unittest.main()